@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Локальный поиск (engine="heuristic") против CP-SAT на одних и тех же синтетических линиях.
+
+    python -m benchmarks.compare_heuristic --sizes 50 200 1000 --budget 10 --heuristic-budget 1
+"""
+import argparse
+import json
+import time
+
+from planner.optimizer import build_line_schedule_cp, analyze_sequence_cost
+from planner.precedence import violated_precedences
+from benchmarks.synthetic import make_line
+
+def run_case(n: int, budget: float, heuristic_budget: float, workers: int, seed: int, model: str,
+             lns_window: int) -> list[dict]:
+    jobs, trans = make_line(n, n_skus=40, seed=seed, strict_density=0.2)
+    modes = [("cpsat", {"model": model, "solver_time_limit_sec": budget, "num_workers": workers})]
+    if lns_window:
+        modes.append(("lns", {"lns_window": lns_window, "solver_time_limit_sec": budget, "num_workers": workers}))
+    modes.append(("heuristic", {"engine": "heuristic", "solver_time_limit_sec": heuristic_budget}))
+    out = []
+    for name, kw in modes:
+        stats = {}
+        t0 = time.perf_counter()
+        order, times, makespan = build_line_schedule_cp(f"n={n}/{name}", jobs, trans, 0.0, log_fn=None,
+                                                        stats=stats, **kw)
+        wall = time.perf_counter() - t0
+        assert not violated_precedences(order)
+        out.append({
+            "mode": name, "n": n,
+            "wall_sec": round(wall, 3),
+            "makespan": makespan,
+            "bound": stats.get("bound"),
+            "gap_pct": round(stats["gap"] * 100.0, 2) if "gap" in stats else None,
+            "setup_total": analyze_sequence_cost("", order, trans)[0],
+        })
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Локальный поиск vs CP-SAT")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    ap.add_argument("--budget", type=float, default=10.0, help="Лимит CP-SAT, с")
+    ap.add_argument("--heuristic-budget", type=float, default=1.0, help="Лимит локального поиска, с")
+    ap.add_argument("--lns-window", type=int, default=0, help="Добавить LNS по окнам (0 — нет)")
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--model", default="pairwise")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        for res in run_case(n, args.budget, args.heuristic_budget, args.workers, args.seed, args.model,
+                            args.lns_window):
+            results.append(res)
+            print(f"n={n:5d} {res['mode']:10s} wall={res['wall_sec']:.2f}s "
+                  f"makespan={res['makespan']} setup={res['setup_total']} gap={res['gap_pct']}%")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Монолитная модель против LNS по окнам на длинных синтетических линиях.
+
+    python -m benchmarks.compare_lns --sizes 1000 --budget 30 --window 20
+"""
+import argparse
+import json
+import time
+
+from planner.optimizer import build_line_schedule_cp, analyze_sequence_cost
+from planner.precedence import violated_precedences
+from benchmarks.synthetic import make_line
+
+def run_case(n: int, budget: float, window: int, workers: int, seed: int, model: str) -> list[dict]:
+    jobs, trans = make_line(n, n_skus=40, seed=seed, strict_density=0.2)
+    out = []
+    for name, kw in (("monolithic", {"model": model}), ("lns", {"lns_window": window})):
+        t0 = time.perf_counter()
+        order, times, makespan = build_line_schedule_cp(
+            f"n={n}/{name}", jobs, trans, 0.0, solver_time_limit_sec=budget,
+            num_workers=workers, log_fn=None, **kw)
+        wall = time.perf_counter() - t0
+        assert not violated_precedences(order)
+        out.append({
+            "mode": name, "n": n,
+            "wall_sec": round(wall, 2),
+            "makespan": makespan,
+            "setup_total": analyze_sequence_cost("", order, trans)[0],
+        })
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Монолитная модель vs LNS")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000])
+    ap.add_argument("--budget", type=float, default=30.0)
+    ap.add_argument("--window", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--model", default="pairwise")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    results = []
+    for n in args.sizes:
+        for res in run_case(n, args.budget, args.window, args.workers, args.seed, args.model):
+            results.append(res)
+            print(f"n={n:5d} {res['mode']:10s} wall={res['wall_sec']:.1f}s "
+                  f"makespan={res['makespan']} setup={res['setup_total']}")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
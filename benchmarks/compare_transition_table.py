@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""TransitionTable (плотные массивы) против прежнего dict {"FROM>>TO": (mins, next_launch, note)}
+на карте переходов синтетической книги: память, get() и построение LineSetup.
+
+    python -m benchmarks.compare_transition_table --skus 50 200 500 --density 0.8
+"""
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+
+from planner.excel_io import read_jobs_from_active_excel
+from planner.setup_matrix import LineSetup
+from planner.transitions import read_transition_matrix_from_active_excel
+from benchmarks.workbook import make_workbook
+
+def deep_sizeof(obj, seen=None) -> int:
+    # Размер dict вместе с ключами, кортежами и числами; общие объекты (примечания) — один раз
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (tuple, list)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+def _best(fn, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+def run_case(n_skus: int, jobs_per_line: int, density: float, seed: int, repeat: int) -> dict:
+    app = make_workbook(n_lines=1, jobs_per_line=jobs_per_line, n_skus=n_skus, transition_density=density,
+                        seed=seed)
+    jobs = read_jobs_from_active_excel(app)
+    line, table = next(iter(read_transition_matrix_from_active_excel(app)["transitions"].items()))
+    as_dict = dict(table.items())
+    by_line = defaultdict(list)
+    for j in jobs:
+        by_line[j["Line"]].append(j)
+    line_jobs = by_line[line]
+
+    pairs = [f"{a}>>{b}" for a in table.keys for b in table.keys]
+    res = {"skus": len(table.keys), "pairs": len(as_dict),
+           "table_kb": round(table.nbytes() / 1024, 1),
+           "dict_kb": round(deep_sizeof(as_dict) / 1024, 1)}
+    for name, trans in (("table", table), ("dict", as_dict)):
+        get = trans.get
+        res[f"{name}_get_us"] = round(_best(lambda: [get(p) for p in pairs], repeat) / len(pairs) * 1e6, 3)
+        res[f"{name}_setup_ms"] = round(_best(lambda: LineSetup(line_jobs, trans), repeat) * 1e3, 2)
+    return res
+
+def main():
+    ap = argparse.ArgumentParser(description="TransitionTable vs dict: память и время доступа")
+    ap.add_argument("--skus", type=int, nargs="+", default=[50, 200, 500])
+    ap.add_argument("--jobs", type=int, default=300, help="Заданий на линии (для LineSetup)")
+    ap.add_argument("--density", type=float, default=0.8, help="Доля заданных переходов")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    results = []
+    for k in args.skus:
+        res = run_case(k, args.jobs, args.density, args.seed, args.repeat)
+        results.append(res)
+        print(f"skus={res['skus']:4d} pairs={res['pairs']:7d} "
+              f"память {res['table_kb']:.1f} КБ / dict {res['dict_kb']:.1f} КБ; "
+              f"get {res['table_get_us']:.2f} / {res['dict_get_us']:.2f} мкс; "
+              f"LineSetup {res['table_setup_ms']:.2f} / {res['dict_setup_ms']:.2f} мс")
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
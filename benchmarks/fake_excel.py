@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Книга Excel в памяти, повторяющая ту часть COM API, которой пользуются читатели
+и write_plan_to_excel: Worksheets, ListObjects, HeaderRowRange, DataBodyRange,
+UsedRange, Cells, Range, Value.
+
+Каждое обращение, которое у настоящего Excel было бы межпроцессным вызовом COM,
+учитывается в app.calls (Counter по именам вида "Range.Value"); app.com_calls — сумма.
+Так без Windows можно проверить, что чтение таблицы стоит постоянного числа вызовов,
+а не вызова на клетку.
+"""
+from collections import Counter
+
+def _grid(values):
+    return tuple(tuple(r) for r in values)
+
+class _Rows:
+    def __init__(self, count):
+        self.Count = count
+
+class FakeRange:
+    """Прямоугольник клеток. Value — кортеж строк, как у COM (одна клетка — само значение)."""
+
+    def __init__(self, calls, values):
+        self._calls = calls
+        self._values = _grid(values)
+
+    @property
+    def Value(self):
+        self._calls["Range.Value"] += 1
+        if len(self._values) == 1 and len(self._values[0]) == 1:
+            return self._values[0][0]
+        return self._values
+
+    @property
+    def Rows(self):
+        self._calls["Range.Rows"] += 1
+        return _Rows(len(self._values))
+
+    def Cells(self, r, c):
+        self._calls["Range.Cells"] += 1
+        return FakeRange(self._calls, [[self._values[r - 1][c - 1]]])
+
+    def __iter__(self):
+        self._calls["Range.__iter__"] += 1
+        return iter([FakeRange(self._calls, [[v]]) for row in self._values for v in row])
+
+class FakeListObject:
+    def __init__(self, calls, name, header, body):
+        self._calls = calls
+        self._name = name
+        self._header = FakeRange(calls, [header])
+        self._body = FakeRange(calls, body) if body else None
+
+    @property
+    def Name(self):
+        self._calls["ListObject.Name"] += 1
+        return self._name
+
+    @property
+    def HeaderRowRange(self):
+        self._calls["ListObject.HeaderRowRange"] += 1
+        return self._header
+
+    @property
+    def DataBodyRange(self):
+        self._calls["ListObject.DataBodyRange"] += 1
+        return self._body
+
+class _WriteRange:
+    def __init__(self, ws, first, last):
+        self._ws = ws
+        self._first = first
+        self._last = last
+
+    @property
+    def Value(self):
+        self._ws._calls["Range.Value"] += 1
+        (r1, c1), (r2, c2) = self._first, self._last
+        return tuple(tuple(self._ws.cells.get((r, c)) for c in range(c1, c2 + 1)) for r in range(r1, r2 + 1))
+
+    @Value.setter
+    def Value(self, block):
+        self._ws._calls["Range.Value="] += 1
+        r1, c1 = self._first
+        for dr, row in enumerate(block):
+            for dc, v in enumerate(row):
+                self._ws.cells[(r1 + dr, c1 + dc)] = v
+
+class _Cells:
+    def __init__(self, ws):
+        self._ws = ws
+
+    def __call__(self, r, c):
+        self._ws._calls["Worksheet.Cells"] += 1
+        return (r, c)
+
+    def Clear(self):
+        self._ws._calls["Cells.Clear"] += 1
+        self._ws.cells.clear()
+
+class FakeWorksheet:
+    def __init__(self, calls, name, list_objects=(), used=None):
+        self._calls = calls
+        self.Name = name
+        self._list_objects = [FakeListObject(calls, *lo) for lo in list_objects]
+        self._used = FakeRange(calls, used or [[None]])
+        self.cells = {}
+        self.Cells = _Cells(self)
+
+    @property
+    def ListObjects(self):
+        self._calls["Worksheet.ListObjects"] += 1
+        return list(self._list_objects)
+
+    @property
+    def UsedRange(self):
+        self._calls["Worksheet.UsedRange"] += 1
+        return self._used
+
+    def Range(self, first, last):
+        self._calls["Worksheet.Range"] += 1
+        return _WriteRange(self, first, last)
+
+class _Worksheets:
+    def __init__(self, calls, sheets):
+        self._calls = calls
+        self._sheets = sheets
+
+    def __call__(self, name):
+        self._calls["Worksheets()"] += 1
+        sheets = list(self._sheets.values())
+        if isinstance(name, int):
+            return sheets[name - 1]
+        for ws in sheets:
+            if ws.Name == name:
+                return ws
+        raise KeyError(name)
+
+    @property
+    def Count(self):
+        self._calls["Worksheets.Count"] += 1
+        return len(self._sheets)
+
+    def Add(self, After=None):
+        self._calls["Worksheets.Add"] += 1
+        name = f"Лист{len(self._sheets) + 1}"
+        ws = FakeWorksheet(self._calls, name)
+        self._sheets[name] = ws
+        return ws
+
+class FakeWorkbook:
+    def __init__(self, calls, sheets):
+        self.Worksheets = _Worksheets(calls, sheets)
+
+class FakeExcelApp:
+    """sheets: {имя листа: {"tables": [(имя, заголовок, строки), ...], "used": сетка значений}}."""
+
+    def __init__(self, sheets: dict):
+        self.calls = Counter()
+        self.ActiveWorkbook = FakeWorkbook(self.calls, {
+            name: FakeWorksheet(self.calls, name, spec.get("tables", ()), spec.get("used"))
+            for name, spec in sheets.items()
+        })
+
+    @property
+    def com_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_calls(self):
+        self.calls.clear()
+
+def make_fake_app(jobs_header, jobs_body, std_header=None, std_body=None, transitions=None) -> FakeExcelApp:
+    """Книга с листами JOBS (JobsTable), Таблица_Нормативов (StdStops) и Карта_Переходов (сетка)."""
+    sheets = {"JOBS": {"tables": [("JobsTable", jobs_header, jobs_body)]},
+              "Карта_Переходов": {"used": transitions}}
+    if std_header is not None:
+        sheets["Таблица_Нормативов"] = {"tables": [("StdStops", std_header, std_body)]}
+    return FakeExcelApp(sheets)
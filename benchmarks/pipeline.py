@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Время и память по этапам конвейера optimize_all на синтетической книге (без Excel).
+
+    python -m benchmarks.pipeline --lines 3 --jobs 200 --skus 30 --time-limit 5 --out bench.json
+
+Этапы: parse (чтение листов), setup_matrix (LineSetup), model_build (модель CP-SAT),
+solve (build_line_schedule_cp целиком, включая собственную сборку модели),
+events (build_events_for_line), analyze (analyze_sequence_cost базы и плана).
+"""
+import argparse
+import datetime as dt
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+
+from planner.batching import collapse_same_sku, expand_batches
+from planner.events import build_events_for_line
+from planner.excel_io import read_jobs_from_active_excel
+from planner.heuristic import greedy_order
+from planner.hints import hint_times
+from planner.optimizer import _MODEL_BUILDERS, _line_inputs, build_line_schedule_cp, analyze_sequence_cost
+from planner.setup_matrix import LineSetup
+from planner.transitions import read_transition_matrix_from_active_excel, read_stdstops_dict
+from planner.utils import LAUNCH_FALLBACK_MIN
+from benchmarks.workbook import make_workbook
+
+STAGES = ("parse", "setup_matrix", "model_build", "solve", "events", "analyze")
+
+class _Stages:
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.wall = defaultdict(float)
+        self.peak = defaultdict(int)
+
+    def run(self, stage, fn, *args, **kwargs):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        out = fn(*args, **kwargs)
+        self.wall[stage] += time.perf_counter() - t0
+        if self.trace_memory:
+            self.peak[stage] = max(self.peak[stage], tracemalloc.get_traced_memory()[1] - base)
+        return out
+
+    def report(self) -> dict:
+        return {st: {"wall_sec": round(self.wall[st], 4),
+                     "peak_kb": round(self.peak[st] / 1024, 1) if self.trace_memory else None}
+                for st in STAGES}
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def _build_model(tasks, trans, costs, model):
+    durations, setup, sku, _ = _line_inputs(tasks, trans, costs)
+    seq = greedy_order(tasks, setup)
+    starts = hint_times(seq, durations, setup, all_pairs=(model == "pairwise"))
+    h = max(s + d for s, d in zip(starts, durations))
+    m, _, _ = _MODEL_BUILDERS[model](tasks, durations, setup, sku, h, (seq, starts))
+    proto = m.Proto()
+    return len(proto.variables), len(proto.constraints)
+
+def run_pipeline(n_lines=3, jobs_per_line=100, n_skus=20, priority_levels=3, strict_density=0.1,
+                 transition_density=1.0, seed=0, model="pairwise", time_limit=5.0, workers=8,
+                 batch_same_sku=True, gap_limit=0.0, trace_memory=True) -> dict:
+    app = make_workbook(n_lines, jobs_per_line, n_skus, priority_levels, strict_density,
+                        transition_density, seed)
+    plan_start = dt.datetime(2025, 1, 6, 8, 0)
+    stages = _Stages(trace_memory)
+    if trace_memory:
+        tracemalloc.start()
+    t_total = time.perf_counter()
+    try:
+        jobs = stages.run("parse", read_jobs_from_active_excel, app)
+        stages.run("parse", read_stdstops_dict, app)
+        tdata = stages.run("parse", read_transition_matrix_from_active_excel, app)
+
+        by_line = defaultdict(list)
+        for j in jobs:
+            by_line[j["Line"]].append(j)
+
+        lines = {}
+        for line, jlist in by_line.items():
+            trans = tdata["transitions"].get(line, {})
+            start_launch = float(tdata["start_launch"].get(line, (LAUNCH_FALLBACK_MIN, -1.0))[0])
+            costs = stages.run("setup_matrix", LineSetup, jlist, trans)
+            tasks = collapse_same_sku(jlist) if batch_same_sku else jlist
+            n_vars, n_cons = stages.run("model_build", _build_model, tasks, trans, costs, model)
+
+            sstats = {}
+            order, times, obj = stages.run("solve", build_line_schedule_cp, line, tasks, trans, start_launch,
+                                           solver_time_limit_sec=time_limit, log_fn=None, model=model,
+                                           num_workers=workers, costs=costs, gap_limit=gap_limit, stats=sstats)
+            if batch_same_sku:
+                order, times = expand_batches(order, times)
+            events = stages.run("events", build_events_for_line, line, order, times, trans, plan_start,
+                                start_launch, costs)
+            base_seq = sorted(jlist, key=lambda x: x["_row"])
+            base_total, _ = stages.run("analyze", analyze_sequence_cost, line, base_seq, trans, costs)
+            opt_total, _ = stages.run("analyze", analyze_sequence_cost, line, order, trans, costs)
+
+            lines[line] = {
+                "n_jobs": len(jlist), "n_tasks": len(tasks),
+                "vars": n_vars, "constraints": n_cons,
+                "status": sstats.get("status"),
+                "objective": obj, "bound": sstats.get("bound"),
+                "gap_pct": round(sstats.get("gap", 0.0) * 100.0, 2),
+                "setup_base": base_total, "setup_opt": opt_total,
+                "events": len(events),
+            }
+        total_wall = time.perf_counter() - t_total
+        total_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "params": {"lines": n_lines, "jobs_per_line": jobs_per_line, "skus": n_skus,
+                   "priority_levels": priority_levels, "strict_density": strict_density,
+                   "transition_density": transition_density, "seed": seed, "model": model,
+                   "time_limit": time_limit, "workers": workers, "batch_same_sku": batch_same_sku,
+                   "gap_limit": gap_limit},
+        "total": {"wall_sec": round(total_wall, 3),
+                  "peak_kb": round(total_peak / 1024, 1) if trace_memory else None,
+                  "objective": sum(r["objective"] for r in lines.values())},
+        "stages": stages.report(),
+        "lines": lines,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Бенчмарк этапов планировщика на синтетической книге")
+    ap.add_argument("--lines", type=int, default=3)
+    ap.add_argument("--jobs", type=int, default=100, help="Заданий на линию")
+    ap.add_argument("--skus", type=int, default=20, help="Различных SKU на линию")
+    ap.add_argument("--priorities", type=int, default=3)
+    ap.add_argument("--strict-density", type=float, default=0.1)
+    ap.add_argument("--transition-density", type=float, default=1.0,
+                    help="Доля заполненных клеток карты переходов")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", default="pairwise", choices=list(_MODEL_BUILDERS))
+    ap.add_argument("--time-limit", type=float, default=5.0)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--gap", type=float, default=0.0)
+    ap.add_argument("--no-batch", action="store_true", help="Не схлопывать задания одного SKU")
+    ap.add_argument("--no-memory", action="store_true",
+                    help="Без tracemalloc (он замедляет Python-этапы в разы)")
+    ap.add_argument("--out", default="", help="Куда записать JSON (по умолчанию — stdout)")
+    args = ap.parse_args()
+
+    result = run_pipeline(args.lines, args.jobs, args.skus, args.priorities, args.strict_density,
+                          args.transition_density, args.seed, args.model, args.time_limit, args.workers,
+                          not args.no_batch, args.gap, not args.no_memory)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        for st, v in result["stages"].items():
+            print(f"{st:13s} {v['wall_sec']:9.3f} с" + (f" {v['peak_kb']:10.1f} КБ" if v["peak_kb"] is not None else ""))
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import random
+from planner.utils import sku_key_norm
+
+def make_line(n_jobs: int, n_skus: int = 20, priority_levels: int = 3,
+              strict_density: float = 0.1, seed: int = 0,
+              line_name: str = "Линия 1"):
+    rnd = random.Random(seed)
+    skus = [(f"Продукт {k}", f"{rnd.choice((0.5, 1.0, 1.5, 2.0))}л") for k in range(n_skus)]
+    n_keys = max(1, n_jobs // 20)
+
+    jobs = []
+    for r in range(1, n_jobs + 1):
+        name, vol = rnd.choice(skus)
+        prio = rnd.randint(1, priority_levels)
+        # строгий ключ внутри одного приоритета — иначе порядок может быть противоречив
+        strict = f"S{prio}_{rnd.randrange(n_keys)}" if rnd.random() < strict_density else ""
+        jobs.append({
+            "JobID":    f"J{r:05d}",
+            "Line":     line_name,
+            "Name":     name,
+            "Volume":   vol,
+            "Quantity": float(rnd.randint(500, 20000)),
+            "Speed":    float(rnd.choice((3000, 6000, 9000, 12000))),
+            "Priority": prio,
+            "StrictKey": strict,
+            "_row": r,
+        })
+
+    trans = {}
+    keys = [sku_key_norm(f"{n} {v}") for n, v in skus]
+    for a in keys:
+        for b in keys:
+            if a == b:
+                continue
+            mins = float(rnd.choice((0, 15, 30, 45, 60, 90, 120)))
+            next_launch = float(rnd.choice((-1, 10, 20, 30)))
+            trans[f"{a}>>{b}"] = (mins, next_launch, "synthetic")
+    return jobs, trans
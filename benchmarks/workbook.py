@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Синтетическая книга Excel в памяти: те же листы и таблицы, что читают
+read_jobs_from_active_excel, read_transition_matrix_from_active_excel и read_stdstops_dict.
+Работает без Excel и pywin32 (benchmarks.fake_excel — считает вызовы COM)."""
+import random
+from benchmarks.fake_excel import FakeExcelApp, make_fake_app
+
+STD_EVENTS = {"Мойка": 15, "Переход": 30, "Санобработка": 60, "Смена формата": 90}
+
+def make_workbook(n_lines: int = 3, jobs_per_line=100, n_skus: int = 20,
+                  priority_levels: int = 3, strict_density: float = 0.1,
+                  transition_density: float = 1.0, flex_density: float = 0.0,
+                  seed: int = 0) -> FakeExcelApp:
+    # transition_density — доля заполненных клеток карты переходов;
+    # пустые клетки читатель превращает в CHANGEOVER_FALLBACK_MIN.
+    # jobs_per_line — число или список по линиям (для несбалансированной загрузки).
+    # flex_density — доля заданий с колонкой Lines (2–3 линии, своя скорость на каждой);
+    # при flex_density > 0 каталог SKU общий для всех линий.
+    rnd = random.Random(seed)
+    lines = [f"Линия {k}" for k in range(1, n_lines + 1)]
+    per_line = jobs_per_line if isinstance(jobs_per_line, (list, tuple)) else [jobs_per_line] * n_lines
+    catalog = [f"Продукт {k} {rnd.choice((0.5, 1.0, 1.5, 2.0))}л" for k in range(n_skus)] if flex_density > 0 else None
+
+    std_header = ["Событие"] + lines
+    std_body = [[ev] + [f"{mins};{rnd.choice((10, 20, 30))}" for _ in lines] for ev, mins in STD_EVENTS.items()]
+    std_body.append(["Запуск линии"] + [30 for _ in lines])
+
+    jobs_body = []
+    used = []
+    row = 0
+    for line, n_jobs in zip(lines, per_line):
+        skus = catalog or [f"Продукт {k} {rnd.choice((0.5, 1.0, 1.5, 2.0))}л" for k in range(n_skus)]
+        used.append([f"Линия: {line}"] + [None] * n_skus)
+        used.append([None] + skus)
+        for a in skus:
+            cells = []
+            for b in skus:
+                if a == b or rnd.random() >= transition_density:
+                    cells.append(None)
+                else:
+                    cells.append(rnd.choice(list(STD_EVENTS)))
+            used.append([a] + cells)
+
+        n_keys = max(1, n_jobs // 20)
+        for _ in range(n_jobs):
+            row += 1
+            name, vol = rnd.choice(skus).rsplit(" ", 1)
+            prio = rnd.randint(1, priority_levels)
+            # строгий ключ внутри одного приоритета — иначе порядок может быть противоречив
+            strict = f"S{prio}_{rnd.randrange(n_keys)}" if rnd.random() < strict_density else None
+            jobs_body.append([f"J{row:06d}", line, name, vol, rnd.randint(500, 20000),
+                              rnd.choice((3000, 6000, 9000, 12000)), prio, strict])
+            if flex_density > 0:
+                flex = ""
+                if rnd.random() < flex_density:
+                    others = rnd.sample([l for l in lines if l != line], min(len(lines) - 1, rnd.randint(1, 2)))
+                    flex = "; ".join(f"{l}={rnd.choice((3000, 6000, 9000, 12000))}" for l in others)
+                jobs_body[-1].append(flex)
+
+    jobs_header = ["JobID", "Line", "Name", "Volume", "Quantity", "Speed", "Priority", "Строгий порядок"]
+    if flex_density > 0:
+        jobs_header.append("Lines")
+    return make_fake_app(jobs_header, jobs_body, std_header, std_body, used)
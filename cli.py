@@ -1,36 +1,183 @@
 # -*- coding: utf-8 -*-
 import argparse
 import datetime as dt
-import csv
-from win32com.client import Dispatch
-from planner.events import optimize_all
+import json
+import os
+import sys
+try:
+    from win32com.client import Dispatch
+except ImportError:  # не Windows или нет pywin32: книга читается из файла (planner.sources)
+    Dispatch = None
+from planner.events import iter_optimize, read_plan_inputs
+from planner.optimizer import SOLVER_ENGINES
+from planner.event_log import EventLog
+from planner.hints import plan_hints_from_rows, read_plan_hints_csv
+from planner.replan import FREEZE_MINUTES, frozen_prefix, plan_rows_from_csv
+from planner.cache import SolveCache
+from planner.trace import TraceRecorder
+from planner.export import EXPORT_FORMATS, PLAN_COLUMNS, export_plan, plan_records, write_csv, write_plan_to_excel
+from planner.scenarios import SCENARIO_COLUMNS, TOTAL_LINE, run_scenarios, scenario_table
+from planner.sources import open_workbook
 
-def main():
-    ap = argparse.ArgumentParser(description="CP-SAT Планировщик (CLI)")
-    ap.add_argument("--start", required=True, help='Старт, формат "ДД.ММ.ГГГГ ЧЧ:ММ"')
-    ap.add_argument("--file", default="", help="Путь к Excel файлу (если не указан — берём активную книгу)")
-    ap.add_argument("--csv", default="plan.csv", help="Куда сохранить CSV с планом")
-    args = ap.parse_args()
+ENGINE_TIME_LIMIT_SEC = {"cpsat": 10.0, "heuristic": 1.0}
 
-    plan_start = dt.datetime.strptime(args.start, "%d.%m.%Y %H:%M")
+def _use_file_source(path, no_com=False):
+    return bool(path) and (no_com or Dispatch is None or os.path.isdir(path))
 
+def _open_excel(path, no_com=False):
+    # Без Excel (или с --no-com) --file читается напрямую: .xlsx/.xlsm или каталог CSV
+    if _use_file_source(path, no_com):
+        return open_workbook(path)
+    if Dispatch is None:
+        raise RuntimeError("Excel недоступен (нет pywin32): укажите --file с .xlsx или каталогом CSV.")
     excel = Dispatch("Excel.Application")
-    if args.file:
-        wb = excel.Workbooks.Open(args.file); wb.Activate()
+    if path:
+        wb = excel.Workbooks.Open(path); wb.Activate()
     if excel.ActiveWorkbook is None:
         raise RuntimeError("Нет активной книги Excel (и файл не задан).")
+    return excel
+
+def main_scenarios(argv):
+    ap = argparse.ArgumentParser(prog="cli.py scenarios",
+                                 description="Сравнение сценариев «что если» при одном чтении книги")
+    ap.add_argument("scenarios", help="JSON со списком сценариев (см. planner/scenarios.py)")
+    ap.add_argument("--start", required=True, help='Старт по умолчанию, формат "ДД.ММ.ГГГГ ЧЧ:ММ"')
+    ap.add_argument("--file", default="",
+                    help="Книга Excel (если не указана — берём активную); без Excel — .xlsx/.xlsm или каталог CSV")
+    ap.add_argument("--no-com", action="store_true",
+                    help="Читать --file (.xlsx/.xlsm или каталог CSV) напрямую, не запуская Excel")
+    ap.add_argument("--table", default="scenarios.csv", help="Куда сохранить CSV сравнения сценариев")
+    ap.add_argument("--max-parallel", type=int, default=1, help="Сколько сценариев решать одновременно")
+    ap.add_argument("--total-workers", type=int, default=None,
+                    help="Общее число потоков CP-SAT на все одновременные сценарии (по умолчанию — все ядра)")
+    ap.add_argument("--time-limit", type=float, default=10.0, help="Лимит CP-SAT на линию, с")
+    ap.add_argument("--lns-window", type=int, default=0,
+                    help="Для длинных линий: LNS по окнам из N заданий вместо одной модели (0 — выкл.)")
+    args = ap.parse_args(argv)
+
+    plan_start = dt.datetime.strptime(args.start, "%d.%m.%Y %H:%M")
+    with open(args.scenarios, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    inputs = read_plan_inputs(_open_excel(args.file, args.no_com))
+
+    results = run_scenarios(inputs, scenarios, plan_start, max_parallel=args.max_parallel,
+                            total_workers=args.total_workers, solver_time_limit_sec=args.time_limit,
+                            lns_window=args.lns_window)
+    table = scenario_table(results)
+    write_csv(args.table, (tuple(r[c] for c in SCENARIO_COLUMNS) for r in table), SCENARIO_COLUMNS)
+    for r in table:
+        if r["Line"] == TOTAL_LINE:
+            print(f"[{r['Scenario']}] idle: {r['opt_idle']:.1f} | ЭКОНОМИЯ: {r['saved']:.1f} ({r['saved_pct']:.1f}%)"
+                  f" | окончание: {r['End']:%d.%m %H:%M}" if r["End"] else f"[{r['Scenario']}] нет заданий")
+    print("Сравнение записано:", args.table)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "scenarios":
+        return main_scenarios(argv[1:])
+
+    ap = argparse.ArgumentParser(description="CP-SAT Планировщик (CLI); сценарии: cli.py scenarios --help")
+    ap.add_argument("--start", required=True, help='Старт, формат "ДД.ММ.ГГГГ ЧЧ:ММ"')
+    ap.add_argument("--file", default="",
+                    help="Книга Excel (если не указана — берём активную); без Excel — .xlsx/.xlsm или каталог CSV")
+    ap.add_argument("--no-com", action="store_true",
+                    help="Читать --file (.xlsx/.xlsm или каталог CSV) напрямую, не запуская Excel")
+    ap.add_argument("--csv", default="plan.csv", help="Куда сохранить CSV с планом")
+    ap.add_argument("--max-parallel-lines", type=int, default=1,
+                    help="Сколько линий решать одновременно (пул процессов)")
+    ap.add_argument("--total-workers", type=int, default=None,
+                    help="Общее число потоков CP-SAT на все одновременные линии (по умолчанию — все ядра)")
+    ap.add_argument("--hint-csv", default="",
+                    help="CSV прошлого плана (вывод --csv) как стартовое решение для CP-SAT")
+    ap.add_argument("--hint-rows", action="store_true",
+                    help="Стартовое решение — порядок строк JobsTable")
+    ap.add_argument("--replan", default="",
+                    help="CSV прошлого плана: задания до --start + --freeze не двигаются, остальные перепланируются")
+    ap.add_argument("--freeze", type=float, default=FREEZE_MINUTES,
+                    help="Окно заморозки для --replan, мин (по умолчанию %(default)s)")
+    ap.add_argument("--lns-window", type=int, default=0,
+                    help="Для длинных линий: LNS по окнам из N заданий вместо одной модели (0 — выкл.)")
+    ap.add_argument("--engine", default="cpsat", choices=SOLVER_ENGINES,
+                    help="heuristic — локальный поиск без CP-SAT: план за доли секунды на линию")
+    ap.add_argument("--time-limit", type=float, default=None,
+                    help="Лимит времени на линию, с (по умолчанию 10 для cpsat и 1 для heuristic)")
+    ap.add_argument("--time-budget", type=float, default=None,
+                    help="Общий бюджет времени на все линии, с (делится пропорционально размеру линий)")
+    ap.add_argument("--gap", type=float, default=0.0,
+                    help="Останавливать линию при относительном зазоре до нижней границы, например 0.02")
+    ap.add_argument("--assign-lines", action="store_true",
+                    help="Распределить задания с колонкой Lines по линиям (минимум максимальной загрузки)")
+    ap.add_argument("--no-cache", action="store_true", help="Не использовать кэш решений линий")
+    ap.add_argument("--cache-dir", default="", help="Каталог кэша решений (по умолчанию — в профиле пользователя)")
+    ap.add_argument("--out", default="",
+                    help="Базовый путь выгрузки: <out>.plan.<fmt> и <out>.events.<fmt>")
+    ap.add_argument("--format", nargs="+", default=["csv"], choices=EXPORT_FORMATS,
+                    help="Форматы выгрузки для --out (parquet требует pyarrow)")
+    ap.add_argument("--write-sheet", default="",
+                    help="Записать план на лист книги Excel с этим именем (блоками, без записи по ячейкам)")
+    ap.add_argument("--trace-json", default="", help="Сохранить замеры этапов и статистику CP-SAT в JSON")
+    ap.add_argument("--trace-chrome", default="",
+                    help="Сохранить трассу в формате Chrome trace (chrome://tracing, ui.perfetto.dev)")
+    args = ap.parse_args(argv)
+
+    if args.write_sheet and (Dispatch is None or _use_file_source(args.file, args.no_com)):
+        ap.error("--write-sheet требует Excel (COM): при чтении файла напрямую используйте --csv/--out")
+
+    plan_start = dt.datetime.strptime(args.start, "%d.%m.%Y %H:%M")
+    excel = _open_excel(args.file, args.no_com)
+
+    trace = TraceRecorder() if (args.trace_json or args.trace_chrome) else None
+    hints = read_plan_hints_csv(args.hint_csv) if args.hint_csv else ("rows" if args.hint_rows else None)
+    frozen = None
+    if args.replan:
+        # --start — текущий момент: план до него плюс окно заморозки остаётся как есть
+        plan_rows = plan_rows_from_csv(args.replan)
+        frozen = frozen_prefix(plan_rows, plan_start, args.freeze)
+        print(f"Заморожено заданий: {sum(len(r) for r in frozen.values())} из {len(plan_rows)}")
+        if hints is None:
+            hints = plan_hints_from_rows(plan_rows)
+
+    results = iter_optimize(excel, plan_start,
+                            max_parallel_lines=args.max_parallel_lines,
+                            total_workers=args.total_workers,
+                            hints=hints,
+                            lns_window=args.lns_window,
+                            engine=args.engine,
+                            solver_time_limit_sec=args.time_limit or ENGINE_TIME_LIMIT_SEC[args.engine],
+                            time_budget_sec=args.time_budget,
+                            gap_limit=args.gap,
+                            assign_lines=args.assign_lines,
+                            frozen=frozen,
+                            trace=trace,
+                            cache=None if args.no_cache else SolveCache(args.cache_dir or None))
+
+    # План пишется в CSV по мере готовности линий; целиком он нужен только для --out / --write-sheet
+    keep = bool(args.out or args.write_sheet)
+    rows, events = [], EventLog(plan_start)
 
-    rows, line_stats, events = optimize_all(excel, plan_start)
+    def plan_stream():
+        for res in results:
+            st = res.stats
+            print(f"[{res.line}] БАЗА idle: {st['base_total']:.1f} | ОПТ idle: {st['opt_total']:.1f} | ЭКОНОМИЯ: {st['saved']:.1f} ({st['saved_pct']:.1f}%)"
+                  + (f" | зазор: {st['gap_pct']:.1f}%" if st.get("gap_pct") is not None else ""), flush=True)
+            if keep:
+                rows.extend(res.rows)
+                events.extend(res.events)
+            yield from plan_records(res.rows)
 
-    with open(args.csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=("Line","Pos","JobID","Name","Volume","Priority","StrictKey","Start","End"))
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+    write_csv(args.csv, plan_stream(), PLAN_COLUMNS)
+    rows.sort(key=lambda r: (r["Line"], r["Pos"]))
+    if args.out:
+        for path in export_plan(args.out, rows, events.sorted_by_line_start(), args.format):
+            print("Записано:", path)
+    if args.write_sheet:
+        n = write_plan_to_excel(excel, rows, args.write_sheet)
+        print(f"План записан на лист '{args.write_sheet}': {n} строк")
 
-    for line in sorted(line_stats.keys()):
-        st = line_stats[line]
-        print(f"[{line}] БАЗА idle: {st['base_total']:.1f} | ОПТ idle: {st['opt_total']:.1f} | ЭКОНОМИЯ: {st['saved']:.1f} ({st['saved_pct']:.1f}%)")
+    if args.trace_json:
+        trace.save_json(args.trace_json)
+    if args.trace_chrome:
+        trace.save_chrome_trace(args.trace_chrome)
 
 if __name__ == "__main__":
     main()
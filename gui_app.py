@@ -1,10 +1,17 @@
 # -*- coding: utf-8 -*-
 import datetime as dt
+import queue
+import threading
+import traceback
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
+import pythoncom
 from win32com.client import Dispatch  # Excel COM
 from planner.events import optimize_all
+from planner.cache import SolveCache
+from planner.export import export_plan_file, write_plan_to_excel
+from gui_table import VirtualTable
 
 class App(tk.Tk):
     def __init__(self):
@@ -18,30 +25,32 @@ class App(tk.Tk):
         self.dt_var = tk.StringVar(value=dt.datetime.now().replace(hour=8, minute=0, second=0, microsecond=0).strftime("%d.%m.%Y %H:%M"))
         ttk.Entry(top, textvariable=self.dt_var, width=18).pack(side=tk.LEFT, padx=6)
 
-        ttk.Button(top, text="Читать активную книгу и оптимизировать", command=self.run_optimize).pack(side=tk.LEFT, padx=6)
-        ttk.Button(top, text="Открыть файл Excel…", command=self.open_file_and_optimize).pack(side=tk.LEFT, padx=6)
+        self.btn_run = ttk.Button(top, text="Читать активную книгу и оптимизировать", command=self.run_optimize)
+        self.btn_run.pack(side=tk.LEFT, padx=6)
+        self.btn_open = ttk.Button(top, text="Открыть файл Excel…", command=self.open_file_and_optimize)
+        self.btn_open.pack(side=tk.LEFT, padx=6)
+        self.btn_cancel = ttk.Button(top, text="Отмена", command=self.cancel_optimize, state=tk.DISABLED)
+        self.btn_cancel.pack(side=tk.LEFT, padx=6)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(top, textvariable=self.status_var).pack(side=tk.LEFT, padx=12)
 
-        self.btn_save = ttk.Button(top, text="Сохранить таблицу в CSV…", command=self.save_csv, state=tk.DISABLED)
+        self.btn_save = ttk.Button(top, text="Сохранить план и события…", command=self.save_csv, state=tk.DISABLED)
         self.btn_save.pack(side=tk.RIGHT)
+        self.btn_write = ttk.Button(top, text="Записать план в книгу", command=self.write_back, state=tk.DISABLED)
+        self.btn_write.pack(side=tk.RIGHT, padx=6)
 
         nb = ttk.Notebook(self); nb.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0,8))
 
         self.tree_cols = ("Line","Pos","JobID","Name","Volume","Priority","StrictKey","Start","End")
-        self.tree = ttk.Treeview(nb, columns=self.tree_cols, show="headings")
-        for c in self.tree_cols:
-            w = 90
-            if c in ("Name","Start","End"): w = 160
-            self.tree.heading(c, text=c)
-            self.tree.column(c, width=w, anchor=tk.CENTER)
+        self.tree = VirtualTable(nb, self.tree_cols, widths={"Name": 160, "Start": 160, "End": 160},
+                                 filters=("Line", "JobID"))
         nb.add(self.tree, text="План")
 
         self.events_cols = ("Line","Type","Start","End","JobID","SKU","Qty","Speed","Minutes","Note")
-        self.ev = ttk.Treeview(nb, columns=self.events_cols, show="headings")
-        for c in self.events_cols:
-            w = 90
-            if c in ("SKU","Note"): w = 220
-            self.ev.heading(c, text=c)
-            self.ev.column(c, width=w, anchor=tk.CENTER)
+        fmt_dt = lambda v: v.strftime("%d.%m %H:%M") if v else ""
+        self.ev = VirtualTable(nb, self.events_cols, widths={"SKU": 220, "Note": 220},
+                               formatters={"Start": fmt_dt, "End": fmt_dt},
+                               filters=("Line", "Type", "JobID"))
         nb.add(self.ev, text="События")
 
         self.log = tk.Text(nb, height=10)
@@ -50,10 +59,16 @@ class App(tk.Tk):
         self.results = []
         self.line_stats = {}
         self.events = []
+        self.cache = SolveCache()
+        # Оптимизация идёт в фоновом потоке; в Tk она передаёт сообщения только через очередь.
+        self.queue = queue.Queue()
+        self.worker = None
+        self.cancel_event = None
+        self.lines_done = 0
 
     def log_print(self, *args):
         s = " ".join(str(a) for a in args) + "\n"
-        self.log.insert(tk.END, s); self.log.see(tk.END); self.update_idletasks()
+        self.log.insert(tk.END, s); self.log.see(tk.END)
 
     def _parse_dt(self) -> dt.datetime:
         s = self.dt_var.get().strip()
@@ -63,35 +78,122 @@ class App(tk.Tk):
             raise RuntimeError("Неверный формат даты/времени. Пример: 25.09.2025 08:00")
 
     def run_optimize(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+        try:
+            plan_start = self._parse_dt()
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+
+        self.log.delete("1.0", tk.END)
+        self.results, self.line_stats, self.events = [], {}, []
+        self.refresh_tables()
+        self.btn_save.config(state=tk.DISABLED)
+        self.btn_write.config(state=tk.DISABLED)
+        self._set_running(True)
+        self.log_print("Читаю Jobs/матрицы…")
+
+        self.cancel_event = threading.Event()
+        self.worker = threading.Thread(target=self._optimize_worker, args=(plan_start, self.cancel_event),
+                                       daemon=True)
+        self.worker.start()
+        self.after(100, self._poll_queue)
+
+    def cancel_optimize(self):
+        if self.cancel_event is not None and not self.cancel_event.is_set():
+            self.cancel_event.set()
+            self.btn_cancel.config(state=tk.DISABLED)
+            self.log_print("Отмена: останавливаю поиск, сохраняю лучшие найденные решения…")
+
+    def _set_running(self, running: bool):
+        self.btn_run.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.btn_open.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.btn_cancel.config(state=tk.NORMAL if running else tk.DISABLED)
+        self.lines_done = 0
+        self.status_var.set("Оптимизация…" if running else "")
+
+    def _optimize_worker(self, plan_start, cancel):
+        # Фоновый поток: объекты COM привязаны к потоку, поэтому Excel открываем здесь же.
+        q = self.queue
+
+        def sink(ev):
+            name = ev["name"]
+            if name == "line.start" or name.startswith("incumbent "):
+                q.put(("progress", ev))
+
+        pythoncom.CoInitialize()
         try:
             excel = Dispatch("Excel.Application")
             if excel.ActiveWorkbook is None:
-                messagebox.showerror("Ошибка", "Открой книгу в Excel перед запуском.")
+                q.put(("error", "Открой книгу в Excel перед запуском.", ""))
                 return
-            plan_start = self._parse_dt()
-
-            self.log.delete("1.0", tk.END)
-            self.log_print("Читаю Jobs/матрицы…")
-            self.results, self.line_stats, self.events = optimize_all(excel, plan_start)
+            result = optimize_all(excel, plan_start, cache=self.cache, trace=sink, cancel=cancel,
+                                  on_line=lambda *res: q.put(("line",) + res), log_fn=lambda s: q.put(("log", s)))
+            q.put(("done",) + result)
+        except Exception as e:
+            q.put(("error", str(e), traceback.format_exc()))
+        finally:
+            pythoncom.CoUninitialize()
 
+    def _poll_queue(self):
+        try:
+            while True:
+                msg = self.queue.get_nowait()
+                kind = msg[0]
+                if kind == "progress":
+                    self._on_progress(msg[1])
+                elif kind == "log":
+                    self.log_print(msg[1])
+                elif kind == "line":
+                    self._on_line(*msg[1:])
+                elif kind == "done":
+                    self._on_done(*msg[1:])
+                elif kind == "error":
+                    self._set_running(False)
+                    self.log_print("Ошибка:", msg[1])
+                    if msg[2]:
+                        self.log_print(msg[2])
+                    messagebox.showerror("Ошибка", msg[1])
+        except queue.Empty:
+            pass
+        if self.worker is not None and (self.worker.is_alive() or not self.queue.empty()):
+            self.after(100, self._poll_queue)
+
+    def _on_progress(self, ev):
+        args = ev["args"]
+        if ev["name"] == "line.start":
+            self.status_var.set(f"{args['line']}: решаю ({args['jobs']} заданий, до {args['time_limit']:.0f} с)")
+            self.log_print(f"[{args['line']}] старт: заданий {args['jobs']}")
+        else:
+            line = ev["name"][len("incumbent "):]
+            self.log_print(f"[{line}] улучшение: makespan={args['objective']:.0f} мин, граница={args['bound']:.0f} мин")
+
+    def _on_line(self, line, rows, st, events):
+        self.lines_done += 1
+        self.status_var.set(f"Готово линий: {self.lines_done}")
+        self.tree.replace_line(line, rows)
+        self.ev.replace_line(line, events)
+        gap = f" | зазор: {st['gap_pct']:.1f}%" if st.get("gap_pct") is not None else ""
+        self.log_print(f"[{line}] БАЗА idle: {st['base_total']:.1f} мин | ОПТ idle: {st['opt_total']:.1f} мин | ЭКОНОМИЯ: {st['saved']:.1f} мин ({st['saved_pct']:.1f}%) | кэш: {st['cache']} | статус: {st['status']}{gap}")
+        self.log_print("  Переходы (опт):")
+        for d in st["opt_details"]:
+            self.log_print(f"    {d['from']} -> {d['to']} : {d['cost']:.1f} мин")
+        self.log_print("  Переходы (база):")
+        for d in st["base_details"]:
+            self.log_print(f"    {d['from']} -> {d['to']} : {d['cost']:.1f} мин")
+
+    def _on_done(self, results, line_stats, events):
+        self.results, self.line_stats, self.events = results, line_stats, events
+        cancelled = self.cancel_event is not None and self.cancel_event.is_set()
+        # Линии уже в таблицах через _on_line; заново — только если какие-то не пришли
+        if cancelled or self.lines_done < len(line_stats):
             self.refresh_tables()
-            self.btn_save.config(state=tk.NORMAL if self.results else tk.DISABLED)
-
-            for line in sorted(self.line_stats.keys()):
-                st = self.line_stats[line]
-                self.log_print(f"[{line}] БАЗА idle: {st['base_total']:.1f} мин | ОПТ idle: {st['opt_total']:.1f} мин | ЭКОНОМИЯ: {st['saved']:.1f} мин ({st['saved_pct']:.1f}%)")
-                self.log_print("  Переходы (опт):")
-                for d in st["opt_details"]:
-                    self.log_print(f"    {d['from']} -> {d['to']} : {d['cost']:.1f} мин")
-                self.log_print("  Переходы (база):")
-                for d in st["base_details"]:
-                    self.log_print(f"    {d['from']} -> {d['to']} : {d['cost']:.1f} мин")
-
-            self.log_print("Готово. Строк в плане:", len(self.results), " | Событий:", len(self.events))
-        except Exception as e:
-            self.log_print("Ошибка:", e)
-            import traceback; self.log_print(traceback.format_exc())
-            messagebox.showerror("Ошибка", str(e))
+        self._set_running(False)
+        self.btn_save.config(state=tk.NORMAL if self.results else tk.DISABLED)
+        self.btn_write.config(state=tk.NORMAL if self.results else tk.DISABLED)
+        self.log_print("Отменено, сохранены лучшие найденные решения." if cancelled else "Готово.",
+                       "Строк в плане:", len(self.results), " | Событий:", len(self.events))
 
     def open_file_and_optimize(self):
         path = filedialog.askopenfilename(
@@ -107,41 +209,35 @@ class App(tk.Tk):
             self.run_optimize()
         except Exception as e:
             self.log_print("Ошибка:", e)
-            import traceback; self.log_print(traceback.format_exc())
+            self.log_print(traceback.format_exc())
             messagebox.showerror("Ошибка", str(e))
 
     def refresh_tables(self):
-        for it in self.tree.get_children(): self.tree.delete(it)
-        for r in self.results:
-            self.tree.insert("", tk.END, values=tuple(r.get(c, "") for c in self.tree_cols))
-        for it in self.ev.get_children(): self.ev.delete(it)
-        for e in self.events:
-            row = {
-                "Line": e["Line"], "Type": e["Type"],
-                "Start": e["Start"].strftime("%d.%m %H:%M"),
-                "End":   e["End"].strftime("%d.%m %H:%M"),
-                "JobID": e["JobID"], "SKU": e["SKU"],
-                "Qty": e["Qty"], "Speed": e["Speed"],
-                "Minutes": e["Minutes"], "Note": e["Note"]
-            }
-            self.ev.insert("", tk.END, values=tuple(row.get(c, "") for c in self.events_cols))
+        self.tree.set_rows(self.results)
+        self.ev.set_rows(self.events)
 
     def save_csv(self):
         if not self.results:
             return
         path = filedialog.asksaveasfilename(
-            defaultextension=".csv", filetypes=[("CSV","*.csv")],
-            title="Сохранить таблицу плана в CSV"
+            defaultextension=".csv",
+            filetypes=[("CSV","*.csv"), ("JSON Lines","*.jsonl"), ("Parquet","*.parquet")],
+            title="Сохранить план и события"
         )
         if not path: return
         try:
-            import csv
-            with open(path, "w", newline="", encoding="utf-8") as f:
-                w = csv.DictWriter(f, fieldnames=list(self.tree_cols))
-                w.writeheader()
-                for r in self.results:
-                    w.writerow(r)
-            messagebox.showinfo("Сохранено", f"Файл сохранён:\n{path}")
+            paths = export_plan_file(path, self.results, self.events)
+            messagebox.showinfo("Сохранено", "Файлы сохранены:\n" + "\n".join(paths))
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
+
+    def write_back(self):
+        if not self.results:
+            return
+        try:
+            excel = Dispatch("Excel.Application")
+            n = write_plan_to_excel(excel, self.results)
+            self.log_print(f"План записан на лист 'ПЛАН': {n} строк")
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
 
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""Виртуальная таблица для GUI: Treeview держит только видимые строки,
+данные — в колоночном хранилище, разбитом по линиям."""
+import tkinter as tk
+from tkinter import ttk
+
+ALL = "(все)"
+
+def _sort_key(v):
+    # None и пустые строки — в конец; разные типы в одной колонке не сравниваем напрямую
+    return (v is None or v == "", v if v is not None else "")
+
+class ColumnStore:
+    """Колонки по группам (линиям): замена одной линии не трогает остальные.
+    Представление (фильтр + сортировка) — список (ключ, колонки группы, индекс) поверх колонок,
+    всегда по возрастанию ключа; при обратной сортировке он читается с конца.
+    Строки группы в порядке сортировки кэшируются по колонке: фильтр только отбирает их,
+    а замена группы вливает её строки в остальные без пересортировки."""
+
+    def __init__(self, columns, group_col: str = "Line"):
+        self.columns = tuple(columns)
+        self.group_col = group_col
+        self._groups = {}
+        self._ranks = {}
+        self._orders = {}
+        self._view = []
+        self.filters = {}
+        self.sort_col = None
+        self.reverse = False
+
+    def __len__(self):
+        return len(self._view)
+
+    def clear(self):
+        self._groups = {}
+        self._ranks = {}
+        self._orders = {}
+        self._view = []
+
+    def set_rows(self, rows):
+        if hasattr(rows, "column"):
+            # EventLog: группы — выборки take() по колонке линии, без dict на строку
+            by_group = {}
+            for i, g in enumerate(rows.column(self.group_col)):
+                by_group.setdefault(g, []).append(i)
+            self._groups = {g: self._to_columns(rows.take(idx)) for g, idx in by_group.items()}
+        else:
+            by_group = {}
+            for r in rows:
+                by_group.setdefault(r.get(self.group_col), []).append(r)
+            self._groups = {g: self._to_columns(rs) for g, rs in by_group.items()}
+        self._ranks = {g: k for k, g in enumerate(self._groups)}
+        self._orders = {}
+        self._rebuild()
+
+    def replace_group(self, group, rows):
+        old = self._groups.get(group)
+        self._orders.pop(group, None)
+        view = [e for e in self._view if e[1] is not old] if old is not None else self._view
+        if rows:
+            cols = self._groups[group] = self._to_columns(rows)
+            if group not in self._ranks:
+                self._ranks[group] = max(self._ranks.values(), default=-1) + 1
+            # две отсортированные серии: list.sort сливает их за линейное время
+            view = view + self._part(group, cols)
+            view.sort()
+        else:
+            self._groups.pop(group, None)
+            self._ranks.pop(group, None)
+        self._view = view
+
+    def set_filter(self, col, value):
+        # Line/Type — точное совпадение, JobID — подстрока без учёта регистра
+        if value in (None, "", ALL):
+            self.filters.pop(col, None)
+        else:
+            self.filters[col] = value
+        self._rebuild()
+
+    def sort_by(self, col, reverse=None):
+        if reverse is None:
+            reverse = (not self.reverse) if col == self.sort_col else False
+        self.sort_col, self.reverse = col, reverse
+        self._rebuild()
+
+    def row(self, k):
+        if self.sort_col is not None and self.reverse:
+            k = len(self._view) - 1 - k
+        _, cols, i = self._view[k]
+        return tuple(cols[c][i] for c in self.columns)
+
+    def rows(self):
+        for k in range(len(self._view)):
+            yield dict(zip(self.columns, self.row(k)))
+
+    def distinct(self, col):
+        vals = set()
+        for cols in self._groups.values():
+            vals.update(v for v in cols[col] if v not in (None, ""))
+        return sorted(vals, key=str)
+
+    def _to_columns(self, rows):
+        if hasattr(rows, "column"):
+            return {c: rows.column(c) for c in self.columns}
+        return {c: [r.get(c, "") for r in rows] for c in self.columns}
+
+    def _match(self, cols):
+        n = len(cols[self.columns[0]])
+        idx = range(n)
+        for col, want in self.filters.items():
+            vals = cols[col]
+            if col == "JobID":
+                want = str(want).upper()
+                idx = [i for i in idx if want in str(vals[i]).upper()]
+            else:
+                idx = [i for i in idx if str(vals[i]) == str(want)]
+        return idx
+
+    def _ordered(self, group, cols):
+        # Все строки группы в порядке представления; считаются один раз на колонку и направление.
+        # При равных значениях — порядок групп и строк (как у устойчивой сортировки),
+        # поэтому для обратной сортировки ранг и индекс в ключе с минусом.
+        orders = self._orders.setdefault(group, {})
+        sort = (self.sort_col, self.sort_col is not None and self.reverse)
+        if sort not in orders:
+            rank, n = self._ranks[group], len(cols[self.columns[0]])
+            if self.sort_col is None:
+                entries = [((rank, i), cols, i) for i in range(n)]
+            else:
+                vals, sign = cols[self.sort_col], -1 if sort[1] else 1
+                entries = sorted(((_sort_key(vals[i]), sign * rank, sign * i), cols, i) for i in range(n))
+            orders[sort] = entries
+        return orders[sort]
+
+    def _part(self, group, cols):
+        entries = self._ordered(group, cols)
+        idx = self._match(cols)
+        if len(idx) == len(entries):
+            return list(entries)
+        keep = set(idx)
+        return [e for e in entries if e[2] in keep]
+
+    def _rebuild(self):
+        view = []
+        for g, cols in self._groups.items():
+            view.extend(self._part(g, cols))
+        view.sort()
+        self._view = view
+
+class VirtualTable(ttk.Frame):
+    """Treeview с фиксированным числом строк-ячеек: при прокрутке меняются только их значения."""
+
+    def __init__(self, master, columns, widths=None, formatters=None, filters=("Line",)):
+        super().__init__(master)
+        self.store = ColumnStore(columns)
+        self.columns = tuple(columns)
+        self.formatters = formatters or {}
+        self.first = 0
+        self.n_visible = 30
+        self._iids = []
+
+        bar = ttk.Frame(self); bar.pack(fill=tk.X, pady=(0, 4))
+        self.filter_vars = {}
+        self._combos = {}
+        for col in filters:
+            ttk.Label(bar, text=f"{col}:").pack(side=tk.LEFT, padx=(6, 2))
+            var = tk.StringVar(value=ALL if col != "JobID" else "")
+            self.filter_vars[col] = var
+            if col == "JobID":
+                ent = ttk.Entry(bar, textvariable=var, width=16)
+                ent.pack(side=tk.LEFT)
+                ent.bind("<KeyRelease>", lambda e, c=col: self._on_filter(c))
+            else:
+                cb = ttk.Combobox(bar, textvariable=var, values=[ALL], width=18, state="readonly")
+                cb.pack(side=tk.LEFT)
+                cb.bind("<<ComboboxSelected>>", lambda e, c=col: self._on_filter(c))
+                self._combos[col] = cb
+        self.count_var = tk.StringVar(value="")
+        ttk.Label(bar, textvariable=self.count_var).pack(side=tk.RIGHT, padx=6)
+
+        body = ttk.Frame(self); body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, columns=self.columns, show="headings", height=self.n_visible)
+        for c in self.columns:
+            self.tree.heading(c, text=c, command=lambda c=c: self.sort_by(c))
+            self.tree.column(c, width=(widths or {}).get(c, 90), anchor=tk.CENTER)
+        self.vsb = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        body.bind("<Configure>", self._on_resize)
+        for w in (self.tree, self.vsb):
+            w.bind("<MouseWheel>", lambda e: self.scroll(-1 * (e.delta // 120) * 3))
+            w.bind("<Button-4>", lambda e: self.scroll(-3))
+            w.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.n_visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.n_visible))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.store)))
+
+    # --- данные
+    def set_rows(self, rows):
+        self.store.set_rows(rows)
+        self._refresh_choices()
+        self.scroll_to(self.first)
+
+    def replace_line(self, line, rows):
+        self.store.replace_group(line, rows)
+        self._refresh_choices()
+        self.scroll_to(self.first)
+
+    def clear(self):
+        self.store.clear()
+        self._refresh_choices()
+        self.scroll_to(0)
+
+    def sort_by(self, col):
+        self.store.sort_by(col)
+        for c in self.columns:
+            arrow = ("  ▼" if self.store.reverse else "  ▲") if c == col else ""
+            self.tree.heading(c, text=c + arrow)
+        self.scroll_to(0)
+
+    # --- прокрутка и отрисовка видимого окна
+    def scroll(self, delta):
+        self.scroll_to(self.first + delta)
+
+    def scroll_to(self, first):
+        self.first = max(0, min(int(first), len(self.store) - self.n_visible))
+        self._paint()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.store))
+        elif args[0] == "scroll":
+            step = self.n_visible if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        n = max(1, (event.height - rowheight - 4) // rowheight)
+        if n != self.n_visible:
+            self.n_visible = n
+            self.tree.configure(height=n)
+            self.scroll_to(self.first)
+
+    def _on_filter(self, col):
+        self.store.set_filter(col, self.filter_vars[col].get().strip())
+        self.scroll_to(0)
+
+    def _refresh_choices(self):
+        for col, cb in self._combos.items():
+            cb.configure(values=[ALL] + self.store.distinct(col))
+
+    def _paint(self):
+        n = min(self.n_visible, len(self.store))
+        while len(self._iids) < n:
+            self._iids.append(self.tree.insert("", tk.END, values=()))
+        while len(self._iids) > n:
+            self.tree.delete(self._iids.pop())
+        fmt = self.formatters
+        for k, iid in enumerate(self._iids):
+            row = self.store.row(self.first + k)
+            self.tree.item(iid, values=tuple(fmt[c](v) if c in fmt else v for c, v in zip(self.columns, row)))
+        total = len(self.store)
+        if total:
+            self.vsb.set(self.first / total, (self.first + n) / total)
+        else:
+            self.vsb.set(0.0, 1.0)
+        self.count_var.set(f"строк: {total}")
@@ -1,18 +1,47 @@
 # -*- coding: utf-8 -*-
 from .version import __version__
 from .utils import (
-    sku_key_norm, line_header_from_name, parse_mins_and_nextlaunch,
+    sku_key_norm, line_header_from_name, parse_mins_and_nextlaunch, parse_lines_cell,
     TIME_SCALE, CHANGEOVER_FALLBACK_MIN, LAUNCH_FALLBACK_MIN, fmt_job
 )
 from .excel_io import read_jobs_from_active_excel
-from .transitions import read_stdstops_dict, read_transition_matrix_from_active_excel
-from .optimizer import build_line_schedule_cp, analyze_sequence_cost
-from .events import build_events_for_line, optimize_all
+from .transitions import (
+    read_stdstops_dict, read_transition_matrix_from_active_excel, stdstops_from_dict, transitions_from_pairs,
+    LazyTransitions
+)
+from .optimizer import build_line_schedule_cp, build_line_schedule_heuristic, analyze_sequence_cost
+from .setup_matrix import LineSetup
+from .transition_table import TransitionTable
+from .jobs import Job, jobs_from_records
+from .sources import ComWorkbook, XlsxWorkbook, CsvWorkbook, as_workbook, open_workbook
+from .event_log import EventLog
+from .hints import plan_hints_from_rows, read_plan_hints_csv
+from .cache import SolveCache, line_fingerprint
+from .precedence import priority_tiers, strict_chains, violated_precedences
+from .batching import collapse_same_sku, expand_batches
+from .assignment import assign_jobs_to_lines, job_lines
+from .events import LineResult, build_events_for_line, iter_optimize, optimize_all, read_plan_inputs
+from .replan import frozen_prefix, plan_rows_from_csv, replan
+from .scenarios import apply_scenario, prepare_inputs, run_scenarios, scenario_table
+from .service import PlanService, inputs_from_payload, request_json
+from .trace import TraceRecorder, span, emit, counter
+from .export import export_plan, export_plan_file, write_plan_to_excel, write_csv, write_jsonl, write_parquet
 
 __all__ = [
     "__version__",
-    "sku_key_norm", "line_header_from_name", "parse_mins_and_nextlaunch",
+    "sku_key_norm", "line_header_from_name", "parse_mins_and_nextlaunch", "parse_lines_cell",
     "TIME_SCALE", "CHANGEOVER_FALLBACK_MIN", "LAUNCH_FALLBACK_MIN", "fmt_job",
     "read_jobs_from_active_excel", "read_stdstops_dict", "read_transition_matrix_from_active_excel",
-    "build_line_schedule_cp", "analyze_sequence_cost", "build_events_for_line", "optimize_all",
+    "stdstops_from_dict", "transitions_from_pairs", "LazyTransitions", "jobs_from_records",
+    "ComWorkbook", "XlsxWorkbook", "CsvWorkbook", "as_workbook", "open_workbook",
+    "build_line_schedule_cp", "build_line_schedule_heuristic", "analyze_sequence_cost", "build_events_for_line", "optimize_all", "read_plan_inputs",
+    "iter_optimize", "LineResult", "replan", "frozen_prefix", "plan_rows_from_csv",
+    "apply_scenario", "prepare_inputs", "run_scenarios", "scenario_table",
+    "PlanService", "inputs_from_payload", "request_json",
+    "assign_jobs_to_lines", "job_lines",
+    "collapse_same_sku", "expand_batches", "LineSetup", "TransitionTable", "Job", "EventLog",
+    "plan_hints_from_rows", "read_plan_hints_csv", "SolveCache", "line_fingerprint",
+    "priority_tiers", "strict_chains", "violated_precedences",
+    "TraceRecorder", "span", "emit", "counter",
+    "export_plan", "export_plan_file", "write_plan_to_excel", "write_csv", "write_jsonl", "write_parquet",
 ]
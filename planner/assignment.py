@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""Распределение заданий по линиям (глобальный режим optimize_all).
+
+Задание с колонкой Lines может идти на любой из перечисленных линий, со своей
+скоростью на каждой. Цель — минимальная максимальная загрузка линии (makespan завода).
+Одна модель «все линии × все задания» на 10 × 300 не решается за разумное время,
+поэтому задача разбита на две ступени, которые чередуются:
+
+  * назначение: жадно (LPT) раскладываем гибкие задания, затем переносим задания
+    с самой загруженной линии туда, где максимум загрузки уменьшается;
+  * оценка последовательности: для каждой линии быстрый тур «ближайший сосед» по SKU
+    внутри уровней приоритета на её собственной матрице переходов (LineSetup.cost).
+
+Итог проверяется одним проходом настоящей последовательности (greedy_order по матрице
+переналадок линии, с уровнями приоритета и цепочками StrictKey): если по ней максимальная
+загрузка хуже, чем у заданий на своих линиях, назначение отменяется.
+Точную последовательность на каждой линии потом строит обычный CP-SAT.
+"""
+import time
+from collections import defaultdict
+import numpy as np
+from .optimizer import _proc_min
+from .heuristic import greedy_order
+from .setup_matrix import LineSetup
+from .utils import LAUNCH_FALLBACK_MIN, proc_minutes
+from .jobs import Job
+from .trace import span
+
+ASSIGN_TIME_LIMIT_SEC = 5.0
+
+def job_lines(job: dict) -> dict:
+    """{линия: скорость} для всех линий, где может идти задание (своя Line — всегда)."""
+    lines = {job["Line"]: job["Speed"]} if job["Line"] else {}
+    for line, speed in (job.get("Lines") or {}).items():
+        lines[line] = speed if speed else job["Speed"]
+    return lines
+
+def _strict_key(job: dict) -> str:
+    return str(job.get("StrictKey", "") or "").strip()
+
+def _units(jobs: list[dict]) -> list[list[int]]:
+    # Цепочка StrictKey переносится целиком: порядок ключа задан только внутри линии
+    by_key = defaultdict(list)
+    units = []
+    for i, j in enumerate(jobs):
+        key = _strict_key(j)
+        if key:
+            by_key[(j["Line"], key)].append(i)
+        else:
+            units.append([i])
+    units.extend(by_key.values())
+    return units
+
+class _LineState:
+    """Задания линии и оценка её загрузки: старт + производство + тур переналадок."""
+
+    def __init__(self, line: str, costs: LineSetup, start_min: float):
+        self.line = line
+        self.costs = costs
+        self.start_min = start_min
+        self.units = set()
+        self.dur = 0
+        self.count = defaultdict(int)
+        self.tour_prio = np.zeros(0, dtype=np.int64)
+        self.tour_sku = np.zeros(0, dtype=np.int64)
+        self.setup = 0
+        self._ins = {}
+        self._rem = {}
+
+    @property
+    def load(self) -> float:
+        return self.start_min + self.dur + self.setup if self.units else 0.0
+
+    def add(self, u, dur, nodes):
+        self.units.add(u)
+        self.dur += dur
+        for node in nodes:
+            self.count[node] += 1
+
+    def remove(self, u, dur, nodes):
+        self.units.discard(u)
+        self.dur -= dur
+        for node in nodes:
+            self.count[node] -= 1
+            if not self.count[node]:
+                del self.count[node]
+
+    def rebuild_tour(self):
+        # Ближайший сосед внутри каждого уровня приоритета, уровни — по возрастанию
+        cost = self.costs.cost
+        tiers = defaultdict(list)
+        for prio, sku in self.count:
+            tiers[prio].append(sku)
+        prios, skus = [], []
+        total = 0
+        cur = None
+        for prio in sorted(tiers):
+            left = np.array(sorted(set(tiers[prio])), dtype=np.int64)
+            while left.size:
+                if cur is None:
+                    k = 0
+                else:
+                    row = cost[cur, left]
+                    k = int(np.argmin(row))
+                    total += int(row[k])
+                cur = int(left[k])
+                prios.append(prio)
+                skus.append(cur)
+                left = np.delete(left, k)
+        self.tour_prio = np.array(prios, dtype=np.int64)
+        self.tour_sku = np.array(skus, dtype=np.int64)
+        self.setup = total
+        self._ins = {}
+        self._rem = {}
+
+    def insert_cost(self, node) -> int:
+        """Прирост переналадок, если в линию добавится SKU node=(prio, sku)."""
+        if node in self.count:
+            return 0
+        val = self._ins.get(node)
+        if val is None:
+            prio, s = node
+            n = self.tour_sku.size
+            if not n:
+                val = 0
+            else:
+                cost = self.costs.cost
+                # щель k — между узлами k-1 и k; порядок уровней не должен нарушиться
+                k = np.arange(n + 1)
+                ok = ((k == 0) | (np.r_[-1, self.tour_prio] <= prio)) & ((k == n) | (np.r_[self.tour_prio, prio] >= prio))
+                prev = np.r_[0, self.tour_sku]
+                nxt = np.r_[self.tour_sku, 0]
+                add = np.where(k > 0, cost[prev, s], 0) + np.where(k < n, cost[s, nxt], 0)
+                cut = np.where((k > 0) & (k < n), cost[prev, nxt], 0)
+                val = int((add - cut)[ok].min())
+            self._ins[node] = val
+        return val
+
+    def remove_saving(self, node, n_jobs) -> int:
+        """Экономия переналадок, если из линии уйдут n_jobs заданий узла node."""
+        if self.count.get(node, 0) > n_jobs:
+            return 0
+        val = self._rem.get(node)
+        if val is None:
+            prio, s = node
+            pos = np.flatnonzero((self.tour_prio == prio) & (self.tour_sku == s))
+            val = 0
+            if pos.size:
+                k = int(pos[0])
+                n = self.tour_sku.size
+                cost = self.costs.cost
+                prev = int(self.tour_sku[k - 1]) if k > 0 else None
+                nxt = int(self.tour_sku[k + 1]) if k + 1 < n else None
+                if prev is not None:
+                    val += int(cost[prev, s])
+                if nxt is not None:
+                    val += int(cost[s, nxt])
+                if prev is not None and nxt is not None:
+                    val -= int(cost[prev, nxt])
+            self._rem[node] = val
+        return val
+
+def assign_jobs_to_lines(jobs: list[dict], trans_all: dict, start_launch_all: dict,
+                         time_limit_sec: float = ASSIGN_TIME_LIMIT_SEC, log_fn=print, trace=None):
+    """Назначает задания с несколькими допустимыми линиями (колонка Lines).
+
+    Возвращает (jobs, info): задания в исходном порядке — перенесённые на другую линию
+    заменены копиями с новыми Line и Speed; info — оценки загрузки линий до и после.
+    """
+    with span(trace, "assign", jobs=len(jobs)) as sp:
+        result, info = _assign(jobs, trans_all, start_launch_all, time_limit_sec)
+        if info["moved"]:
+            seq_before = sequenced_loads(jobs, trans_all, start_launch_all)
+            seq_after = sequenced_loads(result, trans_all, start_launch_all)
+            info["seq_before"] = max(seq_before.values(), default=0.0)
+            info["seq_after"] = max(seq_after.values(), default=0.0)
+            if info["seq_after"] > info["seq_before"]:
+                result, info["moved"], info["reverted"] = list(jobs), 0, True
+        sp.set(moved=info["moved"], max_before=info["max_before"], max_after=info["max_after"])
+    if log_fn:
+        log_fn(f"[Назначение] гибких заданий: {info['flexible']}; перенесено: {info['moved']}; "
+               f"макс. загрузка линии {info['max_before']:.0f} -> {info['max_after']:.0f} мин")
+        if "seq_after" in info:
+            log_fn(f"[Назначение] по последовательности: {info['seq_before']:.0f} -> {info['seq_after']:.0f} мин"
+                   + ("; хуже — задания оставлены на своих линиях" if info.get("reverted") else ""))
+    return result, info
+
+def sequenced_loads(jobs: list[dict], trans_all: dict, start_launch_all: dict) -> dict:
+    """{линия: старт + производство + переналадки} по последовательности greedy_order."""
+    by_line = defaultdict(list)
+    for j in jobs:
+        by_line[j["Line"]].append(j)
+    loads = {}
+    for line, jl in by_line.items():
+        costs = LineSetup(jl, trans_all.get(line, {}))
+        sku = np.array([costs.sku_id(j) for j in jl], dtype=np.int64)
+        setup = costs.cost[np.ix_(sku, sku)]
+        seq = greedy_order(jl, setup.tolist())
+        start_min = float(start_launch_all.get(line, (LAUNCH_FALLBACK_MIN, -1.0))[0])
+        loads[line] = start_min + sum(_proc_min(j) for j in jl) + int(setup[seq[:-1], seq[1:]].sum())
+    return loads
+
+def _assign(jobs, trans_all, start_launch_all, time_limit_sec):
+    deadline = time.time() + time_limit_sec
+    elig = [job_lines(j) for j in jobs]
+    lines = list(dict.fromkeys(line for e in elig for line in e))
+
+    eligible_jobs = defaultdict(list)
+    for j, e in zip(jobs, elig):
+        for line in e:
+            eligible_jobs[line].append(j)
+    states = {}
+    for line in lines:
+        start_min = float(start_launch_all.get(line, (LAUNCH_FALLBACK_MIN, -1.0))[0])
+        states[line] = _LineState(line, LineSetup(eligible_jobs[line], trans_all.get(line, {})), start_min)
+
+    units = _units(jobs)
+    unit_lines = []
+    for u in units:
+        common = set(elig[u[0]])
+        for i in u[1:]:
+            common &= set(elig[i])
+        # у цепочки нет общей линии — остаётся на своей (Line у всей цепочки одна)
+        unit_lines.append([l for l in lines if l in common] or [jobs[u[0]]["Line"]])
+
+    def dur(i, line):
+        j = jobs[i]
+        speed = elig[i].get(line, j["Speed"])
+        return _proc_min(j) if speed == j["Speed"] else proc_minutes(j["Quantity"], speed)
+
+    unit_dur = [{line: sum(dur(i, line) for i in u) for line in ul} for u, ul in zip(units, unit_lines)]
+
+    def nodes(u, line):
+        st = states[line]
+        return [(jobs[i]["Priority"], st.costs.sku_id(jobs[i])) for i in units[u]]
+
+    def place(u, line):
+        states[line].add(u, unit_dur[u][line], nodes(u, line))
+
+    def loads():
+        for st in states.values():
+            st.rebuild_tour()
+        return {line: st.load for line, st in states.items()}
+
+    # Оценка «как в JobsTable»: каждое задание на своей Line
+    home = {}
+    for u, ul in enumerate(unit_lines):
+        own = jobs[units[u][0]]["Line"]
+        home[u] = own if own in ul else ul[0]
+        place(u, home[u])
+    before = loads()
+    for st in states.values():
+        st.units.clear(); st.count.clear(); st.dur = 0
+
+    # Жадное начальное назначение: сначала фиксированные, затем гибкие по убыванию длительности
+    where = {}
+    fixed = [u for u, ul in enumerate(unit_lines) if len(ul) == 1]
+    flexible = sorted((u for u, ul in enumerate(unit_lines) if len(ul) > 1),
+                      key=lambda u: (-min(unit_dur[u].values()), units[u][0]))
+    for u in fixed:
+        where[u] = unit_lines[u][0]
+        place(u, where[u])
+    est = {line: st.start_min + st.dur for line, st in states.items()}
+    best_in = {}
+    for line, st in states.items():
+        k = len(st.costs.sku_keys)
+        present = sorted({s for _, s in st.count})
+        best_in[line] = st.costs.cost[present].min(axis=0) if present else np.zeros(k, dtype=np.int64)
+        est[line] += int(best_in[line][present].sum()) if present else 0
+    for u in flexible:
+        def grow(line):
+            st = states[line]
+            new = {s for _, s in nodes(u, line) if all(s != s2 for _, s2 in st.count)}
+            return unit_dur[u][line] + sum(int(best_in[line][s]) for s in new), new
+        options = [(est[line] + grow(line)[0], line) for line in unit_lines[u]]
+        _, line = min(options)
+        inc, new = grow(line)
+        where[u] = line
+        place(u, line)
+        est[line] += inc
+        for s in new:
+            best_in[line] = np.minimum(best_in[line], states[line].costs.cost[s])
+    cur = loads()
+
+    # Переносы с самой загруженной линии, пока максимум уменьшается
+    tabu = set()
+    while time.time() < deadline:
+        worst = max(cur, key=cur.get)
+        src = states[worst]
+        best = None
+        for u in list(src.units):
+            if len(unit_lines[u]) < 2:
+                continue
+            u_nodes = defaultdict(int)
+            for node in nodes(u, worst):
+                u_nodes[node] += 1
+            saving = sum(src.remove_saving(node, n) for node, n in u_nodes.items())
+            src_after = cur[worst] - unit_dur[u][worst] - saving
+            for line in unit_lines[u]:
+                if line == worst or (u, line) in tabu:
+                    continue
+                dst = states[line]
+                extra = sum(dst.insert_cost(node) for node in set(nodes(u, line)))
+                dst_after = (cur[line] if dst.units else dst.start_min) + unit_dur[u][line] + extra
+                new_max = max(src_after, dst_after)
+                if new_max < cur[worst] - 0.5 and (best is None or new_max < best[0]):
+                    best = (new_max, u, line)
+        if best is None:
+            break
+        _, u, line = best
+        old_src, old_dst = cur[worst], cur[line]
+        states[worst].remove(u, unit_dur[u][worst], nodes(u, worst))
+        place(u, line)
+        states[worst].rebuild_tour(); states[line].rebuild_tour()
+        if max(states[worst].load, states[line].load) >= old_src:
+            # Тур после переноса оказался хуже оценки — откатываем и больше не пробуем
+            states[line].remove(u, unit_dur[u][line], nodes(u, line))
+            place(u, worst)
+            states[worst].rebuild_tour(); states[line].rebuild_tour()
+            tabu.add((u, line))
+            cur[worst], cur[line] = old_src, old_dst
+            continue
+        where[u] = line
+        cur[worst], cur[line] = states[worst].load, states[line].load
+
+    result = list(jobs)
+    moved = 0
+    for u, line in where.items():
+        for i in units[u]:
+            j = jobs[i]
+            speed = elig[i].get(line, j["Speed"])
+            if line == j["Line"] and speed == j["Speed"]:
+                continue
+            moved += line != j["Line"]
+            result[i] = Job.from_dict(dict(j.items(), Line=line, Speed=speed))
+    info = {
+        "flexible": sum(len(units[u]) for u in flexible),
+        "moved": moved,
+        "before": {line: round(v, 1) for line, v in before.items()},
+        "after": {line: round(v, 1) for line, v in cur.items()},
+        "max_before": max(before.values(), default=0.0),
+        "max_after": max(cur.values(), default=0.0),
+    }
+    return result, info
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from .optimizer import _proc_min
+from .setup_matrix import job_sku_key
+from .jobs import Job
+
+# Соседние задания одного SKU идут без переналадки, а переход из/в партию
+# зависит только от SKU, поэтому слияние одинаковых заданий одного приоритета
+# в одну задачу не ухудшает оптимум. Со строгими ключами сливаем только
+# задания, идущие подряд в цепочке своего ключа, и не смешиваем разные ключи —
+# иначе можно получить цикл предшествований.
+
+def _strict_key(job: dict) -> str:
+    return str(job.get("StrictKey", "") or "").strip()
+
+def collapse_same_sku(jobs_for_line: list[dict]) -> list[dict]:
+    chain_pos = {}
+    by_key = defaultdict(list)
+    for j in jobs_for_line:
+        key = _strict_key(j)
+        if key:
+            by_key[key].append(j)
+    for key, lst in by_key.items():
+        for pos, j in enumerate(sorted(lst, key=lambda x: x["_row"])):
+            chain_pos[j["JobID"]] = pos
+
+    groups = defaultdict(list)
+    for j in jobs_for_line:
+        groups[(job_sku_key(j), j["Priority"])].append(j)
+
+    tasks = []
+    for members in groups.values():
+        free = [j for j in members if not _strict_key(j)]
+        runs = []
+        strict_by_key = defaultdict(list)
+        for j in members:
+            key = _strict_key(j)
+            if key:
+                strict_by_key[key].append(j)
+        for key, lst in strict_by_key.items():
+            lst.sort(key=lambda x: chain_pos[x["JobID"]])
+            run = [lst[0]]
+            for j in lst[1:]:
+                if chain_pos[j["JobID"]] == chain_pos[run[-1]["JobID"]] + 1:
+                    run.append(j)
+                else:
+                    runs.append(run); run = [j]
+            runs.append(run)
+
+        # Задания без ключа — отдельной партией: в составе звена цепочки они получили бы
+        # чужой StrictKey и место в цепочке
+        if free:
+            runs.append(free)
+        for run in runs:
+            tasks.append(_make_task(run))
+
+    tasks.sort(key=lambda t: t["_row"])
+    return tasks
+
+def _make_task(members: list[dict]) -> Job:
+    if len(members) == 1:
+        return members[0]
+    members = sorted(members, key=lambda x: x["_row"])
+    head = members[0]
+    return Job(
+        JobID=f"{head['JobID']}+{len(members) - 1}",
+        Line=head["Line"],
+        Name=head["Name"],
+        Volume=head["Volume"],
+        Quantity=sum(j["Quantity"] for j in members),
+        Speed=head["Speed"],
+        Priority=head["Priority"],
+        StrictKey=_strict_key(head),
+        _row=head["_row"],
+        _dur_min=sum(_proc_min(j) for j in members),
+        _members=members,
+    )
+
+def expand_batches(order: list[dict], times: dict):
+    out_order = []
+    out_times = {}
+    for t in order:
+        members = t.get("_members")
+        if not members:
+            out_order.append(t)
+            out_times[t["JobID"]] = times[t["JobID"]]
+            continue
+        s, _ = times[t["JobID"]]
+        for j in members:
+            e = s + _proc_min(j)
+            out_order.append(j)
+            out_times[j["JobID"]] = (s, e)
+            s = e
+    return out_order, out_times
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import time
+from .setup_matrix import LineSetup, job_sku_key
+
+CACHE_FORMAT = 1
+
+def default_cache_dir() -> str:
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "planner-cpsat", "solve-cache")
+
+def line_fingerprint(jobs_for_line: list[dict], costs: LineSetup, durations: list[int],
+                     start_launch_min: float, params: dict) -> str:
+    # Всё, от чего зависит результат решения линии, в каноническом виде:
+    # задания по порядку строк, подматрица переходов по отсортированным SKU,
+    # стартовый запуск и параметры решателя.
+    h = hashlib.sha256()
+    rows = sorted(zip(jobs_for_line, durations), key=lambda x: (x[0]["_row"], x[0]["JobID"]))
+    keys = sorted(costs.sku_keys)
+    perm = [costs.sku_index[k] for k in keys]
+    head = {
+        "format": CACHE_FORMAT,
+        "jobs": [[j["JobID"], job_sku_key(j), d, j["Priority"],
+                  str(j.get("StrictKey", "") or "").strip(), j["_row"]] for j, d in rows],
+        "skus": keys,
+        "start_launch": round(float(start_launch_min), 3),
+        "params": params,
+    }
+    h.update(json.dumps(head, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    h.update(costs.cost[perm][:, perm].astype("<i8").tobytes())
+    return h.hexdigest()
+
+def hint_digest(hint) -> str | None:
+    """Отпечаток подсказки (последовательность JobID или заданий) для ключа кэша; None — без подсказки."""
+    if hint is None:
+        return None
+    ids = [str(h["JobID"] if isinstance(h, dict) or hasattr(h, "JobID") else h) for h in hint]
+    return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+
+class SolveCache:
+    """Дисковый кэш решений линий: один JSON-файл на отпечаток.
+
+    Вытеснение: файлы старше max_age_sec и самые давно использованные,
+    пока суммарный размер больше max_bytes.
+    """
+
+    def __init__(self, path: str | None = None, max_bytes: int = 64 * 1024 * 1024,
+                 max_age_sec: float = 30 * 24 * 3600):
+        self.path = path or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key: str):
+        fn = self._file(key)
+        try:
+            if time.time() - os.path.getmtime(fn) > self.max_age_sec:
+                os.remove(fn)
+                return None
+            with open(fn, encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(fn)
+        except (OSError, ValueError):
+            return None
+        return data
+
+    def put(self, key: str, data: dict):
+        fn = self._file(key)
+        tmp = f"{fn}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, fn)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            fn = os.path.join(self.path, name)
+            try:
+                st = os.stat(fn)
+            except OSError:
+                continue
+            if now - st.st_mtime > self.max_age_sec:
+                _remove_quiet(fn)
+            else:
+                entries.append((st.st_mtime, st.st_size, fn))
+        total = sum(size for _, size, _ in entries)
+        for _, size, fn in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            _remove_quiet(fn)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.path):
+            if name.endswith(".json"):
+                _remove_quiet(os.path.join(self.path, name))
+
+def _remove_quiet(fn: str):
+    try:
+        os.remove(fn)
+    except OSError:
+        pass
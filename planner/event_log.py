@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+import math
+from array import array
+
+EVENT_FIELDS = ("Line", "Type", "Start", "End", "JobID", "SKU", "Qty", "Speed", "Minutes", "Note")
+_ATTRS = dict(zip(EVENT_FIELDS, ("line", "type", "start", "end", "job_id", "sku", "qty", "speed", "minutes", "note")))
+
+class EventLog:
+    """Событийная лента по колонкам.
+
+    Время хранится минутами от base (array('d')), числа — array('d') с NaN вместо пустых,
+    строки — ссылками на общие объекты (линия, тип, подпись SKU, примечание перехода).
+    Для старого кода лента выглядит как список dict: len(), log[i], итерация по записям.
+    """
+    __slots__ = ("base", "line", "type", "start", "end", "job_id", "sku", "qty", "speed", "minutes", "note")
+
+    def __init__(self, base: dt.datetime):
+        self.base = base
+        self.line = []
+        self.type = []
+        self.start = array("d")
+        self.end = array("d")
+        self.job_id = []
+        self.sku = []
+        self.qty = array("d")
+        self.speed = array("d")
+        self.minutes = array("d")
+        self.note = []
+
+    def append(self, line, type_, start_min, end_min, job_id="", sku="", qty=math.nan, speed=math.nan,
+               minutes=0.0, note=""):
+        self.line.append(line)
+        self.type.append(type_)
+        self.start.append(start_min)
+        self.end.append(end_min)
+        self.job_id.append(job_id)
+        self.sku.append(sku)
+        self.qty.append(qty)
+        self.speed.append(speed)
+        self.minutes.append(minutes)
+        self.note.append(note)
+
+    def extend(self, other: "EventLog"):
+        shift = (other.base - self.base).total_seconds() / 60.0
+        self.line.extend(other.line)
+        self.type.extend(other.type)
+        self.start.extend(other.start if not shift else array("d", (v + shift for v in other.start)))
+        self.end.extend(other.end if not shift else array("d", (v + shift for v in other.end)))
+        self.job_id.extend(other.job_id)
+        self.sku.extend(other.sku)
+        self.qty.extend(other.qty)
+        self.speed.extend(other.speed)
+        self.minutes.extend(other.minutes)
+        self.note.extend(other.note)
+
+    def __len__(self):
+        return len(self.line)
+
+    def _dt(self, minutes):
+        return self.base + dt.timedelta(minutes=minutes)
+
+    def record(self, i: int) -> tuple:
+        qty, speed = self.qty[i], self.speed[i]
+        return (self.line[i], self.type[i], self._dt(self.start[i]), self._dt(self.end[i]),
+                self.job_id[i], self.sku[i],
+                "" if math.isnan(qty) else qty, "" if math.isnan(speed) else speed,
+                self.minutes[i], self.note[i])
+
+    def column(self, name: str) -> list:
+        """Колонка ленты списком значений, как в record(): даты для Start/End, "" вместо NaN в Qty/Speed."""
+        if name in ("Start", "End"):
+            base, td = self.base, dt.timedelta
+            return [base + td(minutes=m) for m in (self.start if name == "Start" else self.end)]
+        if name in ("Qty", "Speed"):
+            return ["" if math.isnan(v) else v for v in (self.qty if name == "Qty" else self.speed)]
+        return list(getattr(self, _ATTRS[name]))
+
+    def records(self, columns=EVENT_FIELDS):
+        if tuple(columns) == EVENT_FIELDS:
+            for i in range(len(self)):
+                yield self.record(i)
+        else:
+            pos = [EVENT_FIELDS.index(c) for c in columns]
+            for i in range(len(self)):
+                rec = self.record(i)
+                yield tuple(rec[p] for p in pos)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return dict(zip(EVENT_FIELDS, self.record(i)))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield dict(zip(EVENT_FIELDS, self.record(i)))
+
+    def take(self, idx) -> "EventLog":
+        out = EventLog(self.base)
+        out.line = [self.line[i] for i in idx]
+        out.type = [self.type[i] for i in idx]
+        out.start = array("d", (self.start[i] for i in idx))
+        out.end = array("d", (self.end[i] for i in idx))
+        out.job_id = [self.job_id[i] for i in idx]
+        out.sku = [self.sku[i] for i in idx]
+        out.qty = array("d", (self.qty[i] for i in idx))
+        out.speed = array("d", (self.speed[i] for i in idx))
+        out.minutes = array("d", (self.minutes[i] for i in idx))
+        out.note = [self.note[i] for i in idx]
+        return out
+
+    def sorted_by_line_start(self) -> "EventLog":
+        line, start = self.line, self.start
+        return self.take(sorted(range(len(self)), key=lambda i: (line[i], start[i])))
+
+    def to_dicts(self) -> list[dict]:
+        return list(self)
@@ -1,88 +1,266 @@
 # -*- coding: utf-8 -*-
 import datetime as dt
-from .utils import sku_key_norm, LAUNCH_FALLBACK_MIN, fmt_job
-from .optimizer import build_line_schedule_cp, analyze_sequence_cost
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .utils import LAUNCH_FALLBACK_MIN, fmt_job
+from .optimizer import build_line_schedule_cp, analyze_sequence_cost, _proc_min
+from .batching import collapse_same_sku, expand_batches
+from .setup_matrix import LineSetup, job_sku_key
+from .cache import SolveCache, hint_digest, line_fingerprint
+from .trace import span, emit, TraceRecorder
+from .event_log import EventLog
 from .excel_io import read_jobs_from_active_excel
 from .transitions import read_transition_matrix_from_active_excel
+from .assignment import assign_jobs_to_lines
 
 def build_events_for_line(line_name: str,
                           order: list[dict],
                           times: dict,
                           trans_for_line: dict,
                           plan_start_dt: dt.datetime,
-                          start_launch_min: float) -> list[dict]:
-    events = []
-    t0 = plan_start_dt + dt.timedelta(minutes=start_launch_min)
+                          start_launch_min: float,
+                          costs: LineSetup | None = None,
+                          lead_job: dict | None = None) -> EventLog:
+    # lead_job — задание перед order (хвост замороженного плана), кончается в plan_start_dt:
+    # переход с его SKU в первое задание попадает в ленту.
+    events = EventLog(plan_start_dt)
+    t0 = start_launch_min
 
     if start_launch_min > 0.5:
-        events.append({
-            "Line": line_name, "Type": "Запуск",
-            "Start": plan_start_dt, "End": t0,
-            "JobID": "", "SKU": "", "Qty": "", "Speed": "",
-            "Minutes": round(start_launch_min, 1), "Note": "Старт линии"
-        })
+        events.append(line_name, "Запуск", 0.0, t0, minutes=round(start_launch_min, 1), note="Старт линии")
 
     seq = sorted(order, key=lambda j: times[j["JobID"]][0])
+    if lead_job is not None:
+        times = {**times, lead_job["JobID"]: (-t0, -t0)}
+        seq = [lead_job] + seq
+    if costs is None:
+        costs = LineSetup(seq, trans_for_line)
+    ids = costs.sku_ids(seq).tolist()
     prev = None
-    for j in seq:
+    for pos, j in enumerate(seq):
+        if j is lead_job:
+            prev = j
+            continue
         s_rel, e_rel = times[j["JobID"]]
-        s = t0 + dt.timedelta(minutes=s_rel)
-        e = t0 + dt.timedelta(minutes=e_rel)
+        label = fmt_job(j)
         if prev is not None:
-            from_key = sku_key_norm(f"{prev['Name']} {prev['Volume']}")
-            to_key   = sku_key_norm(f"{j['Name']} {j['Volume']}")
-            rec = trans_for_line.get(f"{from_key}>>{to_key}")
-            if rec:
-                setup, next_launch, note = rec
-                if setup > 0.5:
-                    extra = next_launch if next_launch >= 0 else LAUNCH_FALLBACK_MIN
-                    tr_min = setup + extra
-                    tr_beg = (t0 + dt.timedelta(minutes=times[prev["JobID"]][1]))
-                    tr_end = tr_beg + dt.timedelta(minutes=tr_min)
-                    events.append({
-                        "Line": line_name, "Type": "Переход",
-                        "Start": tr_beg, "End": tr_end,
-                        "JobID": j["JobID"], "SKU": fmt_job(j), "Qty": "",
-                        "Speed": "", "Minutes": round(tr_min, 1), "Note": note
-                    })
+            a, b = ids[pos - 1], ids[pos]
+            tr_min = float(costs.event_min[a, b])
+            if tr_min > 0:
+                tr_beg = t0 + times[prev["JobID"]][1]
+                events.append(line_name, "Переход", tr_beg, tr_beg + tr_min, j["JobID"], label,
+                              minutes=round(tr_min, 1), note=costs.note(a, b))
         qty = j["Quantity"]; spd = j["Speed"]
         dur_min = (qty / spd) * 60.0
-        events.append({
-            "Line": line_name, "Type": "Производство",
-            "Start": s, "End": e, "JobID": j["JobID"], "SKU": fmt_job(j),
-            "Qty": round(qty, 0), "Speed": round(spd, 2),
-            "Minutes": round(dur_min, 1), "Note": ""
-        })
+        events.append(line_name, "Производство", t0 + s_rel, t0 + e_rel, j["JobID"], label,
+                      round(qty, 0), round(spd, 2), round(dur_min, 1))
         prev = j
 
     return events
 
-def optimize_all(excel_app, plan_start_dt: dt.datetime):
-    jobs = read_jobs_from_active_excel(excel_app)
-    tdata = read_transition_matrix_from_active_excel(excel_app)
-    trans_all = tdata["transitions"]
-    start_launch_all = tdata["start_launch"]
+MIN_LINE_BUDGET_SEC = 0.5
+
+def _solve_line(line: str, jlist: list[dict], trans_for_line: dict, start_launch_min: float,
+                batch_same_sku: bool, solver_opts: dict, costs: LineSetup, hint=None, deadline=None,
+                trace=None, cancel=None):
+    # deadline — абсолютное время (time.time()), после которого линия не должна решаться:
+    # в пуле процессов линия может стартовать позже, чем рассчитывался её бюджет.
+    if deadline is not None:
+        left = max(MIN_LINE_BUDGET_SEC, deadline - time.time())
+        solver_opts = dict(solver_opts, solver_time_limit_sec=min(solver_opts["solver_time_limit_sec"], left))
+    emit(trace, "line.start", line=line, jobs=len(jlist),
+         time_limit=solver_opts["solver_time_limit_sec"])
+    with span(trace, "line.batching", line=line, jobs=len(jlist)) as sp:
+        tasks = collapse_same_sku(jlist) if batch_same_sku else jlist
+        sp.set(tasks=len(tasks))
+    sstats = {}
+    order, times, obj = build_line_schedule_cp(line, tasks, trans_for_line, start_launch_min,
+                                               costs=costs, hint=hint, stats=sstats, trace=trace,
+                                               cancel=cancel, **solver_opts)
+    if batch_same_sku:
+        order, times = expand_batches(order, times)
+    sstats["time_limit"] = solver_opts["solver_time_limit_sec"]
+    return order, times, obj, len(tasks), sstats
+
+def _solve_line_traced(*args, cancel=None):
+    # В пуле процессов приёмник родителя недоступен: копим события локально и возвращаем их.
+    rec = TraceRecorder()
+    return _solve_line(*args, trace=rec, cancel=cancel), rec.events
+
+def _from_cache(data: dict, jlist: list[dict]):
+    by_id = {j["JobID"]: j for j in jlist}
+    order = [by_id[jid] for jid in data["order"]]
+    times = {jid: tuple(se) for jid, se in data["times"].items()}
+    # решения не было: время решения из кэша не переносим
+    return order, times, data["makespan"], data["n_tasks"], dict(data.get("stats", {}), wall=0.0)
+
+def _to_cache(order, times, obj, n_tasks, sstats) -> dict:
+    return {
+        "order": [j["JobID"] for j in order],
+        "times": {jid: list(se) for jid, se in times.items()},
+        "makespan": obj,
+        "n_tasks": n_tasks,
+        "stats": sstats,
+    }
+
+def _line_budgets(weights: dict, remaining: float, concurrent: int = 1) -> dict:
+    # Делит оставшееся время между линиями пропорционально размеру модели;
+    # при параллельном решении линии идут одновременно, поэтому доля умножается на concurrent.
+    total = sum(weights.values()) or 1
+    return {line: max(MIN_LINE_BUDGET_SEC, min(remaining, remaining * w / total * concurrent))
+            for line, w in weights.items()}
+
+def _workers_per_line(n_lines: int, max_parallel_lines: int, total_workers):
+    concurrent = max(1, min(max_parallel_lines, n_lines))
+    if total_workers is None:
+        total_workers = (os.cpu_count() or 8) if concurrent > 1 else 8
+    return concurrent, max(1, int(total_workers) // concurrent)
+
+def read_plan_inputs(excel_app, trace=None) -> dict:
+    """Всё, что optimize_all читает из книги: задания, карты переходов, старт линий.
+
+    excel_app — Excel.Application (COM) или файловый источник (planner.sources.open_workbook).
+    """
+    jobs = read_jobs_from_active_excel(excel_app, trace)
+    tdata = read_transition_matrix_from_active_excel(excel_app, trace)
+    return {"jobs": jobs, "transitions": tdata["transitions"], "start_launch": tdata["start_launch"]}
+
+class LineResult:
+    """Готовая линия из iter_optimize. Распаковывается как (line, rows, stats, events)."""
+    __slots__ = ("line", "index", "rows", "stats", "events")
+
+    def __init__(self, line: str, index: int, rows: list[dict], stats: dict, events: EventLog):
+        self.line = line
+        self.index = index      # номер линии в плане (порядок первого появления в JobsTable)
+        self.rows = rows
+        self.stats = stats
+        self.events = events
+
+    def __iter__(self):
+        return iter((self.line, self.rows, self.stats, self.events))
+
+    def __repr__(self):
+        return f"LineResult({self.line!r}, rows={len(self.rows)}, events={len(self.events)})"
+
+def iter_optimize(excel_app, plan_start_dt: dt.datetime, batch_same_sku: bool = True,
+                  max_parallel_lines: int = 1, total_workers: int | None = None,
+                  hints=None, cache: SolveCache | None = None,
+                  model: str = "pairwise", solver_time_limit_sec: float = 10.0,
+                  decompose_tiers: bool = False, lns_window: int = 0,
+                  time_budget_sec: float | None = None, gap_limit: float = 0.0, trace=None,
+                  cancel=None, assign_lines: bool = False, inputs: dict | None = None,
+                  frozen: dict | None = None, engine: str = "cpsat", log_fn=print):
+    """Решает линии по одной и отдаёт LineResult сразу по готовности линии.
+
+    Параметры — как у optimize_all. Карта переходов линии (TransitionTable) и матрица
+    переналадок собираются непосредственно перед решением линии и освобождаются после неё;
+    при max_parallel_lines > 1 в работе одновременно не больше линий, чем процессов.
+    Линии идут в порядке готовности, строки и события внутри линии — по времени.
+    """
+    deadline = time.time() + time_budget_sec if time_budget_sec else None
+    if inputs is None:
+        jobs = read_jobs_from_active_excel(excel_app, trace)
+        tdata = read_transition_matrix_from_active_excel(excel_app, trace, lazy=True)
+        inputs = {"jobs": jobs, "transitions": tdata["transitions"], "start_launch": tdata["start_launch"]}
+    jobs = inputs["jobs"]
+    trans_all = inputs["transitions"]
+    start_launch_all = inputs["start_launch"]
+    pre_costs = inputs.get("costs") or {}
+    frozen = {line: sorted(rows, key=lambda r: r["StartDT"]) for line, rows in (frozen or {}).items() if rows}
+    if frozen:
+        frozen_ids = {r["JobID"] for rows in frozen.values() for r in rows}
+        jobs = [j for j in jobs if j["JobID"] not in frozen_ids]
+    if assign_lines:
+        jobs, _ = assign_jobs_to_lines(jobs, trans_all, start_launch_all, log_fn=log_fn, trace=trace)
 
     from collections import defaultdict
     by_line = defaultdict(list)
     for j in jobs:
         by_line[j["Line"]].append(j)
+    frozen_only = [line for line in frozen if line not in by_line]
+    line_index = {line: k for k, line in enumerate(list(by_line) + frozen_only)}
 
-    table_rows = []
-    line_stats = {}
-    all_events = []
+    def line_hint(line, jlist):
+        if hints == "rows":
+            return [j["JobID"] for j in sorted(jlist, key=lambda x: x["_row"])]
+        if isinstance(hints, dict):
+            return hints.get(line)
+        return None
 
-    for line, jlist in by_line.items():
+    concurrent, workers = _workers_per_line(len(by_line), max_parallel_lines, total_workers)
+    solver_opts = {"model": model, "solver_time_limit_sec": solver_time_limit_sec, "num_workers": workers,
+                   "decompose_tiers": decompose_tiers, "lns_window": lns_window, "gap_limit": gap_limit,
+                   "engine": engine, "log_fn": log_fn}
+    # num_workers не входит в ключ кэша: он зависит от числа параллельных линий, а не от модели
+    cache_params = {"model": model, "solver_time_limit_sec": solver_time_limit_sec,
+                    "batch_same_sku": batch_same_sku, "decompose_tiers": decompose_tiers,
+                    "lns_window": lns_window, "gap_limit": gap_limit, "time_budget_sec": time_budget_sec}
+    if engine != "cpsat":
+        # ключи решений CP-SAT остаются прежними, чтобы не терять уже накопленный кэш
+        cache_params["engine"] = engine
+
+    def prepare(line):
+        # Всё, что нужно линии: карта переходов, старт, матрица переналадок, ключ и запись кэша.
+        # Линия с замороженным началом продолжает с окончания его последнего задания (lead),
+        # без запуска, но с переналадкой с SKU этого задания.
+        jlist = by_line[line]
         trans_for_line = trans_all.get(line, {})
         start_launch_min = float(start_launch_all.get(line, (LAUNCH_FALLBACK_MIN, -1.0))[0])
+        lead, anchor, params = None, plan_start_dt, cache_params
+        if line in frozen:
+            lead = max(frozen[line], key=lambda r: r["EndDT"])
+            anchor = max(plan_start_dt, lead["EndDT"])
+            start_launch_min = 0.0
+            params = dict(cache_params, lead=job_sku_key(lead))
+        with span(trace, "setup_matrix", line=line, jobs=len(jlist)):
+            costs = pre_costs.get(line)
+            if costs is None or not all(j["JobID"] in costs.job_sku for j in jlist) or \
+                    (lead is not None and job_sku_key(lead) not in costs.sku_index):
+                costs = LineSetup(jlist + [lead] if lead is not None else jlist, trans_for_line)
+        ctx = {"trans": trans_for_line, "start": start_launch_min, "costs": costs, "key": None, "solved": None,
+               "lead": lead, "anchor": anchor}
+        if cache is not None:
+            # подсказка меняет найденное решение (тёплый старт, запасной план) — она часть ключа
+            digest = hint_digest(line_hint(line, jlist))
+            if digest is not None:
+                params = dict(params, hint=digest)
+            ctx["key"] = line_fingerprint(jlist, costs, [_proc_min(j) for j in jlist], start_launch_min, params)
+            with span(trace, "cache.get", line=line) as sp:
+                data = cache.get(ctx["key"])
+                sp.set(hit=data is not None)
+            if data is not None:
+                ctx["solved"] = _from_cache(data, jlist)
+                ctx["key"] = None
+        return ctx
+
+    def solve_args(line, ctx, budgets):
+        opts = solver_opts if deadline is None else dict(solver_opts, solver_time_limit_sec=budgets[line])
+        if ctx["lead"] is not None:
+            opts = dict(opts, lead_job=ctx["lead"])
+        return (line, by_line[line], ctx["trans"], ctx["start"], batch_same_sku, opts, ctx["costs"],
+                line_hint(line, by_line[line]), deadline)
+
+    def finish_line(line, ctx):
+        jlist = by_line[line]
+        trans_for_line, start_launch_min, costs = ctx["trans"], ctx["start"], ctx["costs"]
+        lead, anchor = ctx["lead"], ctx["anchor"]
+        head = [lead] if lead is not None else []
 
-        base_seq = sorted(jlist, key=lambda x: x["_row"])
-        base_total, base_details = analyze_sequence_cost(line, base_seq, trans_for_line)
+        order, times, obj, n_tasks, sstats = ctx["solved"]
+        if ctx["key"] is not None and sstats.get("status") != "CANCELLED":
+            cache.put(ctx["key"], _to_cache(*ctx["solved"]))
 
-        order, times, obj = build_line_schedule_cp(line, jlist, trans_for_line, start_launch_min)
+        with span(trace, "analyze", line=line):
+            base_seq = head + sorted(jlist, key=lambda x: x["_row"])
+            base_total, base_details = analyze_sequence_cost(line, base_seq, trans_for_line, costs)
+            opt_details = analyze_sequence_cost(line, head + order, trans_for_line, costs)[1]
 
-        events = build_events_for_line(line, order, times, trans_for_line, plan_start_dt, start_launch_min)
-        all_events.extend(events)
+        with span(trace, "events", line=line) as sp:
+            events = build_events_for_line(line, order, times, trans_for_line, anchor, start_launch_min,
+                                           costs, lead)
+            sp.set(events=len(events))
 
         sum_prod = sum((j["Quantity"] / j["Speed"]) * 60.0 for j in jlist)
         opt_total = (obj + start_launch_min)
@@ -91,19 +269,34 @@ def optimize_all(excel_app, plan_start_dt: dt.datetime):
         saved = idle_base - idle_opt
         saved_pct = (saved / idle_base * 100.0) if idle_base > 0 else 0.0
 
-        line_stats[line] = {
+        stats = {
             "base_total": round(idle_base, 1),
             "opt_total":  round(idle_opt, 1),
             "saved":      round(saved, 1),
             "saved_pct":  round(saved_pct, 1),
+            "n_jobs":     len(jlist),
+            "n_tasks":    n_tasks,
+            "reduction_pct": round((1.0 - n_tasks / len(jlist)) * 100.0, 1) if jlist else 0.0,
+            "cache":      "off" if cache is None or not jlist else ("miss" if ctx["key"] is not None else "hit"),
+            "status":     sstats.get("status"),
+            "objective":  sstats.get("objective", obj),
+            "bound":      sstats.get("bound"),
+            "gap_pct":    round(sstats["gap"] * 100.0, 2) if "gap" in sstats else None,
+            "solve_sec":  round(sstats.get("wall", 0.0), 2),
+            "time_limit": round(sstats.get("time_limit", solver_time_limit_sec), 2),
             "base_details": base_details,
-            "opt_details":  analyze_sequence_cost(line, order, trans_for_line)[1],
+            "opt_details":  opt_details,
         }
+        if line in frozen:
+            stats.update(frozen=len(frozen[line]), replan_from=anchor)
 
+        rows = [dict(r, Line=line, Pos=rank) for rank, r in enumerate(frozen.get(line, ()), start=1)]
         ordered = sorted(order, key=lambda j: times[j["JobID"]][0])
-        for rank, j in enumerate(ordered, start=1):
+        for rank, j in enumerate(ordered, start=len(rows) + 1):
             s_rel, e_rel = times[j["JobID"]]
-            table_rows.append({
+            start_dt = anchor + dt.timedelta(minutes=start_launch_min + s_rel)
+            end_dt = anchor + dt.timedelta(minutes=start_launch_min + e_rel)
+            rows.append({
                 "Line": line,
                 "Pos": rank,
                 "JobID": j["JobID"],
@@ -111,10 +304,127 @@ def optimize_all(excel_app, plan_start_dt: dt.datetime):
                 "Volume": j["Volume"],
                 "Priority": j["Priority"],
                 "StrictKey": j["StrictKey"],
-                "Start": (plan_start_dt + dt.timedelta(minutes=start_launch_min + s_rel)).strftime("%d.%m %H:%M"),
-                "End":   (plan_start_dt + dt.timedelta(minutes=start_launch_min + e_rel)).strftime("%d.%m %H:%M"),
+                "Start": start_dt.strftime("%d.%m %H:%M"),
+                "End":   end_dt.strftime("%d.%m %H:%M"),
+                "StartDT": start_dt,
+                "EndDT":   end_dt,
             })
+        emit(trace, "line.done", line=line, status=sstats.get("status"), objective=obj,
+             gap_pct=stats["gap_pct"])
+        return LineResult(line, line_index[line], rows, stats, events)
+
+    lines = list(by_line)
+    weights = {}
+    if deadline is not None:
+        # Размер модели ~ число пар заданий после схлопывания партий.
+        for line in lines:
+            n_tasks = len(collapse_same_sku(by_line[line])) if batch_same_sku else len(by_line[line])
+            weights[line] = n_tasks * n_tasks
+
+    for line in frozen_only:
+        # на линии остались только замороженные задания: решать нечего
+        ctx = dict(prepare(line), key=None)
+        ctx["solved"] = ([], {}, 0, 0, {"status": "FROZEN"})
+        yield finish_line(line, ctx)
+
+    if concurrent > 1:
+        # Линии независимы: решаем в пуле процессов, подавая следующую линию по мере
+        # освобождения процесса, и отдаём линии по готовности.
+        budgets = _line_budgets(weights, time_budget_sec, concurrent) if deadline is not None else {}
+        # threading.Event не передаётся в процессы — отмену пробрасываем через Manager().Event().
+        manager = multiprocessing.Manager() if cancel is not None else None
+        shared_cancel = manager.Event() if manager is not None else None
+        queue = iter(lines)
+        futures = {}
+        try:
+            with ProcessPoolExecutor(max_workers=concurrent) as pool:
+                while True:
+                    while len(futures) < concurrent:
+                        line = next(queue, None)
+                        if line is None:
+                            break
+                        ctx = prepare(line)
+                        if ctx["solved"] is not None:
+                            yield finish_line(line, ctx)
+                            continue
+                        fut = pool.submit(_solve_line_traced if trace is not None else _solve_line,
+                                          *solve_args(line, ctx, budgets), cancel=shared_cancel)
+                        futures[fut] = (line, ctx)
+                    if not futures:
+                        break
+                    done, _ = wait(futures, timeout=0.2, return_when=FIRST_COMPLETED)
+                    if cancel is not None and cancel.is_set():
+                        shared_cancel.set()
+                    for fut in done:
+                        line, ctx = futures.pop(fut)
+                        if trace is None:
+                            ctx["solved"] = fut.result()
+                        else:
+                            ctx["solved"], events = fut.result()
+                            for ev in events:
+                                trace(ev)
+                        yield finish_line(line, ctx)
+        finally:
+            for fut in futures:
+                fut.cancel()
+            if manager is not None:
+                manager.shutdown()
+    else:
+        for k, line in enumerate(lines):
+            ctx = prepare(line)
+            if ctx["solved"] is None:
+                # Бюджет пересчитывается перед каждой линией: недоиспользованное
+                # предыдущими линиями время (ранний останов по зазору) достаётся следующим.
+                budgets = {}
+                if deadline is not None:
+                    budgets = _line_budgets({l: weights[l] for l in lines[k:]}, deadline - time.time())
+                ctx["solved"] = _solve_line(*solve_args(line, ctx, budgets), trace, cancel)
+            yield finish_line(line, ctx)
+
+def optimize_all(excel_app, plan_start_dt: dt.datetime, batch_same_sku: bool = True,
+                 max_parallel_lines: int = 1, total_workers: int | None = None,
+                 hints=None, cache: SolveCache | None = None,
+                 model: str = "pairwise", solver_time_limit_sec: float = 10.0,
+                 decompose_tiers: bool = False, lns_window: int = 0,
+                 time_budget_sec: float | None = None, gap_limit: float = 0.0, trace=None,
+                 cancel=None, on_line=None, assign_lines: bool = False, inputs: dict | None = None,
+                 frozen: dict | None = None, engine: str = "cpsat", log_fn=print):
+    # hints: None — без подсказки; "rows" — порядок строк JobsTable;
+    # {line: [JobID, ...]} — прошлый план (plan_hints_from_rows / read_plan_hints_csv).
+    # time_budget_sec — общий бюджет на все линии (вместо solver_time_limit_sec на линию);
+    # gap_limit — линия останавливается, когда (makespan - граница) / makespan <= gap_limit.
+    # trace — приёмник событий (см. planner.trace), например TraceRecorder().
+    # cancel — объект с is_set() (threading.Event): текущий поиск CP-SAT останавливается
+    # с лучшим найденным решением, оставшиеся линии получают жадный план.
+    # on_line(line, rows, stats, events) — вызывается по мере готовности каждой линии.
+    # assign_lines — задания с колонкой Lines сначала распределяются по линиям
+    # (минимум максимальной загрузки, см. planner.assignment), затем линии решаются как обычно.
+    # inputs — готовые данные (read_plan_inputs) вместо чтения книги; excel_app тогда не нужен.
+    # Необязательный inputs["costs"] = {линия: LineSetup} используется, если покрывает задания линии.
+    # frozen — {линия: [строки плана]} с StartDT/EndDT (planner.replan.frozen_prefix): эти задания
+    # не двигаются и идут в план как есть, остальные задания линии планируются после них.
+    # engine — "cpsat" или "heuristic": локальный поиск без CP-SAT (planner.heuristic), доли секунды
+    # на линию; solver_time_limit_sec для него — верхняя граница, model и lns_window не используются.
+    # log_fn — куда писать сообщения назначения и решателя (None — молча); при max_parallel_lines > 1
+    # функция уходит в процессы, поэтому годится только print, None или функция уровня модуля.
+    # Потоковый вариант без сборки общих таблиц — iter_optimize.
+    table_rows = []
+    results = []
+    all_events = EventLog(plan_start_dt)
+    for res in iter_optimize(excel_app, plan_start_dt, batch_same_sku=batch_same_sku,
+                             max_parallel_lines=max_parallel_lines, total_workers=total_workers,
+                             hints=hints, cache=cache, model=model, solver_time_limit_sec=solver_time_limit_sec,
+                             decompose_tiers=decompose_tiers, lns_window=lns_window,
+                             time_budget_sec=time_budget_sec, gap_limit=gap_limit, trace=trace,
+                             cancel=cancel, assign_lines=assign_lines, inputs=inputs, frozen=frozen,
+                             engine=engine, log_fn=log_fn):
+        table_rows.extend(res.rows)
+        all_events.extend(res.events)
+        results.append((res.index, res.line, res.stats))
+        if on_line is not None:
+            on_line(*res)
 
+    line_stats = {line: st for _, line, st in sorted(results)}
     table_rows.sort(key=lambda r: (r["Line"], r["Pos"]))
-    all_events.sort(key=lambda e: (e["Line"], e["Start"]))
+    all_events = all_events.sorted_by_line_start()
     return table_rows, line_stats, all_events
@@ -1,23 +1,26 @@
 # -*- coding: utf-8 -*-
-def read_jobs_from_active_excel(excel_app):
-    wb = excel_app.ActiveWorkbook
-    if wb is None:
-        raise RuntimeError("Нет активной книги Excel.")
+from .trace import span
+from .jobs import job_from_values
+from .sources import as_workbook
 
+def read_jobs_from_active_excel(excel_app, trace=None):
+    # excel_app — Excel.Application (COM) или файловый источник из planner.sources
+    with span(trace, "excel.read_jobs") as sp:
+        jobs = _read_jobs(as_workbook(excel_app))
+        sp.set(jobs=len(jobs))
+    return jobs
+
+def _read_jobs(book):
     try:
-        ws = wb.Worksheets("JOBS")
-    except Exception:
+        table = book.table("JOBS", "JobsTable")
+    except KeyError:
         raise RuntimeError("Лист 'JOBS' не найден.")
-
-    lo = None
-    for L in ws.ListObjects:
-        if str(L.Name).lower() == "jobstable":
-            lo = L
-            break
-    if lo is None or lo.DataBodyRange is None:
+    if table is None:
         raise RuntimeError("Таблица 'JobsTable' на листе 'JOBS' не найдена.")
 
-    headers = [str(h.Value or "").strip() for h in lo.HeaderRowRange]
+    # Заголовок и тело — по одному чтению на всю таблицу, дальше строки идут потоком
+    header, body = table
+    headers = [str(h or "").strip() for h in header]
 
     def find_col(*names):
         for idx, name in enumerate(headers, start=1):
@@ -35,6 +38,7 @@ def read_jobs_from_active_excel(excel_app):
     col_speed = find_col("SPEED")
     col_prio  = find_col("PRIORITY")
     col_strict= find_col("СТРОГИЙ ПОРЯДОК", "STRICTKEY")
+    col_lines = find_col("LINES", "ЛИНИИ")
 
     need = [("JobID", col_job), ("Line", col_line), ("Name", col_name),
             ("Volume", col_vol), ("Quantity", col_qty), ("Speed", col_speed),
@@ -43,26 +47,12 @@ def read_jobs_from_active_excel(excel_app):
     if missing:
         raise RuntimeError("Нет колонок в JobsTable: " + ", ".join(missing))
 
-    rows = lo.DataBodyRange.Rows.Count
     jobs = []
-    for r in range(1, rows + 1):
+    for r, row in enumerate(body, start=1):
         def val(c):
-            return lo.DataBodyRange.Cells(r, c).Value if c else ""
-        speed = float(val(col_speed) or 0)
-        qty = float(val(col_qty) or 0)
-        if speed <= 0 or qty <= 0:
-            continue
-        job = {
-            "JobID":    str(val(col_job) or "").strip(),
-            "Line":     str(val(col_line) or "").strip(),
-            "Name":     str(val(col_name) or "").strip(),
-            "Volume":   str(val(col_vol) or "").strip(),
-            "Quantity": qty,
-            "Speed":    speed,
-            "Priority": int(float(val(col_prio) or 0)),
-            "StrictKey": str(val(col_strict) or "").strip() if col_strict else "",
-            "_row": r,
-        }
-        if job["JobID"] and job["Line"]:
+            return row[c - 1] if c and c <= len(row) else ""
+        job = job_from_values(val(col_job), val(col_line), val(col_name), val(col_vol), val(col_qty),
+                              val(col_speed), val(col_prio), val(col_strict), val(col_lines), r)
+        if job is not None:
             jobs.append(job)
     return jobs
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Выгрузка плана (table_rows) и событий (build_events_for_line) в CSV / JSONL / Parquet
+и запись плана обратно в книгу Excel.
+
+Строки идут потоком: записи формируются генератором по одной, целиком таблица
+в строки не превращается. Start/End — настоящие даты (в CSV — ISO-формат).
+"""
+import csv
+import datetime as dt
+import json
+import os
+
+PLAN_COLUMNS = ("Line", "Pos", "JobID", "Name", "Volume", "Priority", "StrictKey", "Start", "End")
+EVENT_COLUMNS = ("Line", "Type", "Start", "End", "JobID", "SKU", "Qty", "Speed", "Minutes", "Note")
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+# Типы колонок помимо строковых: для Parquet и для пустых значений ("" -> None)
+PLAN_TYPES = {"Pos": "int", "Priority": "int", "Start": "datetime", "End": "datetime"}
+EVENT_TYPES = {"Start": "datetime", "End": "datetime", "Qty": "float", "Speed": "float", "Minutes": "float"}
+
+PARQUET_CHUNK_ROWS = 50_000
+EXCEL_BLOCK_ROWS = 5_000
+DT_FORMAT = "%Y-%m-%d %H:%M"
+
+def plan_records(rows):
+    # В table_rows Start/End — строки для показа, даты лежат в StartDT/EndDT
+    for r in rows:
+        yield tuple(r.get(c + "DT", r.get(c)) if c in ("Start", "End") else r.get(c, "") for c in PLAN_COLUMNS)
+
+def event_records(events):
+    if hasattr(events, "records"):
+        # EventLog: кортежи прямо из колонок, без промежуточных dict
+        yield from events.records(EVENT_COLUMNS)
+        return
+    for e in events:
+        yield tuple(e.get(c, "") for c in EVENT_COLUMNS)
+
+def _typed(records, columns, types):
+    kinds = [types.get(c) for c in columns]
+    for rec in records:
+        yield tuple(None if (k is not None and v in ("", None)) else v for k, v in zip(kinds, rec))
+
+def write_csv(path: str, records, columns) -> int:
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        for rec in records:
+            w.writerow([v.strftime(DT_FORMAT) if isinstance(v, dt.datetime) else v for v in rec])
+            n += 1
+    return n
+
+def write_jsonl(path: str, records, columns, types=None) -> int:
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for rec in _typed(records, columns, types or {}):
+            obj = {c: (v.isoformat() if isinstance(v, dt.datetime) else v) for c, v in zip(columns, rec)}
+            f.write(json.dumps(obj, ensure_ascii=False))
+            f.write("\n")
+            n += 1
+    return n
+
+def write_parquet(path: str, records, columns, types=None, chunk_rows: int = PARQUET_CHUNK_ROWS) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Для выгрузки в Parquet нужен пакет pyarrow (pip install pyarrow).")
+    types = types or {}
+    arrow_types = {"int": pa.int64(), "float": pa.float64(), "datetime": pa.timestamp("s")}
+    schema = pa.schema([(c, arrow_types.get(types.get(c), pa.string())) for c in columns])
+
+    def batch(chunk):
+        cols = list(zip(*chunk)) if chunk else [()] * len(columns)
+        arrays = []
+        for c, vals in zip(columns, cols):
+            if types.get(c) is None:
+                vals = [None if v is None else str(v) for v in vals]
+            arrays.append(pa.array(vals, type=schema.field(c).type))
+        return pa.record_batch(arrays, schema=schema)
+
+    n = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        chunk = []
+        for rec in _typed(records, columns, types):
+            chunk.append(rec)
+            if len(chunk) >= chunk_rows:
+                writer.write_batch(batch(chunk))
+                n += len(chunk)
+                chunk = []
+        if chunk or n == 0:
+            writer.write_batch(batch(chunk))
+            n += len(chunk)
+    return n
+
+_WRITERS = {
+    "csv": lambda path, recs, cols, types: write_csv(path, recs, cols),
+    "jsonl": write_jsonl,
+    "parquet": write_parquet,
+}
+
+def export_plan(base_path: str, rows, events=None, formats=("csv",)) -> list[str]:
+    """Пишет <base>.plan.<fmt> и (если есть events) <base>.events.<fmt>; возвращает пути."""
+    bad = [f for f in formats if f not in _WRITERS]
+    if bad:
+        raise ValueError(f"Неизвестный формат: {', '.join(bad)}; ожидается: {', '.join(EXPORT_FORMATS)}")
+    base, _ = os.path.splitext(base_path)
+    written = []
+    for fmt in formats:
+        path = f"{base}.plan.{fmt}"
+        _WRITERS[fmt](path, plan_records(rows), PLAN_COLUMNS, PLAN_TYPES)
+        written.append(path)
+        if events is not None:
+            path = f"{base}.events.{fmt}"
+            _WRITERS[fmt](path, event_records(events), EVENT_COLUMNS, EVENT_TYPES)
+            written.append(path)
+    return written
+
+def export_plan_file(path: str, rows, events=None) -> list[str]:
+    """Пишет план ровно в path (формат — по расширению), события — рядом: <base>.events.<fmt>."""
+    base, ext = os.path.splitext(path)
+    fmt = ext.lstrip(".").lower()
+    if fmt not in _WRITERS:
+        raise ValueError(f"Неизвестный формат: '{ext}'; ожидается: {', '.join(EXPORT_FORMATS)}")
+    _WRITERS[fmt](path, plan_records(rows), PLAN_COLUMNS, PLAN_TYPES)
+    written = [path]
+    if events is not None:
+        events_path = f"{base}.events.{fmt}"
+        _WRITERS[fmt](events_path, event_records(events), EVENT_COLUMNS, EVENT_TYPES)
+        written.append(events_path)
+    return written
+
+def write_plan_to_excel(excel_app, rows, sheet_name: str = "ПЛАН", columns=PLAN_COLUMNS,
+                        records=None, block_rows: int = EXCEL_BLOCK_ROWS) -> int:
+    """Записывает таблицу на лист sheet_name активной книги (лист создаётся/очищается).
+
+    Каждый блок из block_rows строк — одно присваивание Range.Value вместо записи по ячейкам.
+    records — поток кортежей в порядке columns (по умолчанию plan_records(rows)).
+    """
+    wb = excel_app.ActiveWorkbook
+    if wb is None:
+        raise RuntimeError("Нет активной книги Excel.")
+    try:
+        ws = wb.Worksheets(sheet_name)
+        ws.Cells.Clear()
+    except Exception:
+        ws = wb.Worksheets.Add(After=wb.Worksheets(wb.Worksheets.Count))
+        ws.Name = sheet_name
+
+    n_cols = len(columns)
+    ws.Range(ws.Cells(1, 1), ws.Cells(1, n_cols)).Value = (tuple(columns),)
+
+    def put(block, first_row):
+        ws.Range(ws.Cells(first_row, 1), ws.Cells(first_row + len(block) - 1, n_cols)).Value = tuple(block)
+
+    n = 0
+    block = []
+    for rec in (plan_records(rows) if records is None else records):
+        block.append(tuple("" if v is None else v for v in rec))
+        if len(block) >= block_rows:
+            put(block, 2 + n)
+            n += len(block)
+            block = []
+    if block:
+        put(block, 2 + n)
+        n += len(block)
+    return n
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+import time
+import numpy as np
+from .precedence import priority_tiers, strict_chains
+from .hints import hint_order, hint_times
+
+def greedy_order(jobs: list[dict], setup: list[list[int]], lead: list[int] | None = None) -> list[int]:
+    """Допустимая последовательность «ближайшего соседа» по переналадке.
+
+    На каждом шаге из самого раннего незавершённого уровня приоритета берётся
+    доступное задание (для строгого ключа — следующее в цепочке) с минимальной
+    переналадкой от текущего; при равенстве — по _row.
+    """
+    next_in_chain = {}
+    blocked = set()
+    for chain in strict_chains(jobs):
+        for a, b in zip(chain, chain[1:]):
+            next_in_chain[a] = b
+            blocked.add(b)
+
+    seq = []
+    prev = None
+    for tier in priority_tiers(jobs):
+        left = set(tier)
+        while left:
+            best, best_cost = None, None
+            for i in left:
+                if i in blocked:
+                    continue
+                if prev is not None:
+                    cost = setup[prev][i]
+                else:
+                    cost = lead[i] if lead else 0
+                if best is None or (cost, jobs[i]["_row"]) < (best_cost, jobs[best]["_row"]):
+                    best, best_cost = i, cost
+            if best is None:
+                raise RuntimeError("Нет доступного задания: противоречие StrictKey и Priority.")
+            seq.append(best)
+            left.discard(best)
+            nxt = next_in_chain.get(best)
+            if nxt is not None:
+                blocked.discard(nxt)
+            prev = best
+    return seq
+
+# Локальный поиск без CP-SAT: Or-opt (перенос отрезка из 1-3 заданий), обмен двух заданий
+# и 2-opt (разворот отрезка) над матрицей переналадок. Последовательность хранится массивом
+# ext = [S] + seq + [E]: S — задание перед линией (строка lead), E — конец, переналадка в E нулевая.
+# Допустимость каждого хода проверяется за O(1): задания не покидают блок своего уровня
+# приоритета, а задание строгого ключа не перепрыгивает соседей по цепочке (позиции
+# предыдущего/следующего в цепочке). Изменение стоимости хода — несколько клеток матрицы;
+# все ходы из одной позиции оцениваются разом векторно.
+
+OR_OPT_MAX = 3
+KICK_STALE = 50
+
+class _LocalSearch:
+    def __init__(self, seq, jobs, setup, lead):
+        n = len(seq)
+        self.n = n
+        self.cost = np.zeros((n + 2, n + 2), dtype=np.int64)
+        self.cost[:n, :n] = np.asarray(setup, dtype=np.int64).reshape(n, n)
+        if lead:
+            self.cost[n, :n] = lead
+        self.chain_prev = np.full(n + 2, -1, dtype=np.int64)
+        self.chain_next = np.full(n + 2, -1, dtype=np.int64)
+        for chain in strict_chains(jobs):
+            for a, b in zip(chain, chain[1:]):
+                self.chain_next[a] = b
+                self.chain_prev[b] = a
+        # Блок уровня приоритета не меняется: [block_lo, block_hi] — позиции в ext
+        self.block_lo = np.zeros(n + 2, dtype=np.int64)
+        self.block_hi = np.zeros(n + 2, dtype=np.int64)
+        p = 1
+        for i, job in enumerate(seq):
+            if i == 0 or jobs[job]["Priority"] != jobs[seq[i - 1]]["Priority"]:
+                p = i + 1
+            self.block_lo[job] = p
+        p = n
+        for i in range(n - 1, -1, -1):
+            job = seq[i]
+            if i == n - 1 or jobs[job]["Priority"] != jobs[seq[i + 1]]["Priority"]:
+                p = i + 1
+            self.block_hi[job] = p
+        self.set_seq(seq)
+
+    def set_seq(self, seq):
+        n = self.n
+        self.ext = np.concatenate(([n], np.asarray(seq, dtype=np.int64), [n + 1]))
+        self._refresh()
+
+    def _refresh(self):
+        e, c, n = self.ext, self.cost, self.n
+        pos = np.empty(n + 2, dtype=np.int64)
+        pos[e] = np.arange(n + 2)
+        self.pos = pos
+        has_prev, has_next = self.chain_prev >= 0, self.chain_next >= 0
+        # позиция предыдущего/следующего в цепочке для задания на каждой позиции (-1 / n+2 — нет)
+        self.prev_at = np.where(has_prev, pos[np.where(has_prev, self.chain_prev, 0)], -1)[e]
+        self.next_at = np.where(has_next, pos[np.where(has_next, self.chain_next, 0)], n + 2)[e]
+        self.fwd_sum = np.concatenate(([0], np.cumsum(c[e[:-1], e[1:]])))
+        self.rev_sum = np.concatenate(([0], np.cumsum(c[e[1:], e[:-1]])))
+        self.total = int(self.fwd_sum[-1])
+
+    def seq(self) -> list[int]:
+        return self.ext[1:-1].tolist()
+
+    def _or_opt_range(self, p, size):
+        # Отрезок ext[p:p+size] можно вставить в зазор g (между ext[g] и ext[g+1]), lo <= g <= hi.
+        # Порядок внутри отрезка сохраняется, поэтому звенья цепочек внутри него не мешают.
+        a, last = self.ext[p], p + size - 1
+        before = self.prev_at[p:p + size]
+        after = self.next_at[p:p + size]
+        lo = max(int(self.block_lo[a]) - 1, int(before[before < p].max(initial=-1)))
+        hi = min(int(self.block_hi[a]), int(after[after > last].min(initial=self.n + 2)) - 1)
+        return lo, hi
+
+    def best_move(self, p):
+        """Лучший улучшающий ход из позиции p: (delta, ход) или None."""
+        e, c = self.ext, self.cost
+        a = e[p]
+        hi_block = int(self.block_hi[a])
+        best = None
+
+        for size in range(1, OR_OPT_MAX + 1):
+            last = p + size - 1
+            if last > hi_block:
+                break
+            s0, s1 = a, e[last]
+            remove = c[e[p - 1], s0] + c[s1, e[last + 1]] - c[e[p - 1], e[last + 1]]
+            lo, hi = self._or_opt_range(p, size)
+            gaps = np.concatenate((np.arange(lo, p - 1), np.arange(last + 1, hi + 1)))
+            if not gaps.size:
+                continue
+            u, v = e[gaps], e[gaps + 1]
+            delta = c[u, s0] + c[s1, v] - c[u, v] - remove
+            k = int(delta.argmin())
+            if delta[k] < 0 and (best is None or delta[k] < best[0]):
+                best = (int(delta[k]), ("or", p, size, int(gaps[k])))
+
+        # обмен ext[p] и ext[q], q >= p + 2 (соседний обмен — это Or-opt)
+        q_hi = min(hi_block, int(self.next_at[p]) - 1)
+        if q_hi >= p + 2:
+            q = np.arange(p + 2, q_hi + 1)
+            q = q[self.prev_at[q] < p]
+            if q.size:
+                b = e[q]
+                pa, na, pb, nb = e[p - 1], e[p + 1], e[q - 1], e[q + 1]
+                delta = (c[pa, b] + c[b, na] + c[pb, a] + c[a, nb]) - (c[pa, a] + c[a, na] + c[pb, b] + c[b, nb])
+                k = int(delta.argmin())
+                if delta[k] < 0 and (best is None or delta[k] < best[0]):
+                    best = (int(delta[k]), ("swap", p, int(q[k])))
+
+        # 2-opt: разворот ext[p..q]; в отрезке не должно быть двух звеньев одной цепочки
+        if hi_block > p:
+            blocked = np.flatnonzero(self.prev_at[p + 1:hi_block + 1] >= p)
+            q_hi = p + int(blocked[0]) if blocked.size else hi_block
+            if q_hi > p:
+                q = np.arange(p + 1, q_hi + 1)
+                inner_old = self.fwd_sum[q] - self.fwd_sum[p]
+                inner_new = self.rev_sum[q] - self.rev_sum[p]
+                delta = (c[e[p - 1], e[q]] + inner_new + c[a, e[q + 1]]) - \
+                        (c[e[p - 1], a] + inner_old + c[e[q], e[q + 1]])
+                k = int(delta.argmin())
+                if delta[k] < 0 and (best is None or delta[k] < best[0]):
+                    best = (int(delta[k]), ("2opt", p, int(q[k])))
+        return best
+
+    def apply(self, move):
+        e = self.ext
+        kind, p = move[0], move[1]
+        if kind == "or":
+            size, g = move[2], move[3]
+            seg = e[p:p + size]
+            if g > p:
+                e = np.concatenate((e[:p], e[p + size:g + 1], seg, e[g + 1:]))
+            else:
+                e = np.concatenate((e[:g + 1], seg, e[g + 1:p], e[p + size:]))
+        elif kind == "swap":
+            q = move[2]
+            e = e.copy()
+            e[p], e[q] = e[q], e[p]
+        else:
+            q = move[2]
+            e = np.concatenate((e[:p], e[p:q + 1][::-1], e[q + 1:]))
+        self.ext = e
+        self._refresh()
+
+    def descend(self, deadline, cancel=None) -> bool:
+        """Улучшающие ходы до локального оптимума; False — прервано по времени или отмене."""
+        n = self.n
+        p, quiet = 1, 0
+        while quiet < n:
+            if time.perf_counter() >= deadline or (cancel is not None and cancel.is_set()):
+                return False
+            found = self.best_move(p)
+            if found is not None:
+                self.apply(found[1])
+                quiet = 0
+            else:
+                quiet += 1
+            p = p % n + 1
+        return True
+
+    def kick(self, rng, moves: int):
+        # Возмущение: случайные допустимые переносы отдельных заданий
+        for _ in range(moves):
+            p = int(rng.integers(1, self.n + 1))
+            lo, hi = self._or_opt_range(p, 1)
+            gaps = [g for g in range(lo, hi + 1) if g not in (p - 1, p)]
+            if gaps:
+                self.apply(("or", p, 1, gaps[int(rng.integers(len(gaps)))]))
+
+def improve_sequence_local(seq: list[int], jobs: list[dict], setup: list[list[int]], time_budget: float,
+                           lead: list[int] | None = None, log_fn=None, line_name: str = "",
+                           cancel=None, seed: int = 0) -> list[int]:
+    """Локальный поиск с возмущениями (ILS) от допустимой последовательности seq.
+
+    Спуск до локального оптимума по Or-opt / обмену / 2-opt, затем случайный перенос
+    нескольких заданий и новый спуск; лучшее решение сохраняется. Останов — по бюджету
+    времени, по cancel или после KICK_STALE возмущений подряд без улучшения.
+    """
+    if len(seq) <= 1:
+        return list(seq)
+    deadline = time.perf_counter() + time_budget
+    ls = _LocalSearch(seq, jobs, setup, lead)
+    start_cost = ls.total
+    ls.descend(deadline, cancel)
+    best_seq, best_cost = ls.seq(), ls.total
+    rng = np.random.default_rng(seed)
+    kick_moves = min(8, max(2, len(seq) // 20))
+    kicks, stale = 0, 0
+    while stale < KICK_STALE and time.perf_counter() < deadline and not (cancel is not None and cancel.is_set()):
+        ls.kick(rng, kick_moves)
+        done = ls.descend(deadline, cancel)
+        kicks += 1
+        if ls.total < best_cost:
+            best_seq, best_cost, stale = ls.seq(), ls.total, 0
+        else:
+            stale += 1
+            ls.set_seq(best_seq)
+        if not done:
+            break
+    if log_fn:
+        log_fn(f"[{line_name}] локальный поиск: возмущений={kicks}; переналадки {start_cost} -> {best_cost} мин")
+    return best_seq
+
+def solve_local(line_name, jobs, durations, setup, sku, model, start_launch,
+                time_limit, num_workers, hint=None, lead=None, log_fn=print, cancel=None):
+    # Та же сигнатура, что у _solve_sequence в optimizer: возвращает start_vals.
+    # Без CP-SAT и в одном потоке; переналадки — между соседями, как в solve_lns.
+    seq = greedy_order(jobs, setup, lead)
+    if hint is not None:
+        hint_seq = hint_order(jobs, hint)
+        if _seq_cost(hint_seq, setup, lead) < _seq_cost(seq, setup, lead):
+            seq = hint_seq
+    seq = improve_sequence_local(seq, jobs, setup, time_limit, lead, log_fn, line_name, cancel)
+    return hint_times(seq, durations, setup, all_pairs=False, lead=lead)
+
+def _seq_cost(seq, setup, lead=None) -> int:
+    total = lead[seq[0]] if (lead and seq) else 0
+    return total + sum(setup[a][b] for a, b in zip(seq, seq[1:]))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import csv
+from collections import defaultdict
+
+def plan_hints_from_rows(rows) -> dict:
+    by_line = defaultdict(list)
+    for r in rows:
+        line = str(r.get("Line", "") or "").strip()
+        job_id = str(r.get("JobID", "") or "").strip()
+        if line and job_id:
+            by_line[line].append((int(float(r.get("Pos") or 0)), job_id))
+    return {line: [jid for _, jid in sorted(lst)] for line, lst in by_line.items()}
+
+def read_plan_hints_csv(path: str) -> dict:
+    with open(path, newline="", encoding="utf-8") as f:
+        return plan_hints_from_rows(csv.DictReader(f))
+
+def hint_order(jobs_for_line: list[dict], hint) -> list[int]:
+    """Индексы jobs_for_line в порядке подсказки, исправленном под приоритеты и строгие ключи.
+
+    hint — последовательность JobID или заданий; задания, которых нет в подсказке,
+    идут после них в порядке строк. Партии (_members) ранжируются по первому участнику.
+    """
+    rank = {}
+    for pos, h in enumerate(hint or ()):
+        jid = h["JobID"] if isinstance(h, dict) else str(h)
+        rank.setdefault(jid, pos)
+    missing = len(rank)
+
+    def task_rank(job):
+        members = job.get("_members") or [job]
+        return min(rank.get(m["JobID"], missing) for m in members)
+
+    seq = sorted(range(len(jobs_for_line)), key=lambda i: (task_rank(jobs_for_line[i]), jobs_for_line[i]["_row"]))
+
+    slots = defaultdict(list)
+    for pos, i in enumerate(seq):
+        key = str(jobs_for_line[i].get("StrictKey", "") or "").strip()
+        if key:
+            slots[key].append(pos)
+    for key, positions in slots.items():
+        members = sorted((seq[p] for p in positions), key=lambda i: jobs_for_line[i]["_row"])
+        for p, i in zip(positions, members):
+            seq[p] = i
+
+    seq.sort(key=lambda i: jobs_for_line[i]["Priority"])
+    return seq
+
+def hint_times(seq: list[int], durations: list[int], setup: list[list[int]], all_pairs: bool,
+               lead: list[int] | None = None) -> list[int]:
+    # all_pairs=True — переналадка соблюдается со всеми предыдущими заданиями
+    # (попарная модель), иначе только с непосредственным предшественником.
+    # lead[i] — переналадка с задания, стоящего перед всей последовательностью.
+    starts = [0] * len(durations)
+    done = []
+    t = 0
+    for i in seq:
+        s = t
+        if all_pairs:
+            if lead:
+                s = max(s, lead[i])
+            for p in done:
+                s = max(s, starts[p] + durations[p] + setup[p][i])
+        elif done:
+            s = t + setup[done[-1]][i]
+        elif lead:
+            s = lead[i]
+        starts[i] = s
+        t = s + durations[i]
+        done.append(i)
+    return starts
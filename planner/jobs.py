@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import sys
+from functools import lru_cache
+from .utils import sku_key_norm, proc_minutes, parse_lines_cell, cell_number
+
+JOB_FIELDS = ("JobID", "Line", "Name", "Volume", "Quantity", "Speed", "Priority", "StrictKey", "_row")
+_OPTIONAL = ("Lines", "_dur_min", "_members")
+
+# поля, от которых зависят sku_key, label и dur_min
+_DERIVED_FROM = ("Name", "Volume", "Quantity", "Speed")
+SKU_KEY_CACHE = 65536
+
+@lru_cache(maxsize=SKU_KEY_CACHE)
+def _label_sku_key(label: str) -> str:
+    # подпись -> ключ SKU; интернирован, так что строка общая у всех заданий одного SKU
+    return sys.intern(sku_key_norm(label))
+
+class Job:
+    """Задание JobsTable на слотах.
+
+    Читается как dict (job["Name"], job.get(...), "_members" in job, dict(job)), поэтому
+    код, написанный под словари, работает без изменений. Ключ SKU, подпись для событий
+    и длительность в минутах считаются при создании и пересчитываются, когда через
+    job[...] меняются Name, Volume, Quantity или Speed.
+    """
+    __slots__ = JOB_FIELDS + _OPTIONAL + ("sku_key", "label", "dur_min")
+
+    def __init__(self, JobID, Line, Name, Volume, Quantity, Speed, Priority, StrictKey="", _row=0,
+                 Lines=None, _dur_min=None, _members=None):
+        self.JobID = JobID
+        self.Line = sys.intern(str(Line))
+        self.Name = sys.intern(str(Name))
+        self.Volume = sys.intern(str(Volume))
+        self.Quantity = Quantity
+        self.Speed = Speed
+        self.Priority = Priority
+        self.StrictKey = StrictKey
+        self._row = _row
+        if Lines:
+            self.Lines = Lines
+        if _dur_min is not None:
+            self._dur_min = _dur_min
+        if _members is not None:
+            self._members = _members
+        self._derive()
+
+    def _derive(self):
+        self.label = sys.intern(f"{self.Name} {self.Volume}")
+        self.sku_key = _label_sku_key(self.label)
+        self.dur_min = proc_minutes(self.Quantity, self.Speed)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Job":
+        return cls(**{k: d[k] for k in JOB_FIELDS + _OPTIONAL if k in d})
+
+    def keys(self):
+        return [k for k in JOB_FIELDS + _OPTIONAL if hasattr(self, k)]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.keys()]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __getitem__(self, key):
+        if key in JOB_FIELDS or key in _OPTIONAL:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in JOB_FIELDS and key not in _OPTIONAL:
+            raise KeyError(key)
+        if key in ("Line", "Name", "Volume"):
+            value = sys.intern(str(value))
+        setattr(self, key, value)
+        if key in _DERIVED_FROM:
+            self._derive()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return (key in JOB_FIELDS or key in _OPTIONAL) and hasattr(self, key)
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return f"Job({self.JobID!r}, {self.Line!r}, {self.label!r}, prio={self.Priority})"
+
+def job_from_values(job_id, line, name, volume, quantity, speed, priority, strict_key="", lines="",
+                    row: int = 0) -> Job | None:
+    """Строка JobsTable (сырые значения клеток) -> Job; None — строка не планируется
+    (нет JobID/линии, нулевые количество или скорость)."""
+    try:
+        speed = cell_number(speed)
+        qty = cell_number(quantity)
+        priority = cell_number(priority)
+    except ValueError as e:
+        raise RuntimeError(f"JobsTable, строка {row} ({job_id}): не число в Quantity/Speed/Priority — {e}")
+    if speed <= 0 or qty <= 0:
+        return None
+    lines = parse_lines_cell(lines)
+    job = Job(
+        JobID=str(job_id or "").strip(),
+        Line=str(line or "").strip() or next(iter(lines), ""),
+        Name=str(name or "").strip(),
+        Volume=str(volume or "").strip(),
+        Quantity=qty,
+        Speed=speed,
+        Priority=int(priority),
+        StrictKey=str(strict_key or "").strip(),
+        _row=row,
+        Lines=lines,
+    )
+    return job if job.JobID and job.Line else None
+
+def jobs_from_records(records) -> list[Job]:
+    """Записи {"JobID", "Line", "Name", "Volume", "Quantity", "Speed", "Priority",
+    ["StrictKey"], ["Lines"]} (например, из JSON) -> задания; _row — номер записи с 1."""
+    jobs = []
+    for row, rec in enumerate(records, start=1):
+        job = job_from_values(rec.get("JobID"), rec.get("Line"), rec.get("Name"), rec.get("Volume"),
+                              rec.get("Quantity"), rec.get("Speed"), rec.get("Priority"),
+                              rec.get("StrictKey"), rec.get("Lines"), rec.get("_row", row))
+        if job is not None:
+            jobs.append(job)
+    return jobs
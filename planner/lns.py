@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ortools.sat.python import cp_model
+from .precedence import strict_chains
+from .hints import hint_order, hint_times
+from .heuristic import greedy_order
+
+# Большая окрестность для длинных линий: последовательность фиксирована везде,
+# кроме окна из k подряд идущих заданий, которое CP-SAT переставляет заново.
+# Окно contiguous, поэтому любая его перестановка, сохраняющая Priority и
+# StrictKey внутри окна, сохраняет их и для всей линии. Стоимость — переналадки
+# между соседями, как их считают analyze_sequence_cost и события.
+
+WINDOW_TIME_LIMIT_SEC = 2.0
+
+def sequence_setup(seq: list[int], setup: list[list[int]], lead: list[int] | None = None) -> int:
+    total = lead[seq[0]] if (lead and seq) else 0
+    for a, b in zip(seq, seq[1:]):
+        total += setup[a][b]
+    return total
+
+def _reorder_window(window, jobs, setup, prev_cost, next_cost, time_limit, num_workers):
+    # prev_cost[i] / next_cost[i] — переналадка с задания перед окном / на задание после.
+    k = len(window)
+    sub_jobs = [jobs[i] for i in window]
+    prio = [j["Priority"] for j in sub_jobs]
+    p_min, p_max = min(prio), max(prio)
+    chains = strict_chains(sub_jobs)
+    banned = set()
+    for chain in chains:
+        for pos, a in enumerate(chain):
+            for b in chain[pos + 1:]:
+                banned.add((b, a))
+
+    m = cp_model.CpModel()
+    rank = [m.NewIntVar(0, k - 1, f"r_{a}") for a in range(k)] if chains else None
+    arcs, terms = [], []
+    for a in range(k):
+        if prio[a] == p_min:
+            lit = m.NewBoolVar(f"first_{a}")
+            arcs.append((k, a, lit)); terms.append(prev_cost[a] * lit)
+            m.AddHint(lit, int(a == 0))
+            if rank:
+                m.Add(rank[a] == 0).OnlyEnforceIf(lit)
+        if prio[a] == p_max:
+            lit = m.NewBoolVar(f"last_{a}")
+            arcs.append((a, k, lit)); terms.append(next_cost[a] * lit)
+            m.AddHint(lit, int(a == k - 1))
+        for b in range(k):
+            if a == b or prio[b] < prio[a] or (a, b) in banned:
+                continue
+            lit = m.NewBoolVar(f"a_{a}_{b}")
+            arcs.append((a, b, lit))
+            c = setup[window[a]][window[b]]
+            if c:
+                terms.append(c * lit)
+            m.AddHint(lit, int(b == a + 1))
+            if rank:
+                m.Add(rank[b] == rank[a] + 1).OnlyEnforceIf(lit)
+    m.AddCircuit(arcs)
+    if rank:
+        for a in range(k):
+            m.AddHint(rank[a], a)
+        for chain in chains:
+            for a, b in zip(chain, chain[1:]):
+                m.Add(rank[a] < rank[b])
+    m.Minimize(sum(terms))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers
+    status = solver.Solve(m)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None, False
+    succ = {}
+    for a, b, lit in arcs:
+        if solver.BooleanValue(lit):
+            succ[a] = b
+    order, cur = [], succ[k]
+    while cur != k:
+        order.append(window[cur])
+        cur = succ[cur]
+    return order, status == cp_model.OPTIMAL
+
+def improve_sequence_lns(seq: list[int], jobs: list[dict], setup: list[list[int]],
+                         time_budget: float, window: int = 20, num_workers: int = 8,
+                         lead: list[int] | None = None, log_fn=None, line_name: str = "",
+                         cancel=None) -> list[int]:
+    """Anytime-улучшение допустимой последовательности seq перестановками окон.
+
+    За проход окна берутся с зазором в одно фиксированное задание, поэтому они
+    независимы и решаются параллельно (по одному потоку CP-SAT на окно).
+    Смещение окон меняется от прохода к проходу. Останов — по бюджету времени
+    или когда два прохода подряд ничего не дали при доказанной оптимальности окон;
+    cancel (объект с is_set()) прерывает поиск после текущего прохода.
+    """
+    deadline = time.perf_counter() + time_budget
+    n = len(seq)
+    seq = list(seq)
+    if n <= 1:
+        return seq
+    window = max(2, min(window, n))
+    cost = sequence_setup(seq, setup, lead)
+    start_cost = cost
+    offset, stale, passes = 0, 0, 0
+
+    with ThreadPoolExecutor(max_workers=max(1, num_workers)) as pool:
+        while time.perf_counter() < deadline and stale < 2 and not (cancel is not None and cancel.is_set()):
+            tasks = []
+            for p in range(offset, n, window + 1):
+                win = seq[p:p + window]
+                if len(win) < 2:
+                    continue
+                prev = seq[p - 1] if p > 0 else None
+                nxt = seq[p + len(win)] if p + len(win) < n else None
+                prev_cost = [setup[prev][i] if prev is not None else (lead[i] if lead else 0) for i in win]
+                next_cost = [setup[i][nxt] if nxt is not None else 0 for i in win]
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                fut = pool.submit(_reorder_window, win, jobs, setup, prev_cost, next_cost, min(left, WINDOW_TIME_LIMIT_SEC), 1)
+                tasks.append((p, win, prev_cost, next_cost, fut))
+
+            improved, all_optimal = False, bool(tasks)
+            for p, win, prev_cost, next_cost, fut in tasks:
+                new_win, optimal = fut.result()
+                all_optimal = all_optimal and optimal
+                if new_win is None:
+                    continue
+                old = prev_cost[0] + sequence_setup(win, setup) + next_cost[-1]
+                a = win.index(new_win[0]); b = win.index(new_win[-1])
+                new = prev_cost[a] + sequence_setup(new_win, setup) + next_cost[b]
+                if new < old:
+                    seq[p:p + len(win)] = new_win
+                    cost -= old - new
+                    improved = True
+            passes += 1
+            stale = 0 if (improved or not all_optimal) else stale + 1
+            offset = (offset + max(1, window // 2)) % (window + 1)
+
+    if log_fn:
+        log_fn(f"[{line_name}] LNS: окно={window}; проходов={passes}; переналадки {start_cost} -> {cost} мин")
+    return seq
+
+def solve_lns(line_name, jobs, durations, setup, sku, model, start_launch,
+              time_limit, num_workers, hint=None, lead=None, log_fn=print, window: int = 20, cancel=None):
+    # Та же сигнатура, что у _solve_sequence в optimizer: возвращает start_vals.
+    # Семантика переналадок — между соседями (как в модели circuit).
+    seq = greedy_order(jobs, setup, lead)
+    if hint is not None:
+        hint_seq = hint_order(jobs, hint)
+        if sequence_setup(hint_seq, setup, lead) < sequence_setup(seq, setup, lead):
+            seq = hint_seq
+    if log_fn:
+        log_fn(f"[{line_name}] LNS: n={len(jobs)}; бюджет={time_limit:.1f} с; "
+               f"старт={sum(durations) + sequence_setup(seq, setup, lead)} мин")
+    seq = improve_sequence_lns(seq, jobs, setup, time_limit, window, num_workers, lead, log_fn, line_name, cancel)
+    return hint_times(seq, durations, setup, all_pairs=False, lead=lead)
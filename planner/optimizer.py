@@ -1,15 +1,26 @@
 # -*- coding: utf-8 -*-
+import functools
 import math
+import threading
+import time
 from ortools.sat.python import cp_model
 from .utils import (
-    sku_key_norm, TIME_SCALE, CHANGEOVER_FALLBACK_MIN, LAUNCH_FALLBACK_MIN, fmt_job
+    sku_key_norm, TIME_SCALE, CHANGEOVER_FALLBACK_MIN, LAUNCH_FALLBACK_MIN, fmt_job, proc_minutes
 )
+from .setup_matrix import LineSetup, job_sku_key
+from .hints import hint_order, hint_times
+from .precedence import priority_tiers, strict_chains, reduced_chain_arcs, precedence_conflicts
+from .heuristic import greedy_order, solve_local
+from .lns import solve_lns
+from .trace import span as trace_span, counter
 
 def _proc_min(job: dict) -> int:
-    qty = float(job.get("Quantity", 0) or 0.0)
-    spd = float(job.get("Speed", 0) or 0.0)
-    dur = 0.0 if spd <= 0 else qty / spd * 60.0
-    return int(math.ceil(dur / TIME_SCALE))
+    if "_dur_min" in job:
+        return job["_dur_min"]
+    dur = getattr(job, "dur_min", None)
+    if dur is not None:
+        return dur
+    return proc_minutes(job.get("Quantity", 0), job.get("Speed", 0))
 
 def _step_cost_min(a: dict, b: dict, trans_for_line: dict) -> int:
     from_key = sku_key_norm(f"{a['Name']} {a['Volume']}")
@@ -26,104 +37,430 @@ def _step_cost_min(a: dict, b: dict, trans_for_line: dict) -> int:
         cost = CHANGEOVER_FALLBACK_MIN + LAUNCH_FALLBACK_MIN
     return int(math.ceil(cost / TIME_SCALE))
 
-def build_line_schedule_cp(
-    line_name: str,
-    jobs_for_line: list[dict],
-    trans_for_line: dict,
-    start_launch_min: float,
-    solver_time_limit_sec: float = 10.0,
-    log_fn = print,
-):
-    n = len(jobs_for_line)
-    if n == 0:
-        return [], {}, 0
-
-    durations = [_proc_min(j) for j in jobs_for_line]
-    idx_by_id = {j["JobID"]: i for i, j in enumerate(jobs_for_line)}
+SEQUENCE_MODELS = ("pairwise", "circuit")
+# cpsat — модель CP-SAT (model, lns_window, decompose_tiers); heuristic — локальный поиск без CP-SAT
+SOLVER_ENGINES = ("cpsat", "heuristic")
 
-    setup = [[0]*n for _ in range(n)]
-    max_setup = 0
+def _new_schedule_vars(model, durations, h):
+    n = len(durations)
+    starts = [model.NewIntVar(0, h, f"s_{i}") for i in range(n)]
+    ends   = [model.NewIntVar(0, h, f"e_{i}") for i in range(n)]
     for i in range(n):
-        for j in range(n):
-            if i == j:
-                continue
-            s = _step_cost_min(jobs_for_line[i], jobs_for_line[j], trans_for_line)
-            setup[i][j] = s
-            if s > max_setup:
-                max_setup = s
+        model.Add(ends[i] == starts[i] + durations[i])
+    return starts, ends
 
-    sum_dur = sum(durations)
-    start_launch = int(math.ceil(start_launch_min / TIME_SCALE))
-    base_horizon = sum_dur + n * max(1, max_setup) + start_launch
-    H = max(base_horizon * 2, 10_000)
+def _hint_schedule(model, starts, ends, makespan, durations, start_vals):
+    for i, s in enumerate(start_vals):
+        model.AddHint(starts[i], s)
+        model.AddHint(ends[i], s + durations[i])
+    model.AddHint(makespan, max(s + d for s, d in zip(start_vals, durations)))
 
-    def solve_with_horizon(h: int):
-        model = cp_model.CpModel()
-        starts = [model.NewIntVar(0, h, f"s_{i}") for i in range(n)]
-        ends   = [model.NewIntVar(0, h, f"e_{i}") for i in range(n)]
-        for i in range(n):
-            model.Add(ends[i] == starts[i] + durations[i])
+def _link_tiers(model, lo: list[int], hi: list[int], ends, starts, setup, sku, h, t,
+                hint_starts=None, durations=None):
+    # «Все lo раньше всех hi с переналадкой» через агрегаты по SKU:
+    # E_s >= ends[i] для i из lo со SKU s, S_u <= starts[j] для j из hi со SKU u,
+    # S_u >= E_s + setup(s, u). Это k_lo * k_hi ограничений вместо |lo| * |hi|.
+    lo_by_sku, hi_by_sku = {}, {}
+    for i in lo:
+        lo_by_sku.setdefault(sku[i], []).append(i)
+    for j in hi:
+        hi_by_sku.setdefault(sku[j], []).append(j)
+    tier_end, tier_start = {}, {}
+    for s_id, members in lo_by_sku.items():
+        v = model.NewIntVar(0, h, f"tier{t}_end_{s_id}")
+        for i in members:
+            model.Add(ends[i] <= v)
+        if hint_starts:
+            model.AddHint(v, max(hint_starts[i] + durations[i] for i in members))
+        tier_end[s_id] = (v, members[0])
+    for u_id, members in hi_by_sku.items():
+        v = model.NewIntVar(0, h, f"tier{t + 1}_start_{u_id}")
+        for j in members:
+            model.Add(v <= starts[j])
+        if hint_starts:
+            model.AddHint(v, min(hint_starts[j] for j in members))
+        tier_start[u_id] = (v, members[0])
+    for e, i in tier_end.values():
+        for st, j in tier_start.values():
+            model.Add(e + setup[i][j] <= st)
 
-        for i in range(n):
-            for j in range(i + 1, n):
+def _build_pairwise_model(jobs, durations, setup, sku, h, hint=None, lead=None):
+    n = len(jobs)
+    model = cp_model.CpModel()
+    starts, ends = _new_schedule_vars(model, durations, h)
+    pos = {i: k for k, i in enumerate(hint[0])} if hint else None
+
+    # Дизъюнкции нужны только внутри уровня приоритета: между уровнями порядок
+    # фиксирован, соседние уровни связаны через _link_tiers, дальние — транзитивно.
+    tiers = priority_tiers(jobs)
+    for t, tier in enumerate(tiers):
+        for a, i in enumerate(tier):
+            for j in tier[a + 1:]:
                 o = model.NewBoolVar(f"o_{i}_{j}")
                 model.Add(ends[i] + setup[i][j] <= starts[j]).OnlyEnforceIf(o)
                 model.Add(ends[j] + setup[j][i] <= starts[i]).OnlyEnforceIf(o.Not())
+                if pos:
+                    model.AddHint(o, int(pos[i] < pos[j]))
+        if t + 1 < len(tiers):
+            _link_tiers(model, tier, tiers[t + 1], ends, starts, setup, sku, h, t,
+                        hint[1] if hint else None, durations)
 
-        from collections import defaultdict
-        buckets = defaultdict(list)
-        for j in jobs_for_line:
-            key = str(j.get("StrictKey", "") or "").strip()
-            if key:
-                buckets[key].append(j)
-        for key, lst in buckets.items():
-            lst_sorted = sorted(lst, key=lambda x: x["_row"])
-            for a, b in zip(lst_sorted, lst_sorted[1:]):
-                ia = idx_by_id[a["JobID"]]; ib = idx_by_id[b["JobID"]]
-                model.Add(ends[ia] + setup[ia][ib] <= starts[ib])
+    for a, b in reduced_chain_arcs(jobs):
+        model.Add(ends[a] + setup[a][b] <= starts[b])
 
+    if lead:
         for i in range(n):
-            for j in range(n):
-                if jobs_for_line[i]["Priority"] < jobs_for_line[j]["Priority"]:
-                    model.Add(ends[i] + setup[i][j] <= starts[j])
+            model.Add(starts[i] >= lead[i])
+
+    makespan = model.NewIntVar(0, h, "makespan")
+    model.AddMaxEquality(makespan, ends)
+    model.Minimize(makespan)
+    if hint:
+        _hint_schedule(model, starts, ends, makespan, durations, hint[1])
+    return model, starts, ends
+
+def _build_circuit_model(jobs, durations, setup, sku, h, hint=None, lead=None):
+    # Узел n — фиктивный: дуга n -> i означает, что i идёт первым, i -> n — последним.
+    # Приоритеты задаются запретом дуг «назад по приоритету»: цепочка, перешедшая
+    # на более поздний приоритет, не может вернуться, поэтому отдельные n² ограничений
+    # предшествования не нужны. Строгие ключи — цепочки ends <= starts по _row.
+    n = len(jobs)
+    model = cp_model.CpModel()
+    starts, ends = _new_schedule_vars(model, durations, h)
+
+    prio = [jobs[i]["Priority"] for i in range(n)]
+    p_min, p_max = min(prio), max(prio)
+    chains = strict_chains(jobs)
+    banned = set()
+    for chain in chains:
+        for pos, ia in enumerate(chain):
+            for ib in chain[pos + 1:]:
+                banned.add((ib, ia))
+
+    hinted_arcs = set()
+    if hint:
+        seq = hint[0]
+        hinted_arcs = {(n, seq[0]), (seq[-1], n)} | set(zip(seq, seq[1:]))
+
+    arcs = []
+    setup_terms = []
+    for i in range(n):
+        if prio[i] == p_min:
+            first = model.NewBoolVar(f"first_{i}")
+            if lead:
+                model.Add(starts[i] >= lead[i]).OnlyEnforceIf(first)
+                if lead[i]:
+                    setup_terms.append(lead[i] * first)
+            arcs.append((n, i, first))
+        if prio[i] == p_max:
+            arcs.append((i, n, model.NewBoolVar(f"last_{i}")))
+        for j in range(n):
+            if i == j or prio[j] < prio[i] or (i, j) in banned:
+                continue
+            lit = model.NewBoolVar(f"a_{i}_{j}")
+            model.Add(ends[i] + setup[i][j] <= starts[j]).OnlyEnforceIf(lit)
+            arcs.append((i, j, lit))
+            if setup[i][j]:
+                setup_terms.append(setup[i][j] * lit)
+    model.AddCircuit(arcs)
+    if hint:
+        for i, j, lit in arcs:
+            model.AddHint(lit, int((i, j) in hinted_arcs))
+
+    for a, b in reduced_chain_arcs(jobs):
+        model.Add(ends[a] <= starts[b])
+
+    makespan = model.NewIntVar(0, h, "makespan")
+    model.AddMaxEquality(makespan, ends)
+    # Избыточное, но усиливающее LP-релаксацию: makespan не меньше суммы
+    # длительностей и переналадок на выбранных дугах.
+    model.Add(makespan >= sum(durations) + sum(setup_terms))
+    model.Minimize(makespan)
+    if hint:
+        _hint_schedule(model, starts, ends, makespan, durations, hint[1])
+    return model, starts, ends
+
+def _line_inputs(jobs_for_line: list[dict], trans_for_line: dict, costs: LineSetup | None = None):
+    if costs is None:
+        costs = LineSetup(jobs_for_line, trans_for_line)
+    durations = [_proc_min(j) for j in jobs_for_line]
+    sku = costs.sku_ids(jobs_for_line)
+    matrix = costs.cost[sku[:, None], sku[None, :]]
+    max_setup = int(matrix.max()) if matrix.size else 0
+    return durations, matrix.tolist(), sku.tolist(), max_setup
+
+class _FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self, stop_at=None, trace=None, line_name=""):
+        super().__init__()
+        self.t0 = time.perf_counter()
+        self.first = None
+        self.stop_at = stop_at
+        self.trace = trace
+        self.line_name = line_name
+
+    def on_solution_callback(self):
+        if self.first is None:
+            self.first = time.perf_counter() - self.t0
+        if self.trace is not None:
+            counter(self.trace, f"incumbent {self.line_name}",
+                    objective=self.ObjectiveValue(), bound=self.BestObjectiveBound())
+        if self.stop_at is not None and self.ObjectiveValue() <= self.stop_at:
+            self.StopSearch()
 
-        makespan = model.NewIntVar(0, h, "makespan")
-        model.AddMaxEquality(makespan, ends)
-        model.Minimize(makespan)
+def _stop_on_cancel(cancel, solver):
+    # CpSolver.StopSearch потокобезопасен: решатель завершится с лучшим найденным решением.
+    done = threading.Event()
 
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = solver_time_limit_sec
-        solver.parameters.num_search_workers = 8
-        status = solver.Solve(model)
-        return status, solver, starts, ends
+    def watch():
+        while not done.wait(0.1):
+            if cancel.is_set():
+                solver.StopSearch()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+    return done
+
+def line_lower_bound(durations, setup, sku, lead=None) -> int:
+    # Дешёвая нижняя граница makespan: сумма длительностей плюс минимальная входящая
+    # переналадка в каждый SKU (в первый SKU линии без lead входить не нужно).
+    first = {}
+    for i, s in enumerate(sku):
+        first.setdefault(s, i)
+    reps = list(first.values())
+    incoming = []
+    for u in reps:
+        cand = [setup[v][u] for v in reps if v != u]
+        if lead is not None:
+            cand.append(min(lead[j] for j in range(len(sku)) if sku[j] == sku[u]))
+        incoming.append(min(cand) if cand else 0)
+    total = sum(durations) + sum(incoming)
+    if lead is None and incoming:
+        total -= max(incoming)
+    return total
+
+def _gap(objective, bound) -> float:
+    return max(0.0, (objective - bound) / objective) if objective > 0 else 0.0
+
+_MODEL_BUILDERS = {
+    "pairwise": _build_pairwise_model,
+    "circuit":  _build_circuit_model,
+}
+
+def _solve_sequence(line_name, jobs, durations, setup, sku, model, start_launch,
+                    time_limit, num_workers, hint=None, lead=None, log_fn=print,
+                    gap_limit=0.0, lower_bound=None, info=None, trace=None, cancel=None):
+    # Возвращает start_vals (минуты от старта линии) для jobs.
+    # Горизонт — makespan лучшей допустимой последовательности (жадной или подсказки):
+    # оптимум не хуже неё, поэтому домены тугие, а повторный прогон не нужен.
+    n = len(jobs)
+    build_model = _MODEL_BUILDERS[model]
+    all_pairs = (model == "pairwise")
+    sum_dur = sum(durations)
+
+    def span(st):
+        return max(s + d for s, d in zip(st, durations))
+
+    with trace_span(trace, "optimizer.incumbent", line=line_name, n=n):
+        greedy_seq = greedy_order(jobs, setup, lead)
+        incumbents = [("greedy", greedy_seq, hint_times(greedy_seq, durations, setup, all_pairs, lead))]
+        if hint is not None:
+            hint_seq = hint_order(jobs, hint)
+            incumbents.append(("hint", hint_seq, hint_times(hint_seq, durations, setup, all_pairs, lead)))
+    src, inc_seq, inc_starts = min(incumbents, key=lambda c: span(c[2]))
+    greedy_span = span(incumbents[0][2])
+    H = span(inc_starts)
 
     if log_fn:
-        log_fn(f"[{line_name}] sum_dur={sum_dur} мин; max_setup={max_setup} мин; "
-               f"start_launch={start_launch} мин; horizon={H}")
+        log_fn(f"[{line_name}] model={model}; workers={num_workers}; n={n}; sum_dur={sum_dur} мин; "
+               f"start_launch={start_launch} мин; greedy={greedy_span} мин; "
+               + (f"hint={span(incumbents[1][2])} мин; " if len(incumbents) > 1 else "")
+               + f"horizon={H} ({src})")
 
-    status, solver, starts, ends = solve_with_horizon(H)
-    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        if log_fn: log_fn("Нет решения на H=", H, " — пробуем x10…")
-        status, solver, starts, ends = solve_with_horizon(H * 10)
+    info = {} if info is None else info
+    lb = line_lower_bound(durations, setup, sku, lead) if lower_bound is None else lower_bound
+    # Останов по зазору: решение с makespan <= stop_at уже в пределах gap_limit от lb.
+    stop_at = lb / (1.0 - gap_limit) if 0.0 < gap_limit < 1.0 else None
+    if stop_at is not None and H <= stop_at:
+        info.update(status="INCUMBENT", bound=lb, wall=0.0)
+        if log_fn:
+            log_fn(f"[{line_name}] {src}: makespan={H} мин в пределах зазора "
+                   f"{gap_limit:.1%} от нижней границы {lb} мин — CP-SAT не запускается")
+        return inc_starts
+    if cancel is not None and cancel.is_set():
+        info.update(status="CANCELLED", bound=lb, wall=0.0)
+        if log_fn:
+            log_fn(f"[{line_name}] отменено до запуска CP-SAT — план по {src}: makespan={H} мин")
+        return inc_starts
 
-    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        raise RuntimeError("CP-SAT не нашёл допустимое решение.")
+    with trace_span(trace, "optimizer.model_build", line=line_name, model=model, n=n) as sp:
+        m, starts, ends = build_model(jobs, durations, setup, sku, H, (inc_seq, inc_starts), lead)
+        if trace is not None:
+            proto = m.Proto()
+            sp.set(vars=len(proto.variables), constraints=len(proto.constraints), horizon=H)
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers
+    if stop_at is not None:
+        solver.parameters.relative_gap_limit = gap_limit
+    timer = _FirstSolutionTimer(stop_at, trace, line_name)
+    with trace_span(trace, "optimizer.cp_sat", line=line_name, time_limit=time_limit,
+                    workers=num_workers) as sp:
+        watch = _stop_on_cancel(cancel, solver) if cancel is not None else None
+        status = solver.Solve(m, timer)
+        if watch is not None:
+            watch.set()
+        sp.set(status=solver.StatusName(status), conflicts=solver.NumConflicts(),
+               branches=solver.NumBranches(), wall=solver.WallTime(),
+               first_solution=timer.first, best_bound=solver.BestObjectiveBound())
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        start_vals = [solver.Value(s) for s in starts]
+        bound = max(lb, math.ceil(solver.BestObjectiveBound() - 1e-6))
+    elif status == cp_model.UNKNOWN:
+        # Начальное решение допустимо по построению — возвращаем его, а не падаем.
+        start_vals = inc_starts
+        bound = lb
+    else:
+        raise RuntimeError(f"CP-SAT: {solver.StatusName(status)} при допустимом начальном решении ({src}).")
+    cancelled = cancel is not None and cancel.is_set()
+    info.update(status="CANCELLED" if cancelled else solver.StatusName(status), bound=bound,
+                wall=solver.WallTime())
+
+    if log_fn:
+        first = "нет" if timer.first is None else f"{timer.first:.2f} с"
+        log_fn(f"[{line_name}] статус={solver.StatusName(status)}; первое решение: {first}; "
+               f"wall={solver.WallTime():.2f} с; makespan={span(start_vals)} мин; "
+               f"greedy={greedy_span} мин; нижняя граница={bound:.0f} мин; "
+               f"зазор={_gap(span(start_vals), bound):.1%}")
+    return start_vals
+
+def _solve_by_tiers(line_name, jobs, durations, setup, sku, model, start_launch,
+                    time_limit, num_workers, hint=None, lead=None, log_fn=print, trace=None, cancel=None):
+    # Каждый уровень приоритета — отдельная задача; связь между ними только через
+    # переналадку с последнего задания предыдущего уровня (lead).
+    n = len(jobs)
+    start_vals = [0] * n
+    offset, prev = 0, None
+    for tier in priority_tiers(jobs):
+        sub_jobs = [jobs[i] for i in tier]
+        sub_setup = [[setup[a][b] for b in tier] for a in tier]
+        if prev is not None:
+            sub_lead = [setup[prev][b] for b in tier]
+        else:
+            sub_lead = [lead[b] for b in tier] if lead else None
+        budget = time_limit * len(tier) / n
+        sub_starts = _solve_sequence(f"{line_name}/P{jobs[tier[0]]['Priority']}", sub_jobs,
+                                     [durations[i] for i in tier], sub_setup, [sku[i] for i in tier],
+                                     model, start_launch, budget, num_workers, hint, sub_lead, log_fn,
+                                     trace=trace, cancel=cancel)
+        for k, i in enumerate(tier):
+            start_vals[i] = offset + sub_starts[k]
+        prev = max(tier, key=lambda i: start_vals[i] + durations[i])
+        offset = start_vals[prev] + durations[prev]
+    return start_vals
+
+def build_line_schedule_cp(
+    line_name: str,
+    jobs_for_line: list[dict],
+    trans_for_line: dict,
+    start_launch_min: float,
+    solver_time_limit_sec: float = 10.0,
+    log_fn = print,
+    model: str = "pairwise",
+    num_workers: int = 8,
+    costs: LineSetup | None = None,
+    hint=None,
+    decompose_tiers: bool = False,
+    lns_window: int = 0,
+    gap_limit: float = 0.0,
+    stats: dict | None = None,
+    trace=None,
+    cancel=None,
+    lead_job: dict | None = None,
+    engine: str = "cpsat",
+):
+    # lead_job — задание, после которого линия продолжает работу (хвост замороженного плана):
+    # время 0 — его окончание, переналадка с его SKU в первое задание берётся из карты переходов.
+    if model not in _MODEL_BUILDERS:
+        raise ValueError(f"Неизвестная модель '{model}', ожидается одна из: {', '.join(SEQUENCE_MODELS)}")
+    if engine not in SOLVER_ENGINES:
+        raise ValueError(f"Неизвестный решатель '{engine}', ожидается один из: {', '.join(SOLVER_ENGINES)}")
+
+    n = len(jobs_for_line)
+    if n == 0:
+        if stats is not None:
+            stats.update(status="EMPTY", objective=0, bound=0, gap=0.0, wall=0.0)
+        return [], {}, 0
+
+    with trace_span(trace, "optimizer.precedence", line=line_name, n=n):
+        conflicts = precedence_conflicts(jobs_for_line)
+    if conflicts:
+        pairs = ", ".join(f"{a} -> {b}" for a, b in conflicts[:10])
+        raise RuntimeError(f"[{line_name}] StrictKey противоречит Priority (цикл предшествований): {pairs}")
+
+    with trace_span(trace, "optimizer.inputs", line=line_name, n=n):
+        if lead_job is not None and (costs is None or job_sku_key(lead_job) not in costs.sku_index):
+            costs = LineSetup(list(jobs_for_line) + [lead_job], trans_for_line)
+        durations, setup, sku, max_setup = _line_inputs(jobs_for_line, trans_for_line, costs)
+        lead = None
+        if lead_job is not None:
+            lead = costs.cost[costs.sku_id(lead_job), costs.sku_ids(jobs_for_line)].tolist()
+        lb = line_lower_bound(durations, setup, sku, lead)
+    start_launch = int(math.ceil(start_launch_min / TIME_SCALE))
+
+    info = {}
+    t0 = time.perf_counter()
+    if engine == "heuristic":
+        solve = functools.partial(solve_local, cancel=cancel)
+        info["status"] = "HEURISTIC"
+    elif lns_window > 0:
+        solve = functools.partial(solve_lns, window=lns_window, cancel=cancel)
+        info["status"] = "LNS"
+    elif decompose_tiers:
+        solve = functools.partial(_solve_by_tiers, trace=trace, cancel=cancel)
+        info["status"] = "TIERS"
+    else:
+        solve = functools.partial(_solve_sequence, gap_limit=gap_limit, lower_bound=lb, info=info,
+                                  trace=trace, cancel=cancel)
+    with trace_span(trace, "optimizer.solve", line=line_name, n=n, model=model,
+                    mode=info.get("status", "CP-SAT")) as sp:
+        start_vals = solve(line_name, jobs_for_line, durations, setup, sku, model, start_launch,
+                           solver_time_limit_sec, num_workers, hint=hint, lead=lead, log_fn=log_fn)
+        times = {jobs_for_line[i]["JobID"]: (start_vals[i], start_vals[i] + durations[i]) for i in range(n)}
+        makespan = max(e for _, e in times.values())
+        sp.set(objective=makespan, lower_bound=lb)
 
-    start_vals = [solver.Value(s) for s in starts]
     order_idx  = sorted(range(n), key=lambda i: start_vals[i])
     order      = [jobs_for_line[i] for i in order_idx]
-    times      = {jobs_for_line[i]["JobID"]: (solver.Value(starts[i]), solver.Value(ends[i])) for i in range(n)}
-    makespan   = max(solver.Value(e) for e in ends)
+    if stats is not None:
+        bound = max(lb, info.get("bound", lb))
+        status = "CANCELLED" if cancel is not None and cancel.is_set() else info["status"]
+        stats.update(status=status, objective=makespan, bound=bound,
+                     gap=_gap(makespan, bound), wall=time.perf_counter() - t0)
     return order, times, makespan
 
-def analyze_sequence_cost(line_name: str, seq: list[dict], trans_for_line: dict):
+def build_line_schedule_heuristic(line_name: str, jobs_for_line: list[dict], trans_for_line: dict,
+                                  start_launch_min: float, solver_time_limit_sec: float = 1.0, **kwargs):
+    """build_line_schedule_cp с локальным поиском вместо CP-SAT: те же входы и (order, times, makespan).
+
+    solver_time_limit_sec — верхняя граница времени; поиск обычно останавливается раньше,
+    когда возмущения перестают давать улучшение.
+    """
+    return build_line_schedule_cp(line_name, jobs_for_line, trans_for_line, start_launch_min,
+                                  solver_time_limit_sec, engine="heuristic", **kwargs)
+
+def analyze_sequence_cost(line_name: str, seq: list[dict], trans_for_line: dict,
+                          costs: LineSetup | None = None):
     total = 0.0
     details = []
     if len(seq) <= 1:
         return 0.0, details
-    for i in range(len(seq) - 1):
+    if costs is None:
+        costs = LineSetup(seq, trans_for_line)
+    ids = costs.sku_ids(seq)
+    steps = costs.cost[ids[:-1], ids[1:]].tolist()
+    for i, c in enumerate(steps):
         a, b = seq[i], seq[i + 1]
-        c = _step_cost_min(a, b, trans_for_line)
         total += c
         details.append({"from": fmt_job(a), "to": fmt_job(b), "cost": float(round(c, 3))})
     return float(round(total, 3)), details
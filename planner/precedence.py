@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+
+# Порядок, который обязаны соблюдать расписания линии:
+#   * Priority: задание с меньшим значением идёт раньше любого с большим;
+#   * StrictKey: задания одного ключа идут в порядке строк JobsTable.
+# Вместо n² пар храним его сжато: уровни приоритета (tiers) и цепочки ключей,
+# из которых выброшены звенья, уже следующие из порядка уровней.
+
+def _strict_key(job: dict) -> str:
+    return str(job.get("StrictKey", "") or "").strip()
+
+def priority_tiers(jobs: list[dict]) -> list[list[int]]:
+    by_prio = defaultdict(list)
+    for i, j in enumerate(jobs):
+        by_prio[j["Priority"]].append(i)
+    return [by_prio[p] for p in sorted(by_prio)]
+
+def strict_chains(jobs: list[dict]) -> list[list[int]]:
+    buckets = defaultdict(list)
+    for i, j in enumerate(jobs):
+        key = _strict_key(j)
+        if key:
+            buckets[key].append(i)
+    return [sorted(lst, key=lambda i: jobs[i]["_row"]) for lst in buckets.values()]
+
+def reduced_chain_arcs(jobs: list[dict]) -> list[tuple[int, int]]:
+    # Звено a -> b цепочки, где Priority[a] < Priority[b], уже следует из порядка уровней.
+    arcs = []
+    for chain in strict_chains(jobs):
+        for a, b in zip(chain, chain[1:]):
+            if not jobs[a]["Priority"] < jobs[b]["Priority"]:
+                arcs.append((a, b))
+    return arcs
+
+def precedence_conflicts(jobs: list[dict]) -> list[tuple[str, str]]:
+    """Звенья StrictKey, идущие против Priority: с ними порядок содержит цикл."""
+    bad = []
+    for chain in strict_chains(jobs):
+        for a, b in zip(chain, chain[1:]):
+            if jobs[a]["Priority"] > jobs[b]["Priority"]:
+                bad.append((jobs[a]["JobID"], jobs[b]["JobID"]))
+    return bad
+
+def violated_precedences(seq: list[dict]) -> list[tuple[str, str]]:
+    """Пары (JobID раньше, JobID позже), нарушенные последовательностью seq."""
+    bad = []
+    max_prio_job = None
+    for j in seq:
+        if max_prio_job is not None and j["Priority"] < max_prio_job["Priority"]:
+            bad.append((j["JobID"], max_prio_job["JobID"]))
+        if max_prio_job is None or j["Priority"] > max_prio_job["Priority"]:
+            max_prio_job = j
+    last_by_key = {}
+    for j in seq:
+        key = _strict_key(j)
+        if not key:
+            continue
+        prev = last_by_key.get(key)
+        if prev is not None and prev["_row"] > j["_row"]:
+            bad.append((j["JobID"], prev["JobID"]))
+        if prev is None or j["_row"] > prev["_row"]:
+            last_by_key[key] = j
+    return bad
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Перепланирование по скользящему горизонту.
+
+Задания прошлого плана, которые уже начались или начнутся в пределах окна заморозки
+(now + freeze_minutes), остаются на своих местах. Переоптимизируется только хвост:
+он начинается с окончания последнего замороженного задания линии, а переналадка с его
+SKU в первое задание хвоста учитывается в модели и попадает в ленту событий.
+
+    plan = plan_rows_from_csv("plan.csv")
+    rows, line_stats, events = replan(excel, plan, dt.datetime.now(), freeze_minutes=240)
+"""
+import csv
+import datetime as dt
+from collections import defaultdict
+from .events import optimize_all
+from .export import DT_FORMAT
+from .hints import plan_hints_from_rows
+
+FREEZE_MINUTES = 480
+
+def _plan_dt(value) -> dt.datetime:
+    if isinstance(value, dt.datetime):
+        return value
+    try:
+        return dt.datetime.strptime(value, DT_FORMAT)
+    except (TypeError, ValueError):
+        raise ValueError(f"Неверная дата в плане: '{value}', ожидается {DT_FORMAT}")
+
+def plan_rows_from_csv(path: str) -> list[dict]:
+    """Строки плана из CSV выгрузки (export_plan): Start/End -> StartDT/EndDT."""
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            start, end = _plan_dt(r["Start"]), _plan_dt(r["End"])
+            rows.append(dict(r, Pos=int(float(r.get("Pos") or 0)),
+                             Start=start.strftime("%d.%m %H:%M"), End=end.strftime("%d.%m %H:%M"),
+                             StartDT=start, EndDT=end))
+    return rows
+
+def frozen_prefix(plan_rows, now: dt.datetime, freeze_minutes: float = FREEZE_MINUTES) -> dict:
+    """{линия: [строки]} — задания, начавшиеся до now + freeze_minutes, по времени начала."""
+    cutoff = now + dt.timedelta(minutes=freeze_minutes)
+    by_line = defaultdict(list)
+    for r in plan_rows:
+        by_line[r["Line"]].append(r)
+    frozen = {}
+    for line, rows in by_line.items():
+        head = [r for r in sorted(rows, key=lambda r: r["StartDT"]) if r["StartDT"] < cutoff]
+        if head:
+            frozen[line] = head
+    return frozen
+
+def replan(excel_app, plan_rows, now: dt.datetime, freeze_minutes: float = FREEZE_MINUTES, **opts):
+    """optimize_all с замороженным началом прошлого плана; остальные задания — после него.
+
+    Порядок прошлого плана служит подсказкой решателю, если hints не заданы.
+    """
+    plan_rows = list(plan_rows)
+    opts.setdefault("hints", plan_hints_from_rows(plan_rows))
+    return optimize_all(excel_app, now, frozen=frozen_prefix(plan_rows, now, freeze_minutes), **opts)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""Сценарии «что если» поверх одного чтения книги.
+
+Данные читаются один раз (read_plan_inputs), матрицы переналадок (LineSetup) строятся
+один раз на линию; сценарий меняет только то, что в нём задано, и переиспользует
+остальное. Сценарий — dict:
+
+    {"name": "Скорость -10%",
+     "start": "06.10.2025 08:00",                       # или datetime; по умолчанию — общий старт
+     "speed_factor": 0.9,                               # или {"Линия 1": 0.9}
+     "event_minutes": {"Мойка": 25},                    # минуты событий StdStops: на всех линиях
+                                                        # или {"Линия 2": {"Мойка": 25}}
+     "transition_minutes": {"Линия 1": {"Продукт 2 1.5л>>Продукт 3 1.0л": 40}},
+                                                        # точечные переходы: «Name Volume» обоих SKU
+                                                        # как в книге; SKU должны быть в карте линии
+     "exclude": ["J000123"],                            # JobID, которые не планируются
+     "exclude_lines": ["Линия 3"],                      # линии, которые не работают
+     "extra_jobs": [{"JobID": "X1", "Line": "Линия 1", "Name": "Продукт 2", "Volume": "1.5л",
+                     "Quantity": 5000, "Speed": 6000, "Priority": 2}]}
+                                                        # дополнительные задания (поля как в JSON сервиса)
+"""
+import datetime as dt
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .events import optimize_all
+from .setup_matrix import LineSetup
+from .transition_table import TransitionTable
+from .jobs import Job, jobs_from_records
+from .utils import sku_key_norm
+from .trace import span
+
+SCENARIO_KEYS = ("name", "start", "speed_factor", "event_minutes", "transition_minutes", "exclude",
+                 "exclude_lines", "extra_jobs")
+SCENARIO_COLUMNS = ("Scenario", "Line", "n_jobs", "base_idle", "opt_idle", "saved", "saved_pct",
+                    "makespan_min", "End", "idle_vs_base", "makespan_vs_base", "status")
+TOTAL_LINE = "ВСЕГО"
+START_FORMAT = "%d.%m.%Y %H:%M"
+
+def prepare_inputs(inputs: dict) -> dict:
+    """Добавляет к inputs матрицы переналадок по линиям (inputs["costs"]) для общих расчётов."""
+    by_line = {}
+    for j in inputs["jobs"]:
+        by_line.setdefault(j["Line"], []).append(j)
+    costs = {line: LineSetup(jlist, inputs["transitions"].get(line, {})) for line, jlist in by_line.items()}
+    return dict(inputs, costs=costs)
+
+def _per_line(value, line, default):
+    if isinstance(value, dict):
+        return value.get(line, default)
+    return default if value is None else value
+
+def _override_table(trans_for_line, event_minutes: dict, pair_minutes: dict):
+    if isinstance(trans_for_line, TransitionTable):
+        table = trans_for_line.copy()
+    else:
+        table = TransitionTable.from_dict(trans_for_line)
+    for event_key, mins in event_minutes.items():
+        table.set_minutes_by_note(f"Ключ: {event_key}", float(mins))
+    for pair, mins in pair_minutes.items():
+        a, sep, b = pair.partition(">>")
+        a, b = sku_key_norm(a), sku_key_norm(b)
+        unknown = [k for k in (a, b) if k not in table.index]
+        if not sep or unknown:
+            raise ValueError(f"Переход '{pair}': ожидается 'SKU>>SKU' из Карты_Переходов линии"
+                             + (f", нет SKU: {', '.join(unknown)}" if sep and unknown else ""))
+        rec = table.get(a, b)
+        table.set(a, b, float(mins), rec[1] if rec else -1.0, "Сценарий")
+    return table
+
+def check_scenario(scenario: dict):
+    unknown = [k for k in scenario if k not in SCENARIO_KEYS]
+    if unknown:
+        raise ValueError(f"Неизвестные поля сценария: {', '.join(unknown)}; ожидаются: {', '.join(SCENARIO_KEYS)}")
+
+def _extra_jobs(jobs, records) -> list:
+    # Номера строк — после последней строки книги, чтобы базовый порядок не перемешивался
+    if not records:
+        return []
+    row0 = max((j["_row"] for j in jobs), default=0)
+    extra = jobs_from_records([dict(rec, _row=row0 + k) for k, rec in enumerate(records, start=1)])
+    known = {j["JobID"] for j in jobs}
+    dup = sorted({j["JobID"] for j in extra if j["JobID"] in known})
+    if dup or len({j["JobID"] for j in extra}) < len(extra):
+        raise ValueError(f"extra_jobs: повторяющиеся JobID {', '.join(dup) or '(внутри extra_jobs)'}")
+    return extra
+
+def apply_scenario(inputs: dict, scenario: dict) -> dict:
+    """Новый inputs с изменениями сценария; неизменённые части — общие с исходным."""
+    check_scenario(scenario)
+    exclude = set(scenario.get("exclude") or ())
+    exclude_lines = set(scenario.get("exclude_lines") or ())
+    factor = scenario.get("speed_factor")
+
+    jobs = []
+    for j in inputs["jobs"] + _extra_jobs(inputs["jobs"], scenario.get("extra_jobs")):
+        if j["JobID"] in exclude or j["Line"] in exclude_lines:
+            continue
+        f = float(_per_line(factor, j["Line"], 1.0))
+        lines = j.get("Lines")
+        if f != 1.0 or (lines and factor is not None):
+            d = dict(j.items(), Speed=j["Speed"] * f)
+            if lines:
+                d["Lines"] = {l: (s or j["Speed"]) * float(_per_line(factor, l, 1.0)) for l, s in lines.items()}
+            j = Job.from_dict(d)
+        jobs.append(j)
+
+    trans = inputs["transitions"]
+    costs = dict(inputs.get("costs") or {})
+    event_minutes = scenario.get("event_minutes") or {}
+    pair_minutes = scenario.get("transition_minutes") or {}
+    if event_minutes or pair_minutes:
+        per_line_events = any(isinstance(v, dict) for v in event_minutes.values())
+        trans = dict(trans)
+        for line in list(trans):
+            ev = event_minutes.get(line, {}) if per_line_events else event_minutes
+            pairs = pair_minutes.get(line, {})
+            if ev or pairs:
+                trans[line] = _override_table(trans[line], ev, pairs)
+                costs.pop(line, None)
+    return dict(inputs, jobs=jobs, transitions=trans, costs=costs)
+
+def _scenario_start(scenario: dict, plan_start_dt: dt.datetime) -> dt.datetime:
+    start = scenario.get("start")
+    if start is None:
+        return plan_start_dt
+    return start if isinstance(start, dt.datetime) else dt.datetime.strptime(start, START_FORMAT)
+
+def _scenario_name(scenario: dict, k: int) -> str:
+    return str(scenario.get("name") or f"Сценарий {k + 1}")
+
+# Общие данные процесса-исполнителя: передаются один раз при старте пула, а не с каждым сценарием
+_SHARED = {}
+
+def _init_worker(inputs):
+    _SHARED["inputs"] = inputs
+
+def _run_one(scenario, plan_start_dt, opts, inputs=None):
+    inputs = _SHARED["inputs"] if inputs is None else inputs
+    rows, line_stats, events = optimize_all(None, _scenario_start(scenario, plan_start_dt),
+                                            inputs=apply_scenario(inputs, scenario), **opts)
+    return {"rows": rows, "line_stats": line_stats, "events": events}
+
+def run_scenarios(inputs: dict, scenarios: list[dict], plan_start_dt: dt.datetime,
+                  max_parallel: int = 1, total_workers: int | None = None, trace=None, **opts) -> list[dict]:
+    """Решает сценарии над общими inputs (read_plan_inputs или prepare_inputs).
+
+    Возвращает по сценарию {"name", "start", "rows", "line_stats", "events"} в порядке scenarios.
+    opts — параметры optimize_all (solver_time_limit_sec, batch_same_sku, lns_window, ...).
+    """
+    for sc in scenarios:
+        check_scenario(sc)
+    if "costs" not in inputs:
+        with span(trace, "scenarios.prepare", jobs=len(inputs["jobs"])):
+            inputs = prepare_inputs(inputs)
+    concurrent = max(1, min(max_parallel, len(scenarios)))
+    if total_workers is None:
+        total_workers = os.cpu_count() or 8
+    opts = dict(opts, total_workers=max(1, int(total_workers) // concurrent))
+
+    with span(trace, "scenarios.run", scenarios=len(scenarios), parallel=concurrent):
+        if concurrent > 1:
+            with ProcessPoolExecutor(max_workers=concurrent, initializer=_init_worker,
+                                     initargs=(inputs,)) as pool:
+                futures = [pool.submit(_run_one, sc, plan_start_dt, opts) for sc in scenarios]
+                results = [f.result() for f in futures]
+        else:
+            results = [_run_one(sc, plan_start_dt, dict(opts, trace=trace), inputs) for sc in scenarios]
+
+    for k, (sc, res) in enumerate(zip(scenarios, results)):
+        res["name"] = _scenario_name(sc, k)
+        res["start"] = _scenario_start(sc, plan_start_dt)
+    return results
+
+def scenario_table(results: list[dict]) -> list[dict]:
+    """Сравнение сценариев: по строке на линию и итог (TOTAL_LINE) на сценарий.
+
+    Первый сценарий — базовый: idle_vs_base и makespan_vs_base — разница opt_idle и makespan_min
+    с ним по той же линии (None — линии нет в базовом сценарии).
+    """
+    table = []
+    first = None
+    for res in results:
+        ends = {}
+        for r in res["rows"]:
+            end = r.get("EndDT")
+            if end is not None and (r["Line"] not in ends or end > ends[r["Line"]]):
+                ends[r["Line"]] = end
+        lines = []
+        for line, st in res["line_stats"].items():
+            end = ends.get(line)
+            lines.append({
+                "Scenario": res["name"],
+                "Line": line,
+                "n_jobs": st["n_jobs"],
+                "base_idle": st["base_total"],
+                "opt_idle": st["opt_total"],
+                "saved": st["saved"],
+                "saved_pct": st["saved_pct"],
+                "makespan_min": round((end - res["start"]).total_seconds() / 60.0, 1) if end else 0.0,
+                "End": end,
+                "status": st.get("status"),
+            })
+        base = sum(r["base_idle"] for r in lines)
+        saved = sum(r["saved"] for r in lines)
+        last = max(lines, key=lambda r: r["makespan_min"], default=None)
+        lines.append({
+            "Scenario": res["name"],
+            "Line": TOTAL_LINE,
+            "n_jobs": sum(r["n_jobs"] for r in lines),
+            "base_idle": round(base, 1),
+            "opt_idle": round(sum(r["opt_idle"] for r in lines), 1),
+            "saved": round(saved, 1),
+            "saved_pct": round(saved / base * 100.0, 1) if base > 0 else 0.0,
+            "makespan_min": last["makespan_min"] if last else 0.0,
+            "End": last["End"] if last else None,
+            "status": "",
+        })
+        if first is None:
+            first = {r["Line"]: r for r in lines}
+        for r in lines:
+            ref = first.get(r["Line"])
+            r["idle_vs_base"] = round(r["opt_idle"] - ref["opt_idle"], 1) if ref else None
+            r["makespan_vs_base"] = round(r["makespan_min"] - ref["makespan_min"], 1) if ref else None
+        table.extend(lines)
+    return table
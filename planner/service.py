@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""Локальный сервис планирования (HTTP/JSON) без Excel.
+
+Сервис держит пул «тёплых» процессов-решателей с уже импортированным OR-Tools и разобранными
+наборами данных (задания, карты переходов, матрицы переналадок). Набор передаётся процессам
+один раз: при загрузке он сохраняется во временный файл, процесс читает его при первом запросе
+к этой версии и держит в памяти; с запросом уходит только имя и версия. Запросы ставятся в очередь пула и решаются одновременно
+не более чем по числу процессов.
+
+    python -m planner.service --port 8765 --workers 2
+
+POST /datasets/<имя>   {"jobs": [...], "transitions": {...}, "stdstops": {...}} — загрузить набор
+POST /plan             {"start": "29.09.2025 08:00", "dataset": "<имя>" или данные как выше,
+                        "options": {...}, "events": true, "wait": true}
+GET  /plan/<id>        статус и результат
+DELETE /plan/<id>      снять запрос из очереди (уже идущий не прерывается)
+GET  /health           очередь и число процессов
+
+Данные запроса:
+    jobs        — записи JobsTable: JobID, Line, Name, Volume, Quantity, Speed, Priority, [StrictKey], [Lines];
+    stdstops    — {"Линия 1": {"Мойка": "15;10", "Запуск линии": 30}} — колонки StdStops;
+    transitions — {"Линия 1": {"ИЗ>>В": "Мойка"}} — клетки Карты_Переходов (ключ события StdStops).
+"""
+import argparse
+import datetime as dt
+import itertools
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .events import optimize_all
+from .jobs import jobs_from_records
+from .transitions import stdstops_from_dict, transitions_from_pairs
+from .scenarios import prepare_inputs
+from .export import plan_records, event_records, PLAN_COLUMNS, EVENT_COLUMNS
+
+DEFAULT_PORT = 8765
+MAX_DATASETS = 16
+MAX_RESULTS = 256
+START_FORMAT = "%d.%m.%Y %H:%M"
+
+# Параметры optimize_all, которые можно передать в "options".
+# max_parallel_lines нет: процесс пула не может запускать свой пул процессов.
+PLAN_OPTIONS = ("batch_same_sku", "model", "solver_time_limit_sec", "decompose_tiers", "lns_window",
+                "time_budget_sec", "gap_limit", "total_workers", "assign_lines", "hints", "engine")
+
+def _check_shape(payload: dict):
+    # Форма JSON проверяется заранее: иначе список вместо объекта даёт AttributeError/TypeError в разборе
+    if not isinstance(payload, dict):
+        raise ValueError("Данные должны быть JSON-объектом")
+    for key in ("jobs", "transitions"):
+        if key not in payload:
+            raise ValueError(f"Нет поля '{key}'")
+    if not isinstance(payload["jobs"], list) or not all(isinstance(r, dict) for r in payload["jobs"]):
+        raise ValueError("Поле 'jobs' должно быть списком объектов")
+    for key in ("transitions", "stdstops"):
+        value = payload.get(key) or {}
+        if not isinstance(value, dict) or not all(isinstance(v, dict) for v in value.values()):
+            raise ValueError(f"Поле '{key}' должно быть объектом {{линия: {{...}}}}")
+
+def inputs_from_payload(payload: dict) -> dict:
+    """JSON-данные (jobs, stdstops, transitions) -> inputs для optimize_all, с матрицами переналадок."""
+    _check_shape(payload)
+    std = stdstops_from_dict(payload.get("stdstops") or {})
+    tdata = transitions_from_pairs(std, payload["transitions"])
+    inputs = {"jobs": jobs_from_records(payload["jobs"]), "transitions": tdata["transitions"],
+              "start_launch": tdata["start_launch"]}
+    return prepare_inputs(inputs)
+
+def parse_start(value) -> dt.datetime:
+    try:
+        return dt.datetime.strptime(value, START_FORMAT)
+    except (TypeError, ValueError):
+        try:
+            return dt.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Неверный start '{value}': ожидается \"ДД.ММ.ГГГГ ЧЧ:ММ\" или ISO 8601")
+
+def _json_value(v):
+    return v.isoformat() if isinstance(v, dt.datetime) else v
+
+def _warm():
+    # Импорт OR-Tools и первая модель — один раз на процесс, а не на запрос
+    from ortools.sat.python import cp_model
+    model = cp_model.CpModel()
+    x = model.NewIntVar(0, 1, "x")
+    model.Maximize(x)
+    cp_model.CpSolver().Solve(model)
+
+# Наборы данных процесса-решателя: {(имя, версия): inputs}, не больше MAX_DATASETS
+_WORKER_DATASETS = OrderedDict()
+
+def _worker_inputs(dataset) -> dict:
+    # dataset — сами inputs (данные в запросе) или (имя, версия, файл) загруженного набора
+    if isinstance(dataset, dict):
+        return dataset
+    name, version, path = dataset
+    key = (name, version)
+    inputs = _WORKER_DATASETS.get(key)
+    if inputs is None:
+        with open(path, "rb") as f:
+            inputs = pickle.load(f)
+        # прежние версии набора этому процессу больше не нужны
+        for old in [k for k in _WORKER_DATASETS if k[0] == name]:
+            del _WORKER_DATASETS[old]
+        _WORKER_DATASETS[key] = inputs
+        while len(_WORKER_DATASETS) > MAX_DATASETS:
+            _WORKER_DATASETS.popitem(last=False)
+    _WORKER_DATASETS.move_to_end(key)
+    return inputs
+
+def _run_plan(dataset, start: dt.datetime, options: dict, with_events: bool) -> dict:
+    t0 = time.perf_counter()
+    inputs = _worker_inputs(dataset)
+    rows, line_stats, events = optimize_all(None, start, inputs=inputs, log_fn=None, **options)
+    result = {
+        "rows": [dict(zip(PLAN_COLUMNS, map(_json_value, rec))) for rec in plan_records(rows)],
+        "line_stats": {line: {k: v for k, v in st.items() if k not in ("base_details", "opt_details")}
+                       for line, st in line_stats.items()},
+        "solve_sec": round(time.perf_counter() - t0, 3),
+    }
+    if with_events:
+        result["events"] = [dict(zip(EVENT_COLUMNS, map(_json_value, rec))) for rec in event_records(events)]
+    return result
+
+class PlanService:
+    """Наборы данных в памяти + пул процессов-решателей. Потокобезопасен."""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max_workers
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_warm)
+        self.datasets = OrderedDict()
+        self.results = OrderedDict()
+        self._ids = itertools.count(1)
+        self._versions = itertools.count(1)
+        self._dir = tempfile.mkdtemp(prefix="planner-datasets-")
+        # файлы версий, взятые запросами, которые ещё не попали в self.results
+        self._pinned = Counter()
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def put_dataset(self, name: str, payload: dict) -> dict:
+        inputs = inputs_from_payload(payload)
+        version = next(self._versions)
+        path = os.path.join(self._dir, f"{version}.pkl")
+        with open(path, "wb") as f:
+            pickle.dump(inputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.datasets[name] = {"ref": (name, version, path)}
+            self.datasets.move_to_end(name)
+            while len(self.datasets) > MAX_DATASETS:
+                self.datasets.popitem(last=False)
+            self._drop_files()
+        return {"dataset": name, "version": version, "jobs": len(inputs["jobs"]),
+                "lines": sorted(inputs["transitions"])}
+
+    def _drop_files(self):
+        # Файл версии нужен, пока она текущая или её ждёт запрос в очереди (под self._lock)
+        keep = {d["ref"][2] for d in self.datasets.values()} | set(self._pinned)
+        keep.update(e["dataset"][2] for e in self.results.values()
+                    if not e["future"].done() and not isinstance(e["dataset"], dict))
+        for fn in os.listdir(self._dir):
+            path = os.path.join(self._dir, fn)
+            if path not in keep:
+                os.remove(path)
+
+    def _pin(self, name: str):
+        # Под self._lock: ссылка на текущую версию набора; её файл не удаляется до _unpin
+        entry = self.datasets.get(name)
+        if entry is None:
+            raise KeyError(f"Набор данных '{name}' не загружен")
+        self._pinned[entry["ref"][2]] += 1
+        return entry["ref"]
+
+    def _unpin(self, ref):
+        with self._lock:
+            self._pinned[ref[2]] -= 1
+            if self._pinned[ref[2]] <= 0:
+                del self._pinned[ref[2]]
+            self._drop_files()
+
+    def submit(self, payload: dict) -> str:
+        if not isinstance(payload, dict):
+            raise ValueError("Тело запроса должно быть JSON-объектом")
+        start = parse_start(payload.get("start"))
+        options = payload.get("options") or {}
+        if not isinstance(options, dict):
+            raise ValueError("Поле 'options' должно быть JSON-объектом")
+        bad = [k for k in options if k not in PLAN_OPTIONS]
+        if bad:
+            raise ValueError(f"Неизвестные параметры: {', '.join(bad)}; допустимы: {', '.join(PLAN_OPTIONS)}")
+        # потоки CP-SAT по умолчанию делятся между одновременными запросами
+        options = dict({"total_workers": max(1, (os.cpu_count() or 8) // self.max_workers)}, **options)
+        name = payload.get("dataset")
+        if name is not None and not isinstance(name, str):
+            raise ValueError("Поле 'dataset' должно быть строкой")
+        dataset = inputs_from_payload(payload) if name is None else None
+        with self._lock:
+            if name is not None:
+                dataset = self._pin(name)
+            plan_id = str(next(self._ids))
+        try:
+            fut = self.pool.submit(_run_plan, dataset, start, options, bool(payload.get("events", False)))
+            with self._lock:
+                self.results[plan_id] = {"future": fut, "dataset": dataset, "submitted": time.time()}
+                # вытесняются только завершённые запросы: файлы ожидающих видит _drop_files
+                while len(self.results) > MAX_RESULTS:
+                    old = next((k for k, e in self.results.items() if e["future"].done()), None)
+                    if old is None:
+                        break
+                    del self.results[old]
+        finally:
+            if name is not None:
+                self._unpin(dataset)
+        return plan_id
+
+    def status(self, plan_id: str, wait: bool = False) -> dict:
+        with self._lock:
+            entry = self.results.get(plan_id)
+        if entry is None:
+            raise KeyError(f"Запрос '{plan_id}' не найден")
+        fut = entry["future"]
+        if wait:
+            try:
+                fut.result()
+            except Exception:
+                pass
+        out = {"id": plan_id}
+        if fut.cancelled():
+            out["status"] = "cancelled"
+        elif not fut.done():
+            out["status"] = "running" if fut.running() else "queued"
+        elif fut.exception() is not None:
+            out["status"] = "error"
+            out["error"] = str(fut.exception())
+        else:
+            out["status"] = "done"
+            out.update(fut.result())
+        return out
+
+    def cancel(self, plan_id: str) -> dict:
+        with self._lock:
+            entry = self.results.get(plan_id)
+        if entry is None:
+            raise KeyError(f"Запрос '{plan_id}' не найден")
+        entry["future"].cancel()
+        return self.status(plan_id)
+
+    def health(self) -> dict:
+        with self._lock:
+            futures = [e["future"] for e in self.results.values()]
+            n_datasets = len(self.datasets)
+        return {"status": "ok", "workers": self.max_workers, "datasets": n_datasets,
+                "running": sum(f.running() for f in futures),
+                "queued": sum(not f.done() and not f.running() for f in futures)}
+
+def make_handler(service: PlanService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, obj):
+            body = json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> dict:
+            n = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(n).decode("utf-8")) if n else {}
+            if not isinstance(body, dict):
+                raise ValueError("Тело запроса должно быть JSON-объектом")
+            return body
+
+        def _route(self, method):
+            parts = [p for p in self.path.split("?")[0].split("/") if p]
+            try:
+                if method == "GET" and parts == ["health"]:
+                    return self._send(200, service.health())
+                if method == "POST" and len(parts) == 2 and parts[0] == "datasets":
+                    return self._send(200, service.put_dataset(parts[1], self._body()))
+                if method == "POST" and parts == ["plan"]:
+                    payload = self._body()
+                    plan_id = service.submit(payload)
+                    if payload.get("wait", True):
+                        return self._send(200, service.status(plan_id, wait=True))
+                    return self._send(202, service.status(plan_id))
+                if method == "GET" and len(parts) == 2 and parts[0] == "plan":
+                    return self._send(200, service.status(parts[1]))
+                if method == "DELETE" and len(parts) == 2 and parts[0] == "plan":
+                    return self._send(200, service.cancel(parts[1]))
+                return self._send(404, {"error": f"Нет пути {method} {self.path}"})
+            except KeyError as e:
+                return self._send(404, {"error": e.args[0] if e.args else str(e)})
+            except (ValueError, RuntimeError) as e:
+                return self._send(400, {"error": str(e)})
+            except Exception as e:
+                return self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+        def do_DELETE(self):
+            self._route("DELETE")
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_workers: int = 2):
+    service = PlanService(max_workers)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    print(f"Сервис планирования: http://{host}:{server.server_address[1]} (процессов: {max_workers})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+def request_json(url: str, payload: dict | None = None, method: str | None = None, timeout: float = 600.0) -> dict:
+    """Клиент: JSON-запрос к сервису; ответ с ошибкой HTTP тоже возвращается как dict."""
+    data = None if payload is None else json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    req = urllib.request.Request(url, data=data, method=method or ("GET" if data is None else "POST"),
+                                 headers={"Content-Type": "application/json; charset=utf-8"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read().decode("utf-8"))
+
+def main():
+    ap = argparse.ArgumentParser(description="Локальный сервис планирования (HTTP/JSON)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--workers", type=int, default=2, help="Сколько запросов решать одновременно")
+    args = ap.parse_args()
+    serve(args.host, args.port, args.workers)
+
+if __name__ == "__main__":
+    main()
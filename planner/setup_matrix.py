@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import math
+import numpy as np
+from .utils import sku_key_norm, TIME_SCALE, CHANGEOVER_FALLBACK_MIN, LAUNCH_FALLBACK_MIN
+from .transition_table import TransitionTable
+
+def job_sku_key(job: dict) -> str:
+    key = getattr(job, "sku_key", None)
+    return key if key is not None else sku_key_norm(f"{job['Name']} {job['Volume']}")
+
+class LineSetup:
+    """Переналадки линии над целочисленными id SKU.
+
+    cost[a, b]      — минуты перехода для оптимизатора (как _step_cost_min);
+    event_min[a, b] — длительность события «Переход» (0 — событие не создаётся).
+    """
+    __slots__ = ("sku_keys", "sku_index", "job_sku", "cost", "event_min", "_trans")
+
+    def __init__(self, jobs_for_line: list[dict], trans_for_line: dict):
+        self._trans = trans_for_line
+        self.sku_index = {}
+        self.job_sku = {}
+        for j in jobs_for_line:
+            key = job_sku_key(j)
+            self.job_sku[j["JobID"]] = self.sku_index.setdefault(key, len(self.sku_index))
+        self.sku_keys = list(self.sku_index)
+
+        k = len(self.sku_keys)
+        default = math.ceil((CHANGEOVER_FALLBACK_MIN + LAUNCH_FALLBACK_MIN) / TIME_SCALE)
+        self.cost = np.full((k, k), default, dtype=np.int64)
+        self.event_min = np.zeros((k, k), dtype=np.float64)
+        if isinstance(trans_for_line, TransitionTable):
+            self._fill_from_table(trans_for_line)
+            self._same_sku_free()
+            return
+        for a, from_key in enumerate(self.sku_keys):
+            for b, to_key in enumerate(self.sku_keys):
+                rec = trans_for_line.get(f"{from_key}>>{to_key}")
+                if not rec:
+                    continue
+                setup, next_launch, _ = rec
+                if setup <= 0.5:
+                    self.cost[a, b] = 0
+                    continue
+                total = setup + (next_launch if next_launch >= 0 else LAUNCH_FALLBACK_MIN)
+                self.cost[a, b] = math.ceil(total / TIME_SCALE)
+                self.event_min[a, b] = total
+        self._same_sku_free()
+
+    def _same_sku_free(self):
+        # Тот же SKU подряд — без переналадки: ни в модели, ни в ленте событий
+        np.fill_diagonal(self.cost, 0)
+        np.fill_diagonal(self.event_min, 0.0)
+
+    def _fill_from_table(self, table: TransitionTable):
+        # Все пары SKU линии разом: номера в таблице переходов, -1 — SKU нет в карте
+        pos = np.fromiter((table.index.get(key, -1) for key in self.sku_keys), dtype=np.int64,
+                          count=len(self.sku_keys))
+        known = np.flatnonzero(pos >= 0)
+        if not known.size:
+            return
+        ix = np.ix_(known, known)
+        sub = np.ix_(pos[known], pos[known])
+        setup = np.round(table.setup[sub].astype(np.float64), 4)
+        next_launch = np.round(table.next_launch[sub].astype(np.float64), 4)
+        present = table.note_id[sub] >= 0
+        free = present & (setup <= 0.5)
+        paid = present & ~free
+        total = setup + np.where(next_launch >= 0, next_launch, LAUNCH_FALLBACK_MIN)
+        cost = self.cost[ix]
+        event_min = self.event_min[ix]
+        cost[free] = 0
+        cost[paid] = np.ceil(total[paid] / TIME_SCALE).astype(np.int64)
+        event_min[paid] = total[paid]
+        self.cost[ix] = cost
+        self.event_min[ix] = event_min
+
+    def sku_id(self, job: dict) -> int:
+        sid = self.job_sku.get(job["JobID"])
+        if sid is None:
+            members = job.get("_members")
+            sid = self.sku_id(members[0]) if members else self.sku_index[job_sku_key(job)]
+        return sid
+
+    def sku_ids(self, jobs: list[dict]) -> np.ndarray:
+        return np.fromiter((self.sku_id(j) for j in jobs), dtype=np.int64, count=len(jobs))
+
+    def job_matrix(self, jobs: list[dict]) -> np.ndarray:
+        ids = self.sku_ids(jobs)
+        return self.cost[ids[:, None], ids[None, :]]
+
+    def note(self, a: int, b: int) -> str:
+        rec = self._trans.get(f"{self.sku_keys[a]}>>{self.sku_keys[b]}")
+        return rec[2] if rec else ""
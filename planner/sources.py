@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""Источники данных книги для читателей JobsTable, StdStops и Карты_Переходов.
+
+Читателю нужны две операции:
+    table(sheet, name) -> (заголовок, строки) или None, если таблицы нет или она пуста;
+    used_rows(sheet)   -> строки используемого диапазона листа (как UsedRange.Value).
+Строки отдаются итератором кортежей; отсутствующий лист — KeyError.
+
+ComWorkbook  — живая книга Excel (pywin32), по одному вызову Range.Value на таблицу;
+XlsxWorkbook — файл .xlsx/.xlsm без Excel и без сторонних пакетов: XML листов читается
+               потоком, диапазоны таблиц — из их определений внутри файла (xl/tables/*.xml);
+CsvWorkbook  — каталог CSV: <таблица>.csv (JobsTable.csv, StdStops.csv) и <лист>.csv
+               (Карта_Переходов.csv — сетка листа без заголовка).
+"""
+import csv
+import os
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from .utils import as_rows
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+class ComWorkbook:
+    def __init__(self, excel_app):
+        self.wb = excel_app.ActiveWorkbook
+        if self.wb is None:
+            raise RuntimeError("Нет активной книги Excel.")
+
+    def _sheet(self, sheet):
+        try:
+            return self.wb.Worksheets(sheet)
+        except Exception:
+            raise KeyError(sheet)
+
+    def table(self, sheet, name):
+        ws = self._sheet(sheet)
+        lo = None
+        for L in ws.ListObjects:
+            if str(L.Name).lower() == name.lower():
+                lo = L
+                break
+        body_range = lo.DataBodyRange if lo is not None else None
+        if body_range is None:
+            return None
+        header_rows = as_rows(lo.HeaderRowRange.Value)
+        return list(header_rows[0] if header_rows else ()), as_rows(body_range.Value)
+
+    def used_rows(self, sheet):
+        return as_rows(self._sheet(sheet).UsedRange.Value)
+
+_CELL_REF = re.compile(r"\$?([A-Z]+)\$?(\d+)")
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+def _ref_bounds(ref: str):
+    """"B3:H20" -> (min_col, min_row, max_col, max_row)."""
+    first, _, last = ref.upper().partition(":")
+    c1, r1 = _CELL_REF.match(first).groups()
+    c2, r2 = _CELL_REF.match(last or first).groups()
+    return _col_index(c1), int(r1), _col_index(c2), int(r2)
+
+class XlsxWorkbook:
+    """Файл .xlsx/.xlsm без Excel: XML листов читается потоком (iterparse), разобранные
+    строки сразу освобождаются. Значения — как у COM: числа float, пустые клетки None."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with zipfile.ZipFile(path) as z:
+            self._parts, self._tables = self._sheet_parts(z)
+            self._strings = self._shared_strings(z)
+
+    @staticmethod
+    def _sheet_parts(z):
+        # {лист: часть архива}, {лист: {имя таблицы (нижний регистр): (ref, строк заголовка, строк итогов)}}
+        names = set(z.namelist())
+
+        def rels(part):
+            rel_part = posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+            if rel_part not in names:
+                return {}
+            out = {}
+            for rel in ET.fromstring(z.read(rel_part)).iter(_NS_PKG + "Relationship"):
+                target = rel.get("Target")
+                target = target.lstrip("/") if target.startswith("/") else \
+                    posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+                out[rel.get("Id")] = (rel.get("Type", ""), target)
+            return out
+
+        parts, tables = {}, {}
+        wb_rels = rels("xl/workbook.xml")
+        for sheet in ET.fromstring(z.read("xl/workbook.xml")).iter(_NS_MAIN + "sheet"):
+            sheet_part = wb_rels.get(sheet.get(_NS_REL + "id"), ("", ""))[1]
+            if sheet_part not in names:
+                continue
+            parts[sheet.get("name")] = sheet_part
+            by_name = tables.setdefault(sheet.get("name"), {})
+            for rel_type, target in rels(sheet_part).values():
+                if not rel_type.endswith("/table") or target not in names:
+                    continue
+                t = ET.fromstring(z.read(target))
+                entry = (t.get("ref"), int(t.get("headerRowCount", "1")), int(t.get("totalsRowCount", "0")))
+                for key in (t.get("displayName"), t.get("name")):
+                    if key:
+                        by_name[key.lower()] = entry
+        return parts, tables
+
+    @staticmethod
+    def _shared_strings(z):
+        if "xl/sharedStrings.xml" not in z.namelist():
+            return []
+        strings = []
+        with z.open("xl/sharedStrings.xml") as f:
+            for _, el in ET.iterparse(f):
+                if el.tag != _NS_MAIN + "si":
+                    continue
+                t = el.find(_NS_MAIN + "t")
+                if t is not None:
+                    strings.append(t.text or "")
+                else:
+                    strings.append("".join(r.findtext(_NS_MAIN + "t") or "" for r in el.findall(_NS_MAIN + "r")))
+                el.clear()
+        return strings
+
+    def _part(self, sheet):
+        if sheet not in self._parts:
+            raise KeyError(sheet)
+        return self._parts[sheet]
+
+    def _cell_value(self, c):
+        t = c.get("t", "n")
+        if t == "inlineStr":
+            return "".join(x.text or "" for x in c.iter(_NS_MAIN + "t"))
+        v = c.findtext(_NS_MAIN + "v")
+        if v is None or t == "e":
+            return None
+        if t == "n":
+            return float(v)
+        if t == "s":
+            return self._strings[int(v)]
+        if t == "b":
+            return v == "1"
+        return v
+
+    def _dimension(self, part):
+        with zipfile.ZipFile(self.path) as z, z.open(part) as f:
+            for _, el in ET.iterparse(f, events=("start",)):
+                if el.tag == _NS_MAIN + "dimension":
+                    return el.get("ref")
+                if el.tag == _NS_MAIN + "sheetData":
+                    return None
+        return None
+
+    def _sheet_rows(self, part):
+        """(номер строки, {столбец: значение}) по непустым строкам листа."""
+        row_tag, cell_tag = _NS_MAIN + "row", _NS_MAIN + "c"
+        with zipfile.ZipFile(self.path) as z, z.open(part) as f:
+            sheet_data = None
+            row_no = 0
+            for event, el in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if el.tag == _NS_MAIN + "sheetData":
+                        sheet_data = el
+                    continue
+                if el.tag != row_tag:
+                    continue
+                row_no = int(el.get("r") or row_no + 1)
+                cells = {}
+                col = 0
+                for c in el.iter(cell_tag):
+                    ref = c.get("r")
+                    col = _col_index(_CELL_REF.match(ref).group(1)) if ref else col + 1
+                    v = self._cell_value(c)
+                    if v is not None:
+                        cells[col] = v
+                yield row_no, cells
+                # разобранная строка больше не нужна: держим в памяти только текущую
+                sheet_data.clear()
+
+    def _rows(self, part, min_row, max_row, min_col, max_col):
+        # Прямоугольник листа кортежами; пропущенные строки и клетки — None, как в Range.Value
+        width = None if max_col is None else max_col - min_col + 1
+        expect = min_row
+        for row_no, cells in self._sheet_rows(part):
+            if row_no < min_row:
+                continue
+            if max_row is not None and row_no > max_row:
+                break
+            while expect < row_no:
+                yield (None,) * (width or 0)
+                expect += 1
+            n = width if width is not None else (max(cells) - min_col + 1 if cells else 0)
+            yield tuple(cells.get(min_col + k) for k in range(n))
+            expect = row_no + 1
+        while max_row is not None and expect <= max_row:
+            yield (None,) * (width or 0)
+            expect += 1
+
+    def table(self, sheet, name):
+        part = self._part(sheet)
+        entry = self._tables.get(sheet, {}).get(name.lower())
+        if entry is None:
+            return None
+        ref, n_header, n_totals = entry
+        min_col, min_row, max_col, max_row = _ref_bounds(ref)
+        first = min_row + (1 if n_header else 0)
+        last = max_row - n_totals
+        if last < first:
+            return None
+        rows = self._rows(part, min_row if n_header else first, last, min_col, max_col)
+        header = next(rows) if n_header else ()
+        return list(header), rows
+
+    def used_rows(self, sheet):
+        part = self._part(sheet)
+        ref = self._dimension(part)
+        if ref:
+            min_col, min_row, max_col, max_row = _ref_bounds(ref)
+        else:
+            # без <dimension> (так пишут некоторые генераторы) — от A1 до последней клетки
+            min_col = min_row = 1
+            max_col = max_row = None
+        return self._rows(part, min_row, max_row, min_col, max_col)
+
+def _csv_value(v):
+    return None if v == "" else v
+
+class CsvWorkbook:
+    def __init__(self, directory: str, encoding: str = "utf-8-sig"):
+        if not os.path.isdir(directory):
+            raise RuntimeError(f"Каталог '{directory}' не найден.")
+        self.directory = directory
+        self.encoding = encoding
+        self._files = {os.path.splitext(f)[0].lower(): os.path.join(directory, f)
+                       for f in os.listdir(directory) if f.lower().endswith(".csv")}
+
+    def _read(self, path):
+        with open(path, newline="", encoding=self.encoding) as f:
+            sample = f.readline()
+            f.seek(0)
+            delim = max((";", ",", "\t"), key=sample.count)
+            for row in csv.reader(f, delimiter=delim):
+                yield tuple(_csv_value(v) for v in row)
+
+    def table(self, sheet, name):
+        path = self._files.get(name.lower())
+        if path is None:
+            if sheet.lower() not in self._files:
+                raise KeyError(sheet)
+            return None
+        rows = self._read(path)
+        header = next(rows, None)
+        if header is None:
+            return None
+        first = next(rows, None)
+        if first is None:
+            return None
+        return list(header), _chain(first, rows)
+
+    def used_rows(self, sheet):
+        path = self._files.get(sheet.lower())
+        if path is None:
+            raise KeyError(sheet)
+        return self._read(path)
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+def open_workbook(path: str):
+    """Файловый источник по пути: каталог — CsvWorkbook, .xlsx/.xlsm — XlsxWorkbook."""
+    if os.path.isdir(path):
+        return CsvWorkbook(path)
+    if re.search(r"\.xls[xm]$", path, re.IGNORECASE):
+        if not os.path.exists(path):
+            raise RuntimeError(f"Файл '{path}' не найден.")
+        return XlsxWorkbook(path)
+    raise RuntimeError(f"Неизвестный формат '{path}': ожидается .xlsx/.xlsm или каталог с CSV.")
+
+def as_workbook(obj):
+    """Источник из объекта Excel.Application (COM) или готового источника."""
+    if hasattr(obj, "table") and hasattr(obj, "used_rows"):
+        return obj
+    return ComWorkbook(obj)
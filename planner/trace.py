@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Инструментирование: span-ы и события для приёмника (sink).
+
+Приёмник — любой callable(event: dict). Событие уже в формате Chrome trace
+(name, ph, ts/dur в микросекундах, pid, tid, args). Если приёмник не задан (None),
+span() возвращает общий пустой контекст и ничего не измеряет.
+
+    rec = TraceRecorder()
+    optimize_all(excel, start, trace=rec)
+    rec.save_chrome_trace("plan.trace.json")   # chrome://tracing, ui.perfetto.dev
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+def _now_us() -> float:
+    # perf_counter общий для процессов одной машины — события из пула процессов сопоставимы
+    return time.perf_counter() * 1e6
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("sink", "name", "args", "t0")
+
+    def __init__(self, sink, name, args):
+        self.sink = sink
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.sink({"name": self.name, "ph": "X", "ts": self.t0, "dur": _now_us() - self.t0,
+                   "pid": os.getpid(), "tid": threading.get_ident(), "args": self.args})
+        return False
+
+    def set(self, **fields):
+        self.args.update(fields)
+
+def span(sink, name: str, **fields):
+    if sink is None:
+        return _NULL_SPAN
+    return _Span(sink, name, fields)
+
+def emit(sink, name: str, **fields):
+    # Мгновенное событие (ph="i").
+    if sink is not None:
+        sink({"name": name, "ph": "i", "s": "t", "ts": _now_us(),
+              "pid": os.getpid(), "tid": threading.get_ident(), "args": fields})
+
+def counter(sink, name: str, **values):
+    # Счётчик (ph="C"): Chrome рисует его графиком — так виден ход incumbent-а.
+    if sink is not None:
+        sink({"name": name, "ph": "C", "ts": _now_us(),
+              "pid": os.getpid(), "tid": threading.get_ident(), "args": values})
+
+class TraceRecorder:
+    """Приёмник, который копит события в памяти; потокобезопасен."""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: dict):
+        with self._lock:
+            self.events.append(event)
+
+    def extend(self, events):
+        with self._lock:
+            self.events.extend(events)
+
+    def summary(self) -> dict:
+        # Суммарное время по именам span-ов, мс.
+        out = defaultdict(lambda: {"count": 0, "total_ms": 0.0})
+        for ev in self.events:
+            if ev["ph"] == "X":
+                st = out[ev["name"]]
+                st["count"] += 1
+                st["total_ms"] += ev["dur"] / 1000.0
+        return {name: {"count": st["count"], "total_ms": round(st["total_ms"], 3)} for name, st in out.items()}
+
+    def to_json(self) -> dict:
+        return {"summary": self.summary(), "events": list(self.events)}
+
+    def save_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, indent=1)
+
+    def save_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+class TransitionTable:
+    """Карта переходов одной линии в плотных массивах.
+
+    keys/index — интернированные ключи SKU (sku_key_norm) и их номера;
+    setup/next_launch — float32 k×k, NaN там, где переход не задан;
+    note_id — int32 k×k, номер примечания в notes (-1 — нет перехода);
+    notes хранятся по одному разу на различное примечание (ключ StdStops).
+
+    get(from_key, to_key) и get("FROM>>TO") возвращают тот же кортеж
+    (mins, next_launch, note), что раньше лежал в dict, поэтому старые
+    вызовы работают без изменений.
+    """
+    __slots__ = ("keys", "index", "setup", "next_launch", "note_id", "notes", "_note_index")
+
+    def __init__(self, keys=()):
+        self.keys = []
+        self.index = {}
+        self.notes = []
+        self._note_index = {}
+        for key in keys:
+            self.key_id(key)
+        k = len(self.keys)
+        self.setup = np.full((k, k), np.nan, dtype=np.float32)
+        self.next_launch = np.full((k, k), np.nan, dtype=np.float32)
+        self.note_id = np.full((k, k), -1, dtype=np.int32)
+
+    @classmethod
+    def from_dict(cls, trans_for_line: dict) -> "TransitionTable":
+        pairs = [(pair.split(">>", 1), rec) for pair, rec in trans_for_line.items()]
+        keys = []
+        for (a, b), _ in pairs:
+            keys.extend((a, b))
+        table = cls(dict.fromkeys(keys))
+        for (a, b), (mins, next_launch, note) in pairs:
+            table.set(a, b, mins, next_launch, note)
+        return table
+
+    def key_id(self, key: str) -> int:
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.keys)
+            self.keys.append(key)
+        return i
+
+    def _grow(self):
+        k, old = len(self.keys), self.setup.shape[0]
+        if k == old:
+            return
+        setup = np.full((k, k), np.nan, dtype=np.float32)
+        next_launch = np.full((k, k), np.nan, dtype=np.float32)
+        note_id = np.full((k, k), -1, dtype=np.int32)
+        setup[:old, :old] = self.setup
+        next_launch[:old, :old] = self.next_launch
+        note_id[:old, :old] = self.note_id
+        self.setup, self.next_launch, self.note_id = setup, next_launch, note_id
+
+    def note_id_of(self, note: str) -> int:
+        nid = self._note_index.get(note)
+        if nid is None:
+            nid = self._note_index[note] = len(self.notes)
+            self.notes.append(note)
+        return nid
+
+    def set(self, from_key: str, to_key: str, mins: float, next_launch: float, note: str = ""):
+        a, b = self.key_id(from_key), self.key_id(to_key)
+        self._grow()
+        self.setup[a, b] = mins
+        self.next_launch[a, b] = next_launch
+        self.note_id[a, b] = self.note_id_of(note)
+
+    def set_many(self, a, b, mins, next_launch, note_ids):
+        # Массовая запись по индексам keys (a, b — последовательности номеров)
+        self._grow()
+        a = np.asarray(a, dtype=np.intp)
+        b = np.asarray(b, dtype=np.intp)
+        self.setup[a, b] = mins
+        self.next_launch[a, b] = next_launch
+        self.note_id[a, b] = note_ids
+
+    def copy(self) -> "TransitionTable":
+        table = TransitionTable()
+        table.keys = list(self.keys)
+        table.index = dict(self.index)
+        table.notes = list(self.notes)
+        table._note_index = dict(self._note_index)
+        table.setup = self.setup.copy()
+        table.next_launch = self.next_launch.copy()
+        table.note_id = self.note_id.copy()
+        return table
+
+    def set_minutes_by_note(self, note: str, mins: float) -> int:
+        """Меняет минуты всех переходов с примечанием note; возвращает число переходов."""
+        nid = self._note_index.get(note)
+        if nid is None:
+            return 0
+        mask = self.note_id == nid
+        self.setup[mask] = mins
+        return int(np.count_nonzero(mask))
+
+    def update(self, other: "TransitionTable"):
+        # Несколько блоков одной линии на листе: поздний блок перекрывает ранний, как в dict
+        for a, b in zip(*np.nonzero(other.note_id >= 0)):
+            self.set(other.keys[a], other.keys[b], float(other.setup[a, b]),
+                     float(other.next_launch[a, b]), other.notes[other.note_id[a, b]])
+
+    def lookup(self, a: int, b: int):
+        nid = self.note_id.item(a, b)
+        if nid < 0:
+            return None
+        return (round(self.setup.item(a, b), 4), round(self.next_launch.item(a, b), 4), self.notes[nid])
+
+    def get(self, from_key, to_key=None, default=None):
+        if to_key is None:
+            if ">>" not in from_key:
+                return default
+            from_key, to_key = from_key.split(">>", 1)
+        a, b = self.index.get(from_key), self.index.get(to_key)
+        if a is None or b is None:
+            return default
+        rec = self.lookup(a, b)
+        return default if rec is None else rec
+
+    def __contains__(self, pair):
+        return self.get(pair) is not None
+
+    def __len__(self):
+        return int(np.count_nonzero(self.note_id >= 0))
+
+    def __bool__(self):
+        return len(self.keys) > 0
+
+    def items(self):
+        for a, b in zip(*np.nonzero(self.note_id >= 0)):
+            yield f"{self.keys[a]}>>{self.keys[b]}", self.lookup(a, b)
+
+    def nbytes(self) -> int:
+        return self.setup.nbytes + self.next_launch.nbytes + self.note_id.nbytes
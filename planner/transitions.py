@@ -1,26 +1,31 @@
 # -*- coding: utf-8 -*-
+from collections.abc import Mapping
+import numpy as np
 from .utils import (
     sku_key_norm, line_header_from_name, parse_mins_and_nextlaunch,
     CHANGEOVER_FALLBACK_MIN, LAUNCH_FALLBACK_MIN
 )
+from .trace import span
+from .transition_table import TransitionTable
+from .sources import as_workbook
 
-def read_stdstops_dict(excel_app):
+def read_stdstops_dict(excel_app, trace=None):
+    with span(trace, "excel.read_stdstops") as sp:
+        std = _read_stdstops(as_workbook(excel_app))
+        sp.set(lines=len(std))
+    return std
+
+def _read_stdstops(book):
     std = {}
-    wb = excel_app.ActiveWorkbook
     try:
-        ws = wb.Worksheets("Таблица_Нормативов")
-    except Exception:
+        found = book.table("Таблица_Нормативов", "StdStops")
+    except KeyError:
         return std
-
-    lo = None
-    for L in ws.ListObjects:
-        if str(L.Name).lower() == "stdstops":
-            lo = L
-            break
-    if lo is None or lo.DataBodyRange is None:
+    if found is None:
         return std
 
-    hdr_vals = [str(c.Value or "") for c in lo.HeaderRowRange]
+    header, rows = found
+    hdr_vals = [str(v or "") for v in header]
     col_event = None
     for idx, name in enumerate(hdr_vals, start=1):
         nm = str(name or "").strip().lower()
@@ -30,7 +35,7 @@ def read_stdstops_dict(excel_app):
     if not col_event:
         return std
 
-    body = lo.DataBodyRange.Value
+    body = list(rows)
     n_rows = len(body)
     n_cols = len(body[0]) if n_rows else 0
 
@@ -48,90 +53,221 @@ def read_stdstops_dict(excel_app):
             event_key = str(body[r][col_event - 1] or "").strip()
             if not event_key:
                 continue
-            cell_val = body[r][col - 1]
-            mins, next_launch, ok = parse_mins_and_nextlaunch(cell_val)
-            if ok:
-                line_dict[event_key] = (float(mins), float(next_launch))
-            elif isinstance(cell_val, (int, float)):
-                line_dict[event_key] = (float(cell_val), -1.0)
+            rec = std_cell(body[r][col - 1])
+            if rec is not None:
+                line_dict[event_key] = rec
     return std
 
-def read_transition_matrix_from_active_excel(excel_app):
-    wb = excel_app.ActiveWorkbook
-    if wb is None:
-        raise RuntimeError("Нет активной книги Excel.")
-    try:
-        ws = wb.Worksheets("Карта_Переходов")
-    except Exception:
-        raise RuntimeError("Лист 'Карта_Переходов' не найден.")
+def std_cell(cell_val):
+    """Клетка StdStops ("мин;след. запуск", число) -> (мин, след. запуск) или None."""
+    mins, next_launch, ok = parse_mins_and_nextlaunch(cell_val)
+    if ok:
+        return (float(mins), float(next_launch))
+    if isinstance(cell_val, (int, float)):
+        return (float(cell_val), -1.0)
+    return None
 
-    std = read_stdstops_dict(excel_app)
-
-    used = ws.UsedRange
-    vals = used.Value
-    if not vals:
-        return {"transitions": {}, "start_launch": {}}
-
-    n_rows = len(vals)
-    n_cols = len(vals[0]) if n_rows else 0
-
-    trans = {}
-    r = 0
-    first_data_col = 1
-
-    while r < n_rows:
-        cell_txt = str(vals[r][0] or "")
-        if cell_txt and "Линия" in cell_txt:
-            line_name = cell_txt.replace("Линия:", "").strip() or cell_txt.strip()
-            head_row = r + 1
-
-            c = first_data_col
-            while c < n_cols and str(vals[head_row][c] or "").strip():
-                c += 1
-            end_col = max(c - 1, first_data_col)
-
-            r2 = head_row + 1
-            while r2 < n_rows:
-                v = str(vals[r2][0] or "")
-                if (not v) or ("Линия" in v):
-                    break
-                r2 += 1
-            end_row = max(r2 - 1, head_row + 1)
-
-            line_dict = trans.setdefault(line_name, {})
-            line_hdr = line_header_from_name(line_name)
-            to_headers = [sku_key_norm(str(vals[head_row][cc] or "")) for cc in range(first_data_col, end_col + 1)]
-
-            for rr in range(head_row + 1, end_row + 1):
-                from_key = sku_key_norm(str(vals[rr][0] or ""))
-                if not from_key:
-                    continue
-                for idx_cc, cc in enumerate(range(first_data_col, end_col + 1)):
-                    to_key = to_headers[idx_cc]
-                    if not to_key:
-                        continue
-                    co_cell = vals[rr][cc]
-                    mins = CHANGEOVER_FALLBACK_MIN
-                    next_launch = -1.0
-                    note = "Найден в линии, но пусто"
-                    if co_cell is not None and str(co_cell).strip():
-                        event_key = str(co_cell).strip()
-                        if (line_hdr in std) and (event_key in std[line_hdr]):
-                            mins, next_launch = std[line_hdr][event_key]
-                            note = f"Ключ: {event_key}"
-                        else:
-                            note = f"Ключ '{event_key}' не найден в StdStops"
-                    line_dict[f"{from_key}>>{to_key}"] = (float(mins), float(next_launch), note)
-            r = end_row + 1
-        else:
-            r += 1
+def event_record(std: dict, line_hdr: str, co_cell):
+    """Клетка карты переходов (ключ события StdStops) -> (мин, след. запуск, примечание)."""
+    event_key = str(co_cell).strip() if co_cell is not None else ""
+    if not event_key:
+        return CHANGEOVER_FALLBACK_MIN, -1.0, "Найден в линии, но пусто"
+    if (line_hdr in std) and (event_key in std[line_hdr]):
+        mins, next_launch = std[line_hdr][event_key]
+        return float(mins), float(next_launch), f"Ключ: {event_key}"
+    return CHANGEOVER_FALLBACK_MIN, -1.0, f"Ключ '{event_key}' не найден в StdStops"
 
+def start_launch_for_lines(std: dict, lines) -> dict:
     start_launch_by_line = {}
-    for line in trans.keys():
+    for line in lines:
         hdr = line_header_from_name(line)
         mins, nextl = LAUNCH_FALLBACK_MIN, -1.0
         if hdr in std and "Запуск линии" in std[hdr]:
             mins, nextl = std[hdr]["Запуск линии"]
         start_launch_by_line[line] = (mins, nextl)
+    return start_launch_by_line
+
+def stdstops_from_dict(cells_by_line: dict) -> dict:
+    """{линия: {событие: клетка}} (как колонки StdStops) -> словарь read_stdstops_dict."""
+    std = {}
+    for line, cells in cells_by_line.items():
+        line_dict = std.setdefault(line_header_from_name(line), {})
+        for event_key, cell_val in cells.items():
+            rec = std_cell(cell_val)
+            if rec is not None and str(event_key).strip():
+                line_dict[str(event_key).strip()] = rec
+    return std
+
+def transitions_from_pairs(std: dict, cells_by_line: dict) -> dict:
+    """{линия: {"ИЗ>>В": ключ события}} -> то же, что read_transition_matrix_from_active_excel."""
+    trans = {}
+    for line, cells in cells_by_line.items():
+        line_hdr = line_header_from_name(line)
+        pairs = []
+        for pair, co_cell in cells.items():
+            a, _, b = str(pair).partition(">>")
+            a, b = sku_key_norm(a), sku_key_norm(b)
+            if a and b:
+                pairs.append((a, b, co_cell))
+        table = TransitionTable(k for a, b, _ in pairs for k in (a, b))
+        for a, b, co_cell in pairs:
+            table.set(a, b, *event_record(std, line_hdr, co_cell))
+        trans[line] = table
+    return {"transitions": trans, "start_launch": start_launch_for_lines(std, trans)}
+
+def read_transition_matrix_from_active_excel(excel_app, trace=None, lazy: bool = False):
+    # lazy=True — transitions: LazyTransitions, таблица линии строится при обращении к ней
+    with span(trace, "excel.read_transitions") as sp:
+        tdata = _read_transitions(as_workbook(excel_app), trace, lazy)
+        sp.set(lines=len(tdata["transitions"]))
+        if not lazy:
+            sp.set(pairs=sum(len(d) for d in tdata["transitions"].values()))
+    return tdata
+
+FINISH_CHUNK_ROWS = 256
+
+def _first_cell(row):
+    return str((row[0] if row else None) or "")
+
+def _ends_block(row):
+    txt = _first_cell(row)
+    return not txt or "Линия" in txt
+
+class _LineBlock:
+    """Блок одной линии Карты_Переходов.
+
+    Строки из потока (файл) кодируются сразу: от строки остаются ключ "ИЗ" и коды клеток
+    (int32), сама строка не хранится. Строки уже прочитанного в память листа (COM)
+    только запоминаются и разбираются в finish().
+    """
+
+    def __init__(self, std, line_row, head):
+        cell_txt = _first_cell(line_row)
+        self.line_name = cell_txt.replace("Линия:", "").strip() or cell_txt.strip()
+        self.line_hdr = line_header_from_name(self.line_name)
+        self.std = std
+
+        first_data_col = 1
+        c = first_data_col
+        while c < len(head) and str(head[c] or "").strip():
+            c += 1
+        end_col = max(c - 1, first_data_col)
+        to_headers = [(cc, sku_key_norm(str(head[cc] or "")) if cc < len(head) else "")
+                      for cc in range(first_data_col, end_col + 1)]
+        self.cols = [cc for cc, k in to_headers if k]
+        self.to_keys = [k for _, k in to_headers if k]
+
+        # Значение клетки -> номер записи (мин, след. запуск, примечание); ключей StdStops немного
+        self.rec_of = {}
+        self.recs = []
+        self.from_keys = []
+        self.codes = []
+        self.kept = []
+
+    def _code(self, co_cell):
+        event_key = str(co_cell).strip() if co_cell is not None else ""
+        k = self.rec_of.get(event_key)
+        if k is None:
+            k = self.rec_of[event_key] = len(self.recs)
+            self.recs.append(event_record(self.std, self.line_hdr, event_key))
+        return k
+
+    def _encode(self, row, from_keys, codes):
+        from_key = sku_key_norm(_first_cell(row))
+        if not from_key:
+            return
+        n = len(row)
+        from_keys.append(from_key)
+        codes.append(np.fromiter((self._code(row[cc] if cc < n else None) for cc in self.cols),
+                                 dtype=np.int32, count=len(self.cols)))
+
+    def add(self, row):
+        self._encode(row, self.from_keys, self.codes)
+
+    def keep(self, row):
+        self.kept.append(row)
+
+    def finish(self) -> TransitionTable:
+        from_keys, codes = list(self.from_keys), list(self.codes)
+        for row in self.kept:
+            self._encode(row, from_keys, codes)
+        table = TransitionTable(from_keys + self.to_keys)
+        if self.cols and from_keys:
+            mins = np.array([r[0] for r in self.recs])
+            nextl = np.array([r[1] for r in self.recs])
+            nids = np.array([table.note_id_of(r[2]) for r in self.recs], dtype=np.int32)
+            from_ids = np.array([table.index[k] for k in from_keys], dtype=np.intp)
+            to_ids = np.array([table.index[k] for k in self.to_keys], dtype=np.intp)
+            # порциями строк: временные массивы индексов не больше FINISH_CHUNK_ROWS строк блока
+            for i in range(0, len(from_ids), FINISH_CHUNK_ROWS):
+                part = np.concatenate(codes[i:i + FINISH_CHUNK_ROWS])
+                a = np.repeat(from_ids[i:i + FINISH_CHUNK_ROWS], len(self.cols))
+                b = np.tile(to_ids, len(a) // len(self.cols))
+                table.set_many(a, b, mins[part], nextl[part], nids[part])
+        return table
+
+def _merge_blocks(blocks) -> TransitionTable:
+    table = blocks[0].finish()
+    for block in blocks[1:]:
+        table.update(block.finish())
+    return table
+
+class LazyTransitions(Mapping):
+    """{линия: TransitionTable}, где таблица линии собирается из блоков листа при обращении.
+
+    Таблица не запоминается: её держит тот, кто сейчас решает линию, и после линии
+    она освобождается. Для повторного использования возьмите dict(lazy).
+    """
+
+    def __init__(self, blocks: dict):
+        self._blocks = blocks
+
+    def __getitem__(self, line):
+        return _merge_blocks(self._blocks[line])
+
+    def __iter__(self):
+        return iter(self._blocks)
+
+    def __len__(self):
+        return len(self._blocks)
+
+def _read_transitions(book, trace=None, lazy=False):
+    try:
+        with span(trace, "excel.com_read", sheet="Карта_Переходов"):
+            rows = book.used_rows("Карта_Переходов")
+    except KeyError:
+        raise RuntimeError("Лист 'Карта_Переходов' не найден.")
+
+    std = read_stdstops_dict(book, trace)
+    # Лист в памяти (COM) разбирается только при сборке таблицы, поток из файла — сразу
+    in_memory = isinstance(rows, (list, tuple))
+
+    # "Линия: ...", строка заголовков "В", строки данных до пустой строки
+    # или следующей "Линия"; первая строка после заголовка входит в блок всегда.
+    blocks = {}
+    rows = iter(rows)
+    row = next(rows, None)
+    while row is not None:
+        if "Линия" not in _first_cell(row):
+            row = next(rows, None)
+            continue
+        head = next(rows, None)
+        if head is None:
+            break
+        block = _LineBlock(std, row, head)
+        put = block.keep if in_memory else block.add
+        row = next(rows, None)
+        if row is not None:
+            put(row)
+            more = not _ends_block(row)
+            row = next(rows, None)
+            while more and row is not None and not _ends_block(row):
+                put(row)
+                row = next(rows, None)
+        blocks.setdefault(block.line_name, []).append(block)
 
-    return {"transitions": trans, "start_launch": start_launch_by_line}
+    if lazy:
+        trans = LazyTransitions(blocks)
+    else:
+        trans = {line: _merge_blocks(line_blocks) for line, line_blocks in blocks.items()}
+    return {"transitions": trans, "start_launch": start_launch_for_lines(std, trans)}
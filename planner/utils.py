@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import math
 import re
 
 TIME_SCALE = 1  # минута = 1
@@ -37,5 +38,54 @@ def parse_mins_and_nextlaunch(v):
         return mins, next_launch, True
     return mins, next_launch, False
 
+def cell_number(v) -> float:
+    """Число из клетки: float/int как есть, строка — с десятичной запятой и пробелами
+    между разрядами ("3 000,5", как пишет Excel в русской локали); пусто — 0.0."""
+    if v is None or isinstance(v, (int, float)):
+        return float(v or 0.0)
+    s = str(v).strip().replace("\u00a0", "").replace(" ", "").replace(",", ".")
+    return float(s) if s else 0.0
+
+def parse_lines_cell(v) -> dict:
+    """Колонка Lines: "Линия 1; Линия 3=9000" -> {"Линия 1": None, "Линия 3": 9000.0}.
+
+    Разделитель линий — ";" или перевод строки; после "=" — скорость на этой линии
+    (None — скорость из колонки Speed), она должна быть положительным числом.
+    Готовый словарь {линия: скорость} (из JSON) проверяется так же.
+    """
+    if isinstance(v, dict):
+        parts = [(name, "" if speed is None else speed) for name, speed in v.items()]
+    else:
+        parts = [part.partition("=")[::2] for part in re.split(r"[;\n]", str(v or ""))]
+    lines = {}
+    for name, speed in parts:
+        name = str(name).strip()
+        if not name:
+            continue
+        speed = str(speed).strip().replace(",", ".")
+        try:
+            value = float(speed) if speed else None
+        except ValueError:
+            value = math.nan
+        if value is not None and not (math.isfinite(value) and value > 0):
+            raise RuntimeError(f"Колонка Lines: неверная скорость '{speed}' для линии '{name}'")
+        lines[name] = value
+    return lines
+
+def as_rows(value) -> tuple:
+    """Range.Value из COM -> кортеж строк: одна клетка приходит самим значением, пустота — None."""
+    if value is None:
+        return ()
+    if not isinstance(value, (tuple, list)):
+        return ((value,),)
+    return tuple(row if isinstance(row, (tuple, list)) else (row,) for row in value)
+
 def fmt_job(j: dict) -> str:
-    return f"{j['Name']} {j['Volume']}"
+    label = getattr(j, "label", None)
+    return label if label is not None else f"{j['Name']} {j['Volume']}"
+
+def proc_minutes(quantity, speed) -> int:
+    qty = float(quantity or 0.0)
+    spd = float(speed or 0.0)
+    dur = 0.0 if spd <= 0 else qty / spd * 60.0
+    return int(math.ceil(dur / TIME_SCALE))
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+from collections import defaultdict
+import pytest
+from planner.assignment import assign_jobs_to_lines, job_lines, sequenced_loads
+from planner.events import optimize_all, read_plan_inputs
+from benchmarks.workbook import make_workbook
+
+def _inputs(seed, jobs_per_line=(40, 10, 10)):
+    app = make_workbook(n_lines=3, jobs_per_line=list(jobs_per_line), n_skus=8, strict_density=0.3,
+                        flex_density=0.6, seed=seed)
+    return read_plan_inputs(app)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_assignment_respects_allowed_lines_and_strict_keys(seed):
+    inputs = _inputs(seed)
+    jobs = inputs["jobs"]
+    logs = []
+    result, info = assign_jobs_to_lines(jobs, inputs["transitions"], inputs["start_launch"],
+                                        time_limit_sec=1.0, log_fn=logs.append)
+    assert [j["JobID"] for j in result] == [j["JobID"] for j in jobs]
+    for old, new in zip(jobs, result):
+        allowed = job_lines(old)
+        assert new["Line"] in allowed
+        assert new["Speed"] == allowed[new["Line"]]
+    # цепочка StrictKey переезжает целиком
+    chains = defaultdict(set)
+    for old, new in zip(jobs, result):
+        if old["StrictKey"]:
+            chains[(old["Line"], old["StrictKey"])].add(new["Line"])
+    assert all(len(lines) == 1 for lines in chains.values())
+    assert logs and logs[0].startswith("[Назначение]")
+    # проверка последовательностью: итог не хуже заданий на своих линиях
+    if info["moved"]:
+        assert info["seq_after"] <= info["seq_before"]
+        assert max(sequenced_loads(result, inputs["transitions"], inputs["start_launch"]).values()) == \
+            info["seq_after"]
+
+def test_assignment_moves_work_off_the_busy_line():
+    inputs = _inputs(0)
+    _, info = assign_jobs_to_lines(inputs["jobs"], inputs["transitions"], inputs["start_launch"],
+                                   time_limit_sec=1.0, log_fn=None)
+    assert info["moved"] > 0 and info["max_after"] < info["max_before"]
+
+def test_optimize_all_uses_callers_log_fn(capsys):
+    inputs = _inputs(1, (12, 4, 4))
+    logs = []
+    optimize_all(None, dt.datetime(2025, 9, 29, 8), inputs=inputs, assign_lines=True, solver_time_limit_sec=0.5,
+                 total_workers=1, log_fn=logs.append)
+    assert capsys.readouterr().out == ""
+    assert any(s.startswith("[Назначение]") for s in logs)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from planner.batching import collapse_same_sku, expand_batches
+from planner.jobs import Job
+from planner.optimizer import build_line_schedule_cp
+from planner.precedence import violated_precedences
+
+def _job(row, name, strict=""):
+    return Job(f"J{row}", "Линия 1", name, "1л", 1000, 1000, 1, strict, row)
+
+def test_free_jobs_not_merged_into_strict_run():
+    jobs = [_job(1, "Сок", "A"), _job(2, "Вода", "A"), _job(3, "Сок", "A"), _job(4, "Сок"), _job(5, "Сок")]
+    tasks = collapse_same_sku(jobs)
+    by_members = {tuple(j["JobID"] for j in t.get("_members", [t])): t for t in tasks}
+    assert set(by_members) == {("J1",), ("J2",), ("J3",), ("J4", "J5")}
+    assert by_members[("J4", "J5")]["StrictKey"] == ""
+    assert all(by_members[(jid,)]["StrictKey"] == "A" for jid in ("J1", "J2", "J3"))
+
+def test_free_batch_schedules_outside_chain():
+    jobs = [_job(1, "Сок", "A"), _job(2, "Вода", "A"), _job(3, "Сок", "A"), _job(4, "Сок"), _job(5, "Вода")]
+    trans = {"СОК 1Л>>ВОДА 1Л": (60.0, 0.0, "Мойка"), "ВОДА 1Л>>СОК 1Л": (60.0, 0.0, "Мойка")}
+    tasks = collapse_same_sku(jobs)
+    order, times, _ = build_line_schedule_cp("Линия 1", tasks, trans, 0.0, solver_time_limit_sec=2.0,
+                                             num_workers=1, log_fn=None)
+    order, times = expand_batches(order, times)
+    assert sorted(j["JobID"] for j in order) == [f"J{k}" for k in range(1, 6)]
+    assert violated_precedences(order) == []
+    chain = [j["JobID"] for j in order if j["StrictKey"] == "A"]
+    assert chain == ["J1", "J2", "J3"]
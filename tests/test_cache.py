@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+import os
+import time
+import pytest
+from planner.cache import SolveCache, hint_digest, line_fingerprint
+from planner.events import optimize_all
+from planner.optimizer import _proc_min
+from planner.setup_matrix import LineSetup
+from benchmarks.synthetic import make_line
+
+START = dt.datetime(2025, 9, 29, 8)
+OPTS = {"solver_time_limit_sec": 1.0, "total_workers": 1, "log_fn": None}
+
+def _inputs(trans=None):
+    jobs, line_trans = make_line(8, n_skus=4, priority_levels=2, strict_density=0.2, seed=3)
+    return {"jobs": jobs, "transitions": {"Линия 1": trans or line_trans}, "start_launch": {"Линия 1": (20.0, -1.0)}}
+
+def _solve(cache, inputs, **opts):
+    rows, stats, _ = optimize_all(None, START, inputs=inputs, cache=cache, **dict(OPTS, **opts))
+    return rows, stats["Линия 1"]["cache"]
+
+@pytest.fixture
+def cache(tmp_path):
+    return SolveCache(str(tmp_path / "cache"))
+
+def test_hit_after_identical_solve(cache):
+    rows, state = _solve(cache, _inputs())
+    assert state == "miss"
+    again, state = _solve(cache, _inputs())
+    assert state == "hit" and again == rows
+    assert _solve(None, _inputs())[1] == "off"
+
+def test_miss_when_inputs_or_options_change(cache):
+    inputs = _inputs()
+    _solve(cache, inputs)
+    trans = {k: (mins + 5.0, nl, note) for k, (mins, nl, note) in inputs["transitions"]["Линия 1"].items()}
+    assert _solve(cache, _inputs(trans))[1] == "miss"
+    order = [j["JobID"] for j in reversed(inputs["jobs"])]
+    assert _solve(cache, inputs, hints={"Линия 1": order})[1] == "miss"
+    assert _solve(cache, inputs, hints={"Линия 1": order})[1] == "hit"
+    assert _solve(cache, inputs, solver_time_limit_sec=2.0)[1] == "miss"
+    assert _solve(cache, inputs, model="circuit")[1] == "miss"
+    assert _solve(cache, inputs, batch_same_sku=False)[1] == "miss"
+    # num_workers не входит в ключ
+    assert _solve(cache, inputs, total_workers=2)[1] == "hit"
+
+def test_miss_when_lead_sku_changes(cache):
+    inputs = _inputs()
+    first, second = inputs["jobs"][0], next(j for j in inputs["jobs"] if j["Name"] != inputs["jobs"][0]["Name"])
+    rest = dict(inputs, jobs=[j for j in inputs["jobs"] if j not in (first, second)])
+
+    def frozen(job):
+        return {"Линия 1": [dict(job, StartDT=START, EndDT=START + dt.timedelta(hours=1))]}
+    assert _solve(cache, rest, frozen=frozen(first))[1] == "miss"
+    assert _solve(cache, rest, frozen=frozen(first))[1] == "hit"
+    assert _solve(cache, rest, frozen=frozen(second))[1] == "miss"
+    assert _solve(cache, rest)[1] == "miss"
+
+def test_fingerprint_ignores_job_list_order():
+    jobs, trans = make_line(10, n_skus=5, seed=1)
+    params = {"model": "pairwise"}
+
+    def key(jlist, params=params, start=20.0):
+        return line_fingerprint(jlist, LineSetup(jlist, trans), [_proc_min(j) for j in jlist], start, params)
+    assert key(jobs) == key(list(reversed(jobs)))
+    assert key(jobs) != key(jobs, start=30.0)
+    assert key(jobs) != key(jobs, params=dict(params, hint=hint_digest(jobs)))
+    assert key(jobs) != key([dict(jobs[0], Priority=jobs[0]["Priority"] + 1)] + jobs[1:])
+    assert hint_digest(None) is None
+    assert hint_digest(jobs) == hint_digest([j["JobID"] for j in jobs])
+
+def _age(cache, key, seconds):
+    fn = cache._file(key)
+    t = time.time() - seconds
+    os.utime(fn, (t, t))
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = SolveCache(str(tmp_path), max_age_sec=60)
+    cache.put("old", {"v": 1})
+    cache.put("new", {"v": 2})
+    _age(cache, "old", 120)
+    assert cache.get("old") is None
+    assert not os.path.exists(cache._file("old"))
+    _age(cache, "new", 120)
+    cache.put("other", {"v": 3})
+    assert sorted(os.listdir(tmp_path)) == ["other.json"]
+
+def test_least_recently_used_evicted_first(tmp_path):
+    cache = SolveCache(str(tmp_path))
+    for k, key in enumerate(("a", "b", "c")):
+        cache.put(key, {"v": "x" * 100})
+        _age(cache, key, 300 - 100 * k)
+    size = os.path.getsize(cache._file("a"))
+    assert cache.get("a") == {"v": "x" * 100}
+    cache.max_bytes = 3 * size
+    cache.put("d", {"v": "x" * 100})
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json", "d.json"]
+    cache.clear()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import pytest
+from planner.excel_io import read_jobs_from_active_excel
+from planner.transitions import read_stdstops_dict, read_transition_matrix_from_active_excel
+from benchmarks.workbook import make_workbook
+
+READERS = [read_jobs_from_active_excel, read_stdstops_dict, read_transition_matrix_from_active_excel]
+
+def _com_calls(reader, n_rows):
+    # вместе с JobsTable растёт и Карта_Переходов: 4 SKU на линию против 200
+    app = make_workbook(n_lines=2, jobs_per_line=n_rows // 2, n_skus=n_rows // 25, seed=1)
+    app.reset_calls()
+    reader(app)
+    return app.com_calls
+
+@pytest.mark.parametrize("reader", READERS, ids=lambda f: f.__name__)
+def test_com_calls_do_not_grow_with_rows(reader):
+    assert _com_calls(reader, 100) == _com_calls(reader, 5000)
+
+def test_jobs_read_from_workbook():
+    app = make_workbook(n_lines=2, jobs_per_line=2500, n_skus=20, seed=1)
+    assert len(read_jobs_from_active_excel(app)) == 5000
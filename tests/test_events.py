@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+from collections import defaultdict
+import pytest
+from planner.events import build_events_for_line, optimize_all
+from planner.service import inputs_from_payload
+from planner.transitions import stdstops_from_dict, transitions_from_pairs
+
+START = dt.datetime(2025, 9, 29, 8)
+KEYS = ["Сок 1л", "Вода 0.5л"]
+
+def _job(k, sku):
+    name, volume = KEYS[sku].split()
+    return {"JobID": f"J{k}", "Line": "Линия 1", "Name": name, "Volume": volume, "Quantity": 1000, "Speed": 1000,
+            "Priority": 1}
+
+def _cells():
+    # Пустая клетка на диагонали даёт запись «Найден в линии, но пусто» с переходом по умолчанию
+    return {"Линия 1": {f"{a}>>{b}": ("" if a == b else "Мойка") for a in KEYS for b in KEYS}}
+
+def _no_overlap(events):
+    by_line = defaultdict(list)
+    for e in events:
+        by_line[e["Line"]].append((e["Start"], e["End"]))
+    for spans in by_line.values():
+        spans.sort()
+        assert all(e1 <= s2 for (_, e1), (s2, _) in zip(spans, spans[1:])), spans
+
+@pytest.mark.parametrize("table", [True, False])
+def test_same_sku_pair_has_no_changeover_event(table):
+    std = stdstops_from_dict({"Линия 1": {"Мойка": "30;10"}})
+    trans = transitions_from_pairs(std, _cells())["transitions"]["Линия 1"]
+    if not table:
+        trans = dict(trans.items())
+    assert trans.get("СОК 1Л>>СОК 1Л")[2] == "Найден в линии, но пусто"
+    order = [_job(0, 0), _job(1, 0), _job(2, 1)]
+    times = {"J0": (0.0, 60.0), "J1": (60.0, 120.0), "J2": (160.0, 220.0)}
+    events = build_events_for_line("Линия 1", order, times, trans, START, 0.0)
+    assert [(e["Type"], e["JobID"]) for e in events] == \
+        [("Производство", "J0"), ("Производство", "J1"), ("Переход", "J2"), ("Производство", "J2")]
+    assert events[2]["Minutes"] == 40.0
+    _no_overlap(events)
+
+def test_plan_events_do_not_overlap():
+    jobs = [_job(k, s) for k, s in enumerate([0, 0, 1, 0, 1, 1, 0])]
+    inputs = inputs_from_payload({"jobs": jobs, "transitions": _cells(),
+                                  "stdstops": {"Линия 1": {"Мойка": "30;10", "Запуск линии": 20}}})
+    for batch in (True, False):
+        _, _, events = optimize_all(None, START, inputs=inputs, batch_same_sku=batch, solver_time_limit_sec=1.0,
+                                    total_workers=1, log_fn=None)
+        assert sum(e["Type"] == "Производство" for e in events) == len(jobs)
+        _no_overlap(events)
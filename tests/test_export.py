@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+import pytest
+from planner.export import export_plan_file
+from planner.replan import plan_rows_from_csv
+
+START = dt.datetime(2025, 9, 29, 8)
+
+def _rows():
+    return [{"Line": "Линия 1", "Pos": k + 1, "JobID": f"J{k}", "Name": "Сок", "Volume": "1л", "Priority": 1,
+             "StrictKey": "", "StartDT": START + dt.timedelta(hours=k), "EndDT": START + dt.timedelta(hours=k + 1)}
+            for k in range(3)]
+
+def test_plan_written_to_chosen_path(tmp_path):
+    events = [{"Line": "Линия 1", "Type": "Производство", "Start": START, "End": START, "JobID": "J0"}]
+    paths = export_plan_file(str(tmp_path / "plan.csv"), _rows(), events)
+    assert paths == [str(tmp_path / "plan.csv"), str(tmp_path / "plan.events.csv")]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["plan.csv", "plan.events.csv"]
+    assert [r["JobID"] for r in plan_rows_from_csv(paths[0])] == ["J0", "J1", "J2"]
+
+def test_unknown_extension(tmp_path):
+    with pytest.raises(ValueError, match="Неизвестный формат"):
+        export_plan_file(str(tmp_path / "plan.txt"), _rows())
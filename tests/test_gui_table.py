@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import random
+import pytest
+from gui_table import ColumnStore, _sort_key
+
+COLUMNS = ("Line", "JobID", "Start", "Qty")
+
+def _rows(rnd, line, n):
+    return [{"Line": line, "JobID": f"J{rnd.randrange(100)}", "Start": rnd.choice(("", "08:00", "09:30", "11:15")),
+             "Qty": rnd.randrange(5)} for _ in range(n)]
+
+def _expected(groups, filters, sort_col, reverse):
+    # Прежнее построение: все группы заново и устойчивая сортировка всего списка
+    view = []
+    for rows in groups.values():
+        for r in rows:
+            ok = all(str(want).upper() in str(r[c]).upper() if c == "JobID" else str(r[c]) == str(want)
+                     for c, want in filters.items())
+            if ok:
+                view.append(r)
+    if sort_col is not None:
+        view.sort(key=lambda r: _sort_key(r[sort_col]), reverse=reverse)
+    return [tuple(r[c] for c in COLUMNS) for r in view]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_view_matches_full_rebuild(seed):
+    rnd = random.Random(seed)
+    store = ColumnStore(COLUMNS)
+    groups = {}
+    for step in range(60):
+        op = rnd.choice(("replace", "replace", "filter", "sort"))
+        if op == "replace":
+            line = f"Линия {rnd.randrange(4)}"
+            rows = _rows(rnd, line, rnd.randrange(0, 12))
+            if rows:
+                groups[line] = rows
+            else:
+                groups.pop(line, None)
+            store.replace_group(line, rows)
+        elif op == "filter":
+            col, value = rnd.choice((("JobID", f"j{rnd.randrange(10)}"), ("JobID", ""),
+                                     ("Line", f"Линия {rnd.randrange(4)}"), ("Line", None)))
+            store.set_filter(col, value)
+        else:
+            store.sort_by(rnd.choice(COLUMNS))
+        got = [store.row(k) for k in range(len(store))]
+        assert got == _expected(groups, store.filters, store.sort_col, store.reverse), (step, op)
+
+def test_filter_reuses_cached_sort_order():
+    rnd = random.Random(0)
+    store = ColumnStore(COLUMNS)
+    store.set_rows(_rows(rnd, "Линия 1", 50) + _rows(rnd, "Линия 2", 50))
+    store.sort_by("Start")
+    orders = {g: o[("Start", False)] for g, o in store._orders.items()}
+    for text in ("J", "J1", "J12", ""):
+        store.set_filter("JobID", text)
+    assert {g: o[("Start", False)] for g, o in store._orders.items()} == orders
+    assert all(store._orders[g][("Start", False)] is orders[g] for g in orders)
+
+def test_event_log_columns_without_dicts(monkeypatch):
+    import datetime as dt
+    from planner.event_log import EventLog, EVENT_FIELDS
+    log = EventLog(dt.datetime(2025, 9, 29, 8))
+    for k in range(6):
+        log.append(f"Линия {k % 2 + 1}", "Производство", 10.0 * k, 10.0 * k + 5, f"J{k}", "Сок 1л", 100.0, 50.0, 5.0)
+    log.append("Линия 1", "Переход", 60.0, 80.0, "J9", "", minutes=20.0, note="Мойка")
+    expected = [dict(zip(EVENT_FIELDS, log.record(i))) for i in range(len(log))]
+    monkeypatch.setattr(EventLog, "__iter__", lambda self: pytest.fail("EventLog перебран по строкам"))
+    monkeypatch.setattr(EventLog, "__getitem__", lambda self, i: pytest.fail("EventLog перебран по строкам"))
+
+    store = ColumnStore(EVENT_FIELDS)
+    store.set_rows(log)
+    assert sorted(store.rows(), key=lambda r: r["JobID"]) == sorted(expected, key=lambda r: r["JobID"])
+    store.replace_group("Линия 2", log.take([1, 3]))
+    assert [r["JobID"] for r in store.rows() if r["Line"] == "Линия 2"] == ["J1", "J3"]
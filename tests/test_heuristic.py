@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import random
+import numpy as np
+import pytest
+from planner.heuristic import _LocalSearch, _seq_cost, greedy_order, improve_sequence_local
+from planner.optimizer import analyze_sequence_cost
+from planner.precedence import strict_chains, violated_precedences
+from planner.setup_matrix import LineSetup
+from benchmarks.synthetic import make_line
+
+def _line(n, seed):
+    jobs, trans = make_line(n, n_skus=6, priority_levels=3, strict_density=0.4, seed=seed)
+    costs = LineSetup(jobs, trans)
+    return jobs, trans, costs, costs.job_matrix(jobs).tolist()
+
+def _row_order(jobs):
+    # Допустимый, но плохой старт: по приоритету, внутри — по строкам
+    return sorted(range(len(jobs)), key=lambda i: (jobs[i]["Priority"], jobs[i]["_row"]))
+
+def _full_cost(seq, jobs, trans, costs):
+    return analyze_sequence_cost("Линия 1", [jobs[i] for i in seq], trans, costs)[0]
+
+def _check_feasible(seq, jobs):
+    assert sorted(seq) == list(range(len(jobs)))
+    assert violated_precedences([jobs[i] for i in seq]) == []
+    pos = {i: k for k, i in enumerate(seq)}
+    for chain in strict_chains(jobs):
+        assert [pos[i] for i in chain] == sorted(pos[i] for i in chain)
+
+@pytest.mark.parametrize("seed", range(6))
+def test_move_deltas_match_full_recomputation(seed):
+    jobs, trans, costs, setup = _line(40, seed)
+    ls = _LocalSearch(_row_order(jobs), jobs, setup, None)
+    assert ls.total == _full_cost(ls.seq(), jobs, trans, costs)
+    kinds = set()
+    for step in range(200):
+        p = step % ls.n + 1
+        found = ls.best_move(p)
+        if found is None:
+            continue
+        before = _full_cost(ls.seq(), jobs, trans, costs)
+        ls.apply(found[1])
+        kinds.add(found[1][0])
+        after = _full_cost(ls.seq(), jobs, trans, costs)
+        assert after - before == found[0] < 0
+        assert ls.total == after
+        _check_feasible(ls.seq(), jobs)
+    assert kinds
+
+@pytest.mark.parametrize("seed", range(4))
+def test_kicks_keep_sequence_feasible(seed):
+    jobs, trans, costs, setup = _line(30, seed)
+    ls = _LocalSearch(_row_order(jobs), jobs, setup, None)
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        ls.kick(rng, 3)
+        _check_feasible(ls.seq(), jobs)
+        assert ls.total == _full_cost(ls.seq(), jobs, trans, costs)
+
+@pytest.mark.parametrize("seed", range(6))
+def test_local_search_never_worse_than_greedy(seed):
+    jobs, trans, costs, setup = _line(60, seed)
+    rnd = random.Random(seed)
+    lead = [rnd.choice((0, 15, 40)) for _ in jobs] if seed % 2 else None
+    start = greedy_order(jobs, setup, lead)
+    _check_feasible(start, jobs)
+    seq = improve_sequence_local(start, jobs, setup, time_budget=0.3, lead=lead, seed=seed)
+    _check_feasible(seq, jobs)
+    assert _seq_cost(seq, setup, lead) <= _seq_cost(start, setup, lead)
+    assert _seq_cost(seq, setup) == _full_cost(seq, jobs, trans, costs)
+
+def test_tiny_sequences_unchanged():
+    jobs, _, _, setup = _line(1, 0)
+    assert improve_sequence_local([0], jobs, setup, time_budget=0.1) == [0]
+    assert improve_sequence_local([], [], [], time_budget=0.1) == []
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+import pytest
+from planner.jobs import Job, job_from_values
+
+def test_setitem_recomputes_derived_fields():
+    job = job_from_values("J1", "Линия 1", "Сок", "1л", 1000, 500, 1)
+    assert (job.label, job.sku_key, job.dur_min) == ("Сок 1л", "СОК 1Л", 120.0)
+    job["Quantity"] = 2000
+    job["Speed"] = 1000
+    assert job.dur_min == 120.0
+    job["Name"] = "Вода  ё"
+    job["Volume"] = "0.5л"
+    assert (job.label, job.sku_key) == ("Вода  ё 0.5л", "ВОДА Е 0.5Л")
+    assert job["Name"] == "Вода  ё"
+
+def test_sku_key_shared_between_jobs():
+    a = Job("1", "Линия 1", "Сок", "1л", 10, 5, 1)
+    b = Job("2", "Линия 2", "сок", "1Л", 20, 5, 2)
+    assert a.sku_key is b.sku_key
+
+def test_setitem_rejects_unknown_keys():
+    job = Job("1", "Линия 1", "Сок", "1л", 10, 5, 1)
+    with pytest.raises(KeyError):
+        job["sku_key"] = "X"
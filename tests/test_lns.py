@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import random
+import pytest
+from planner.heuristic import greedy_order
+from planner.lns import _reorder_window, improve_sequence_lns, sequence_setup
+from planner.optimizer import analyze_sequence_cost
+from planner.precedence import strict_chains, violated_precedences
+from planner.setup_matrix import LineSetup
+from benchmarks.synthetic import make_line
+
+def _line(n, seed):
+    jobs, trans = make_line(n, n_skus=6, priority_levels=3, strict_density=0.4, seed=seed)
+    costs = LineSetup(jobs, trans)
+    return jobs, trans, costs, costs.job_matrix(jobs).tolist()
+
+def _check_feasible(seq, jobs):
+    assert sorted(seq) == list(range(len(jobs)))
+    assert violated_precedences([jobs[i] for i in seq]) == []
+    pos = {i: k for k, i in enumerate(seq)}
+    for chain in strict_chains(jobs):
+        assert [pos[i] for i in chain] == sorted(pos[i] for i in chain)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_lns_keeps_order_and_never_worse_than_greedy(seed):
+    jobs, trans, costs, setup = _line(50, seed)
+    rnd = random.Random(seed)
+    lead = [rnd.choice((0, 15, 40)) for _ in jobs] if seed % 2 else None
+    start = greedy_order(jobs, setup, lead)
+    seq = improve_sequence_lns(start, jobs, setup, time_budget=1.0, window=8, num_workers=1, lead=lead)
+    _check_feasible(seq, jobs)
+    assert sequence_setup(seq, setup, lead) <= sequence_setup(start, setup, lead)
+    full = analyze_sequence_cost("Линия 1", [jobs[i] for i in seq], trans, costs)[0]
+    assert sequence_setup(seq, setup) == full
+
+@pytest.mark.parametrize("seed", range(4))
+def test_window_cost_matches_full_recomputation(seed):
+    # Окно с соседями: стоимость переставленного окна — та же, что пересчёт всей последовательности
+    jobs, trans, costs, setup = _line(20, seed)
+    seq = sorted(range(len(jobs)), key=lambda i: (jobs[i]["Priority"], jobs[i]["_row"]))
+    p, k = 5, 8
+    win = seq[p:p + k]
+    prev_cost = [setup[seq[p - 1]][i] for i in win]
+    next_cost = [setup[i][seq[p + k]] for i in win]
+    new_win, _ = _reorder_window(win, jobs, setup, prev_cost, next_cost, 2.0, 1)
+    assert sorted(new_win) == sorted(win)
+    new_seq = seq[:p] + new_win + seq[p + k:]
+    _check_feasible(new_seq, jobs)
+    delta = (prev_cost[win.index(new_win[0])] + sequence_setup(new_win, setup) + next_cost[win.index(new_win[-1])]) - \
+        (prev_cost[0] + sequence_setup(win, setup) + next_cost[-1])
+    full = [analyze_sequence_cost("Линия 1", [jobs[i] for i in s], trans, costs)[0] for s in (seq, new_seq)]
+    assert delta == full[1] - full[0] <= 0
+
+def test_tiny_sequences_unchanged():
+    jobs, _, _, setup = _line(1, 0)
+    assert improve_sequence_lns([0], jobs, setup, time_budget=0.1) == [0]
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+import pytest
+from planner.events import optimize_all
+from planner.export import export_plan_file
+from planner.replan import frozen_prefix, plan_rows_from_csv, replan
+from planner.service import inputs_from_payload
+
+START = dt.datetime(2025, 9, 29, 8)
+OPTS = {"solver_time_limit_sec": 1.0, "total_workers": 1, "log_fn": None}
+SKUS = [("Сок", "1л"), ("Вода", "0.5л"), ("Морс", "1л")]
+
+def _inputs(skus_of_jobs):
+    jobs = [{"JobID": f"J{k}", "Line": "Линия 1", "Name": SKUS[s][0], "Volume": SKUS[s][1],
+             "Quantity": 1000 + 100 * k, "Speed": 1000, "Priority": 1} for k, s in enumerate(skus_of_jobs)]
+    keys = [f"{n} {v}" for n, v in SKUS]
+    trans = {"Линия 1": {f"{a}>>{b}": "Мойка" for a in keys for b in keys if a != b}}
+    std = {"Линия 1": {"Мойка": "30;10", "Запуск линии": 20}}
+    return inputs_from_payload({"jobs": jobs, "transitions": trans, "stdstops": std})
+
+def _plan(inputs):
+    rows, _, _ = optimize_all(None, START, inputs=inputs, **OPTS)
+    return rows
+
+def test_frozen_prefix_by_start_and_line():
+    rows = [{"Line": line, "JobID": f"{line}-{k}", "StartDT": START + dt.timedelta(hours=k)}
+            for line in ("Линия 2", "Линия 1") for k in (3, 0, 2, 1)]
+    frozen = frozen_prefix(rows, START + dt.timedelta(minutes=30), freeze_minutes=60)
+    assert {line: [r["JobID"] for r in fr] for line, fr in frozen.items()} == \
+        {"Линия 2": ["Линия 2-0", "Линия 2-1"], "Линия 1": ["Линия 1-0", "Линия 1-1"]}
+    assert frozen_prefix(rows, START - dt.timedelta(hours=2), freeze_minutes=60) == {}
+
+def test_plan_rows_from_csv_round_trip(tmp_path):
+    rows = _plan(_inputs([0, 1, 2, 0]))
+    path = export_plan_file(str(tmp_path / "plan.csv"), rows)[0]
+    back = plan_rows_from_csv(path)
+    assert [(r["JobID"], r["Line"], r["Pos"], r["StartDT"], r["EndDT"]) for r in back] == \
+        [(r["JobID"], r["Line"], r["Pos"], r["StartDT"].replace(second=0, microsecond=0),
+          r["EndDT"].replace(second=0, microsecond=0)) for r in rows]
+    (tmp_path / "bad.csv").write_text("Line,JobID,Pos,Start,End\nЛиния 1,J0,1,завтра,\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Неверная дата"):
+        plan_rows_from_csv(str(tmp_path / "bad.csv"))
+
+def test_replan_keeps_frozen_rows_and_starts_tail_after_them():
+    inputs = _inputs([0, 1, 2, 0, 1, 2, 0, 1])
+    rows = _plan(inputs)
+    now = rows[2]["StartDT"] + dt.timedelta(minutes=1)
+    frozen = frozen_prefix(rows, now, freeze_minutes=0)["Линия 1"]
+    new_rows, stats, _ = replan(None, rows, now, freeze_minutes=0, inputs=inputs, **OPTS)
+    k = len(frozen)
+    assert k == 3
+    assert new_rows[:k] == frozen
+    assert sorted(r["JobID"] for r in new_rows) == sorted(r["JobID"] for r in rows)
+    frozen_end = max(r["EndDT"] for r in frozen)
+    assert all(r["StartDT"] >= max(now, frozen_end) for r in new_rows[k:])
+    assert [r["Pos"] for r in new_rows] == list(range(1, len(rows) + 1))
+
+def test_replan_charges_lead_changeover():
+    # Хвост — только другой SKU: первое задание хвоста ждёт переналадку с SKU последнего замороженного
+    inputs = _inputs([1, 0, 0])
+    frozen_row = {"Line": "Линия 1", "Pos": 1, "JobID": "J0", "Name": "Вода", "Volume": "0.5л", "Priority": 1,
+                  "StrictKey": "", "StartDT": START, "EndDT": START + dt.timedelta(hours=1)}
+    rows, _, events = replan(None, [frozen_row], START, freeze_minutes=10, inputs=inputs, **OPTS)
+    assert rows[0] == frozen_row
+    tail_start = min(r["StartDT"] for r in rows[1:])
+    assert tail_start >= frozen_row["EndDT"] + dt.timedelta(minutes=40)
+    changeovers = [e for e in events if e["Type"] == "Переход"]
+    assert [(e["JobID"], e["Start"], e["Minutes"]) for e in changeovers] == \
+        [(rows[1]["JobID"], frozen_row["EndDT"], 40.0)]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import datetime as dt
+import pytest
+from planner.events import read_plan_inputs
+from planner.scenarios import TOTAL_LINE, apply_scenario, prepare_inputs, run_scenarios, scenario_table
+from benchmarks.workbook import make_workbook
+
+START = dt.datetime(2025, 9, 29, 8)
+EXTRA = {"JobID": "X1", "Line": "Линия 2", "Name": "Новый", "Volume": "1л", "Quantity": 6000, "Speed": 3000,
+         "Priority": 1}
+
+@pytest.fixture
+def inputs():
+    return prepare_inputs(read_plan_inputs(make_workbook(n_lines=3, jobs_per_line=8, n_skus=4, seed=2)))
+
+def _snapshot(inputs):
+    return ([dict(j.items()) for j in inputs["jobs"]],
+            {line: sorted(t.items()) for line, t in inputs["transitions"].items()},
+            dict(inputs["costs"]))
+
+def test_overrides_applied_to_a_copy(inputs):
+    before = _snapshot(inputs)
+    line1 = inputs["transitions"]["Линия 1"]
+    a, b = line1.keys[0], line1.keys[1]
+    dropped = inputs["jobs"][0]["JobID"]
+    sc = apply_scenario(inputs, {"speed_factor": {"Линия 1": 0.5}, "exclude": [dropped], "exclude_lines": ["Линия 3"],
+                                 "extra_jobs": [EXTRA], "event_minutes": {"Мойка": 99},
+                                 "transition_minutes": {"Линия 1": {f"{a}>>{b}": 7}}})
+    assert _snapshot(inputs) == before
+    assert inputs["transitions"]["Линия 1"] is line1
+
+    base = {j["JobID"]: j for j in inputs["jobs"]}
+    got = {j["JobID"]: j for j in sc["jobs"]}
+    assert dropped not in got and "X1" in got
+    assert {j["Line"] for j in sc["jobs"]} == {"Линия 1", "Линия 2"}
+    for jid, j in got.items():
+        if jid != "X1":
+            assert j["Speed"] == base[jid]["Speed"] * (0.5 if j["Line"] == "Линия 1" else 1.0)
+    assert got["X1"]["_row"] > max(j["_row"] for j in inputs["jobs"])
+    assert sc["transitions"]["Линия 1"].get(a, b)[:1] == (7.0,)
+    assert all(rec[0] == 99.0 for _, rec in sc["transitions"]["Линия 2"].items() if rec[2] == "Ключ: Мойка")
+    # матрица изменённой линии пересчитывается, остальные линии — общие с исходными данными
+    sc = apply_scenario(inputs, {"transition_minutes": {"Линия 1": {f"{a}>>{b}": 7}}})
+    assert sorted(sc["costs"]) == ["Линия 2", "Линия 3"]
+    assert sc["costs"]["Линия 2"] is inputs["costs"]["Линия 2"]
+    assert sc["transitions"]["Линия 2"] is inputs["transitions"]["Линия 2"]
+    assert sc["jobs"][0] is inputs["jobs"][0]
+
+def test_bad_scenarios_rejected(inputs):
+    with pytest.raises(ValueError, match="Неизвестные поля"):
+        apply_scenario(inputs, {"remove_lines": ["Линия 3"]})
+    with pytest.raises(ValueError, match="повторяющиеся JobID"):
+        apply_scenario(inputs, {"extra_jobs": [dict(EXTRA, JobID=inputs["jobs"][0]["JobID"])]})
+    with pytest.raises(ValueError, match="Переход"):
+        apply_scenario(inputs, {"transition_minutes": {"Линия 1": {"НЕТ>>ТАКОГО": 5}}})
+
+def test_scenario_table_compares_with_base(inputs):
+    before = _snapshot(inputs)
+    scenarios = [{"name": "База"},
+                 {"name": "Медленнее", "speed_factor": {"Линия 1": 0.5}},
+                 {"name": "Без линии 3", "exclude_lines": ["Линия 3"], "extra_jobs": [EXTRA]}]
+    results = run_scenarios(inputs, scenarios, START, engine="heuristic", solver_time_limit_sec=0.2, log_fn=None)
+    assert _snapshot(inputs) == before
+    table = {(r["Scenario"], r["Line"]): r for r in scenario_table(results)}
+
+    for line in ("Линия 1", "Линия 2", "Линия 3", TOTAL_LINE):
+        assert table[("База", line)]["idle_vs_base"] == 0.0
+        assert table[("База", line)]["makespan_vs_base"] == 0.0
+    slow = table[("Медленнее", "Линия 1")]
+    assert slow["makespan_vs_base"] == round(slow["makespan_min"] - table[("База", "Линия 1")]["makespan_min"], 1)
+    assert slow["makespan_vs_base"] > 0
+    assert table[("Медленнее", "Линия 2")]["makespan_vs_base"] == 0.0
+    assert ("Без линии 3", "Линия 3") not in table
+    assert table[("Без линии 3", "Линия 2")]["n_jobs"] == table[("База", "Линия 2")]["n_jobs"] + 1
+    assert table[("Без линии 3", TOTAL_LINE)]["n_jobs"] == table[("База", TOTAL_LINE)]["n_jobs"] - 8 + 1
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+from planner.service import PlanService, make_handler, request_json
+
+START = "29.09.2025 08:00"
+OPTS = {"solver_time_limit_sec": 1.0, "total_workers": 1}
+
+def _payload(n_jobs=6):
+    skus = [("Сок", "1л"), ("Вода", "0.5л"), ("Морс", "1л")]
+    jobs = [{"JobID": f"J{k}", "Line": "Линия 1", "Name": skus[k % 3][0], "Volume": skus[k % 3][1],
+             "Quantity": 1000 + 100 * k, "Speed": 1000, "Priority": 1} for k in range(n_jobs)]
+    keys = [f"{n} {v}" for n, v in skus]
+    trans = {"Линия 1": {f"{a}>>{b}": "Мойка" for a in keys for b in keys if a != b}}
+    std = {"Линия 1": {"Мойка": "20;10", "Запуск линии": 30}}
+    return {"jobs": jobs, "transitions": trans, "stdstops": std}
+
+@pytest.fixture(scope="module")
+def service():
+    svc = PlanService(max_workers=1)
+    yield svc
+    svc.close()
+
+def test_put_dataset_and_plan(service):
+    info = service.put_dataset("d", _payload())
+    assert info["jobs"] == 6 and info["lines"] == ["Линия 1"]
+    plan_id = service.submit({"start": START, "dataset": "d", "options": OPTS})
+    res = service.status(plan_id, wait=True)
+    assert res["status"] == "done"
+    assert sorted(r["JobID"] for r in res["rows"]) == [f"J{k}" for k in range(6)]
+    assert service.status(plan_id)["status"] == "done"
+
+def test_inline_plan_matches_dataset(service):
+    service.put_dataset("d", _payload())
+    by_name = service.status(service.submit({"start": START, "dataset": "d", "options": OPTS}), wait=True)
+    inline = service.status(service.submit(dict(_payload(), start=START, options=OPTS)), wait=True)
+    assert inline["rows"] == by_name["rows"]
+
+def test_no_wait_and_cancel(service):
+    service.put_dataset("d", _payload())
+    ids = [service.submit({"start": START, "dataset": "d", "options": OPTS}) for _ in range(4)]
+    assert service.status(ids[-1])["status"] in ("queued", "running")
+    assert service.cancel(ids[-1])["status"] == "cancelled"
+    assert [service.status(i, wait=True)["status"] for i in ids[:-1]] == ["done"] * 3
+
+def test_unknown_dataset_and_bad_options(service):
+    with pytest.raises(KeyError):
+        service.submit({"start": START, "dataset": "нет такого"})
+    with pytest.raises(KeyError):
+        service.status("999999")
+    with pytest.raises(ValueError, match="Неизвестные параметры"):
+        service.submit({"start": START, "dataset": "d", "options": {"foo": 1}})
+    with pytest.raises(ValueError, match="options"):
+        service.submit({"start": START, "dataset": "d", "options": ["model"]})
+    with pytest.raises(ValueError, match="jobs"):
+        service.put_dataset("x", {"jobs": "J1", "transitions": {}})
+    with pytest.raises(ValueError):
+        service.submit({"start": "вчера", "dataset": "d"})
+
+def test_put_dataset_between_pin_and_submit_keeps_file(service):
+    # Новая версия загружается в момент постановки запроса в пул: файл его версии не удаляется
+    service.put_dataset("race", _payload())
+    pool_submit = service.pool.submit
+    def submit(fn, dataset, *args):
+        service.put_dataset("race", _payload(4))
+        assert os.path.exists(dataset[2])
+        return pool_submit(fn, dataset, *args)
+    service.pool.submit = submit
+    try:
+        plan_id = service.submit({"start": START, "dataset": "race", "options": OPTS})
+    finally:
+        service.pool.submit = pool_submit
+    res = service.status(plan_id, wait=True)
+    assert res["status"] == "done" and len(res["rows"]) == 6
+
+def test_concurrent_put_dataset_and_submit(service):
+    service.put_dataset("busy", _payload())
+    stop = threading.Event()
+    def reload():
+        n = 0
+        while not stop.is_set():
+            service.put_dataset("busy", _payload(6 + n % 2))
+            n += 1
+    t = threading.Thread(target=reload)
+    t.start()
+    try:
+        ids = [service.submit({"start": START, "dataset": "busy", "options": dict(OPTS, solver_time_limit_sec=0.2)})
+               for _ in range(20)]
+    finally:
+        stop.set()
+        t.join()
+    assert {service.status(i, wait=True)["status"] for i in ids} == {"done"}
+
+@pytest.fixture(scope="module")
+def url(service):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+def _post(url, body: bytes):
+    req = urllib.request.Request(url, data=body, method="POST")
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def test_http_errors(service, url):
+    assert request_json(url + "/datasets/h", _payload())["jobs"] == 6
+    for body in ([1, 2], "x", {"start": START, "dataset": "h", "options": [1]}, {"start": START, "dataset": ["h"]}):
+        code, res = _post(url + "/plan", json.dumps(body).encode())
+        assert code == 400 and res["error"]
+    assert _post(url + "/plan", b"{bad")[0] == 400
+    assert _post(url + "/plan", json.dumps({"start": START, "dataset": "zz"}).encode())[0] == 404
+    res = request_json(url + "/plan", {"start": START, "dataset": "h", "options": OPTS})
+    assert res["status"] == "done"
+    assert request_json(f"{url}/plan/{res['id']}")["status"] == "done"
+
+def test_http_unexpected_error_is_500(service, url, monkeypatch):
+    def boom():
+        raise AttributeError("сломано")
+    monkeypatch.setattr(service, "health", boom)
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(url + "/health")
+    assert e.value.code == 500
+    assert "сломано" in json.loads(e.value.read())["error"]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+import zipfile
+import pytest
+from planner.excel_io import read_jobs_from_active_excel
+from planner.sources import CsvWorkbook, XlsxWorkbook, open_workbook
+from planner.transitions import read_transition_matrix_from_active_excel
+from benchmarks.fake_excel import make_fake_app
+
+class Inline(str):
+    """Строка, записанная в .xlsx клеткой inlineStr, а не через sharedStrings."""
+
+class Rich(str):
+    """Строка sharedStrings из двух фрагментов <r> (форматированный текст)."""
+
+JOBS_HEADER = ["JobID", "Line", "Name", "Volume", "Quantity", "Speed", "Priority", "Строгий порядок"]
+JOBS = [
+    ["J1", "Линия 1", Rich("Сок"), "1л", 1500, 6000, 1, None],
+    ["J2", "Линия 1", "Вода", "0.5л", 2500.5, 6000, 2, "S1"],
+    ["J3", "Линия 1", "Сок", "1л", Inline("3 000,5"), 3000, 2, "S1"],
+    ["J4", "Линия 2", "Морс", "1л", None, 6000, 1, None],
+    ["J5", "Линия 2", "Морс", "1л", 1200, 6000, 1, None],
+]
+STD_HEADER = ["Событие", "Линия 1", "Линия 2"]
+STD = [["Мойка", "20;10", "25;10"], ["Переход", 30, 45], ["Запуск линии", 30, 20]]
+TRANS = [
+    ["Линия: Линия 1", None, None],
+    [None, "Сок 1л", "Вода 0.5л"],
+    ["Сок 1л", None, "Мойка"],
+    ["Вода 0.5л", "Переход", None],
+    [None, None, None],
+    ["Линия: Линия 2", None, None],
+    [None, "Морс 1л", "Сок 1л"],
+    ["Морс 1л", None, None],
+    ["Сок 1л", "Мойка", None],
+]
+
+_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+def _col(c):
+    letters = ""
+    while c:
+        c, rem = divmod(c - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def _esc(s):
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _sheet_xml(grid, r0, c0, strings, dimension, table):
+    rows = []
+    for i, values in enumerate(grid):
+        cells = []
+        for j, v in enumerate(values):
+            ref = f"{_col(c0 + j)}{r0 + i}"
+            if v is None:
+                continue
+            if isinstance(v, Inline):
+                cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{_esc(v)}</t></is></c>')
+            elif isinstance(v, str):
+                strings.setdefault(v, len(strings))
+                cells.append(f'<c r="{ref}" t="s"><v>{strings[v]}</v></c>')
+            else:
+                cells.append(f'<c r="{ref}"><v>{v}</v></c>')
+        if cells:
+            rows.append(f'<row r="{r0 + i}">{"".join(cells)}</row>')
+    last = f"{_col(c0 + len(grid[0]) - 1)}{r0 + len(grid) - 1}"
+    dim = f'<dimension ref="{_col(c0)}{r0}:{last}"/>' if dimension else ""
+    parts = '<tableParts count="1"><tablePart r:id="rId1"/></tableParts>' if table else ""
+    return (f'<worksheet xmlns="{_MAIN}" xmlns:r="{_REL}">{dim}<sheetData>{"".join(rows)}</sheetData>'
+            f'{parts}</worksheet>'), f"{_col(c0)}{r0}:{last}"
+
+def write_xlsx(path):
+    # Таблицы не с A1, у карты переходов нет <dimension>, пустые клетки и строки не пишутся
+    sheets = [("JOBS", [JOBS_HEADER] + JOBS, 3, 2, True, "JobsTable"),
+              ("Таблица_Нормативов", [STD_HEADER] + STD, 1, 1, True, "StdStops"),
+              ("Карта_Переходов", TRANS, 1, 1, False, None)]
+    strings = {}
+    with zipfile.ZipFile(path, "w") as z:
+        wb_sheets, wb_rels = [], []
+        for k, (name, grid, r0, c0, dimension, table) in enumerate(sheets, start=1):
+            xml, ref = _sheet_xml(grid, r0, c0, strings, dimension, table)
+            z.writestr(f"xl/worksheets/sheet{k}.xml", xml)
+            wb_sheets.append(f'<sheet name="{name}" sheetId="{k}" r:id="rId{k}"/>')
+            wb_rels.append(f'<Relationship Id="rId{k}" Type="{_REL}/worksheet" Target="worksheets/sheet{k}.xml"/>')
+            if table:
+                z.writestr(f"xl/worksheets/_rels/sheet{k}.xml.rels",
+                           f'<Relationships xmlns="{_PKG}"><Relationship Id="rId1" Type="{_REL}/table" '
+                           f'Target="../tables/table{k}.xml"/></Relationships>')
+                z.writestr(f"xl/tables/table{k}.xml",
+                           f'<table xmlns="{_MAIN}" id="{k}" name="Таблица{k}" displayName="{table}" ref="{ref}"/>')
+        z.writestr("xl/workbook.xml", f'<workbook xmlns="{_MAIN}" xmlns:r="{_REL}"><sheets>{"".join(wb_sheets)}'
+                                      f'</sheets></workbook>')
+        z.writestr("xl/_rels/workbook.xml.rels", f'<Relationships xmlns="{_PKG}">{"".join(wb_rels)}</Relationships>')
+        si = [f"<si><r><t>{_esc(s[:2])}</t></r><r><t>{_esc(s[2:])}</t></r></si>" if isinstance(s, Rich)
+              else f"<si><t>{_esc(s)}</t></si>" for s in strings]
+        z.writestr("xl/sharedStrings.xml", f'<sst xmlns="{_MAIN}">{"".join(si)}</sst>')
+
+def _csv_cell(v):
+    if v is None:
+        return ""
+    if isinstance(v, float):
+        return str(v).replace(".", ",")
+    return str(v)
+
+def write_csv(directory):
+    os.makedirs(directory)
+    for name, grid in (("JobsTable", [JOBS_HEADER] + JOBS), ("StdStops", [STD_HEADER] + STD),
+                       ("Карта_Переходов", TRANS)):
+        with open(os.path.join(directory, f"{name}.csv"), "w", newline="", encoding="utf-8-sig") as f:
+            csv.writer(f, delimiter=";").writerows([[_csv_cell(v) for v in row] for row in grid])
+
+def _read(book):
+    jobs = [dict(j.items()) for j in read_jobs_from_active_excel(book)]
+    tdata = read_transition_matrix_from_active_excel(book)
+    return jobs, {line: sorted(t.items()) for line, t in tdata["transitions"].items()}, tdata["start_launch"]
+
+@pytest.fixture(scope="module")
+def sources(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("book")
+    write_xlsx(str(tmp / "book.xlsx"))
+    write_csv(str(tmp / "csv"))
+    com = make_fake_app(JOBS_HEADER, [list(r) for r in JOBS], STD_HEADER, STD, TRANS)
+    return {"com": com, "xlsx": open_workbook(str(tmp / "book.xlsx")), "csv": open_workbook(str(tmp / "csv"))}
+
+def test_file_sources_match_com(sources):
+    assert isinstance(sources["xlsx"], XlsxWorkbook) and isinstance(sources["csv"], CsvWorkbook)
+    ref = _read(sources["com"])
+    assert _read(sources["xlsx"]) == ref
+    assert _read(sources["csv"]) == ref
+
+def test_values_coerced_and_empty_cells_skipped(sources):
+    jobs, trans, start = _read(sources["xlsx"])
+    # J4 без количества не планируется; "3 000,5" из текстовой клетки — число
+    assert [(j["JobID"], j["Name"], j["Quantity"], j["Priority"], j["StrictKey"]) for j in jobs] == [
+        ("J1", "Сок", 1500.0, 1, ""), ("J2", "Вода", 2500.5, 2, "S1"), ("J3", "Сок", 3000.5, 2, "S1"),
+        ("J5", "Морс", 1200.0, 1, "")]
+    assert start == {"Линия 1": (30.0, -1.0), "Линия 2": (20.0, -1.0)}
+    line1 = dict(trans["Линия 1"])
+    assert line1["СОК 1Л>>ВОДА 0.5Л"] == (20.0, 10.0, "Ключ: Мойка")
+    assert line1["ВОДА 0.5Л>>СОК 1Л"] == (30.0, -1.0, "Ключ: Переход")
+
+def test_table_rows_and_missing_sheets(sources):
+    header, rows = sources["xlsx"].table("JOBS", "jobstable")
+    assert header == JOBS_HEADER
+    rows = list(rows)
+    assert rows[3] == ("J4", "Линия 2", "Морс", "1л", None, 6000.0, 1.0, None)
+    assert list(sources["xlsx"].used_rows("Карта_Переходов"))[4] == ()
+    for book in (sources["xlsx"], sources["csv"]):
+        assert book.table("Карта_Переходов", "JobsTable2") is None
+        with pytest.raises(KeyError):
+            book.used_rows("Нет листа")
+    with pytest.raises(RuntimeError, match="Неизвестный формат"):
+        open_workbook("book.xls")
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import pytest
+from planner.jobs import job_from_values
+from planner.utils import parse_lines_cell
+
+def test_parse_lines_cell():
+    assert parse_lines_cell("Линия 1; Линия 3=9000,5\nЛиния 4=") == \
+        {"Линия 1": None, "Линия 3": 9000.5, "Линия 4": None}
+    assert parse_lines_cell({"Линия 2": None, "Линия 3": 7}) == {"Линия 2": None, "Линия 3": 7.0}
+
+@pytest.mark.parametrize("cell", ["Линия 3=-5", "Линия 3=0", "Линия 3=abc", "Линия 3=inf", {"Линия 3": 0}])
+def test_parse_lines_cell_rejects_bad_speed(cell):
+    with pytest.raises(RuntimeError, match="неверная скорость"):
+        parse_lines_cell(cell)
+
+def test_job_lines_speed_checked():
+    with pytest.raises(RuntimeError, match="неверная скорость '0' для линии 'Линия 3'"):
+        job_from_values("J1", "Линия 1", "Сок", "1л", 100, 50, 1, lines="Линия 3=0")